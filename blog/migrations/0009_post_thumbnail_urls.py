@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_update_help_text_replace_float_classes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='thumbnail_urls',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
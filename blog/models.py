@@ -17,7 +17,7 @@ import static_assets.models as models_static_assets
 User = get_user_model()
 
 
-class Post(mixins.CreatedUpdatedMixin, mixins.StaticThumbnailURLMixin, models.Model):
+class Post(mixins.CreatedUpdatedMixin, mixins.GeneratedThumbnailURLMixin, models.Model):
     class Meta:
         ordering = ('-date_published',)
 
@@ -1,12 +1,9 @@
-from typing import List
-
 from django.views.generic import ListView, DetailView
 from django.db.models.query import QuerySet
 
 from blog.models import Post, Like
-from comments.models import Comment
-from comments.queries import get_annotated_comments
-from comments.views.common import comments_to_template_type
+from comments.queries import get_annotated_comments_page
+from comments.views.common import comments_page_to_template_type
 
 
 class PostList(ListView):
@@ -42,8 +39,8 @@ class PostDetail(DetailView):
             context['user_film_role'] = post.author.film_crew.filter(film=post.film)[0].role
 
         # Comment threads
-        comments: List[Comment] = get_annotated_comments(post, self.request.user.pk)
-        context['comments'] = comments_to_template_type(
+        comments = get_annotated_comments_page(post, self.request.user.pk)
+        context['comments'] = comments_page_to_template_type(
             comments, post.comment_url, self.request.user
         )
 
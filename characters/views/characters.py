@@ -1,5 +1,5 @@
 """Characters and character version views."""
-from typing import Optional, List
+from typing import Optional
 
 from django.contrib.redirects.models import Redirect
 from django.db import models
@@ -15,9 +15,8 @@ from characters.queries import (
     get_character_version,
     get_character_showcase,
 )
-from comments.models import Comment
-from comments.queries import get_annotated_comments
-from comments.views.common import comments_to_template_type
+from comments.queries import get_annotated_comments_page
+from comments.views.common import comments_page_to_template_type
 from stats.models import StaticAssetView
 
 
@@ -111,8 +110,8 @@ class CharacterVersionDetail(_CharacterViewMixin, DetailView):
         ] = self.request.user.is_staff and self.request.user.has_perm('character.change_character')
 
         # Comment threads
-        comments: List[Comment] = get_annotated_comments(character_version, self.request.user.pk)
-        context['comments'] = comments_to_template_type(
+        comments = get_annotated_comments_page(character_version, self.request.user.pk)
+        context['comments'] = comments_page_to_template_type(
             comments, character_version.comment_url, self.request.user
         )
 
@@ -143,8 +142,8 @@ class CharacterShowcaseDetail(_CharacterViewMixin, DetailView):
         ] = self.request.user.is_staff and self.request.user.has_perm('character.change_character')
 
         # Comment threads
-        comments: List[Comment] = get_annotated_comments(showcase, self.request.user.pk)
-        context['comments'] = comments_to_template_type(
+        comments = get_annotated_comments_page(showcase, self.request.user.pk)
+        context['comments'] = comments_page_to_template_type(
             comments, showcase.comment_url, self.request.user
         )
 
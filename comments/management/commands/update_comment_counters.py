@@ -0,0 +1,17 @@
+"""Recalculate denormalized like and reply counters of all comments."""
+import logging
+
+from django.core.management.base import BaseCommand
+
+from comments.queries import update_comment_counters
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class Command(BaseCommand):
+    """Recalculate `like_count` and `reply_count` of all comments."""
+
+    def handle(self, *args, **options):  # noqa: D102
+        updated = update_comment_counters()
+        logger.info('Updated counters of %s comments', updated)
@@ -0,0 +1,45 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def update_comment_counters(apps, schema_editor):
+    Comment = apps.get_model('comments', 'Comment')
+    Like = apps.get_model('comments', 'Like')
+    like_counts = (
+        Like.objects.filter(comment_id=OuterRef('pk'))
+        .values('comment_id')
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    reply_counts = (
+        Comment.objects.filter(reply_to_id=OuterRef('pk'), date_deleted__isnull=True)
+        .values('reply_to_id')
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    Comment.objects.update(
+        like_count=Coalesce(Subquery(like_counts), 0),
+        reply_count=Coalesce(Subquery(reply_counts), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0002_auto_20201218_1135'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(update_comment_counters, reverse_code=migrations.RunPython.noop),
+    ]
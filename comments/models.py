@@ -1,8 +1,11 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, Dict, Any
 
 from actstream import action
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import Case, F, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
 from django.urls.base import reverse
 from django.utils import timezone
 
@@ -10,6 +13,30 @@ from common import mixins
 
 User = get_user_model()
 
+# Recursive CTEs used to select a whole comment tree (or a part of it) in a single query.
+# The subtree query starts at the given comment and follows its replies all the way down;
+# the tree query first walks up `reply_to` to the root comment and then does the same from there.
+_SUBTREE_PKS_SQL = '''
+    WITH RECURSIVE subtree AS (
+        SELECT id FROM comments_comment WHERE id = %s
+        UNION ALL
+        SELECT c.id FROM comments_comment c JOIN subtree s ON c.reply_to_id = s.id
+    )
+    SELECT id FROM subtree
+'''
+_TREE_PKS_SQL = '''
+    WITH RECURSIVE ancestors AS (
+        SELECT id, reply_to_id FROM comments_comment WHERE id = %s
+        UNION ALL
+        SELECT c.id, c.reply_to_id FROM comments_comment c JOIN ancestors a ON c.id = a.reply_to_id
+    ), tree AS (
+        SELECT id FROM ancestors WHERE reply_to_id IS NULL
+        UNION ALL
+        SELECT c.id FROM comments_comment c JOIN tree t ON c.reply_to_id = t.id
+    )
+    SELECT id FROM tree
+'''
+
 
 class Comment(mixins.CreatedUpdatedMixin, models.Model):
     class Meta:
@@ -46,6 +73,13 @@ class Comment(mixins.CreatedUpdatedMixin, models.Model):
 
     likes = models.ManyToManyField(User, through='Like', related_name='liked_comments')
 
+    # Denormalized counters, so that displaying comments doesn't require any aggregation.
+    # `reply_count` only counts direct replies which are not deleted.
+    # Both are kept up to date by the methods of this model and by `set_comment_like`;
+    # `manage.py update_comment_counters` recalculates them from scratch.
+    like_count = models.PositiveIntegerField(default=0, editable=False)
+    reply_count = models.PositiveIntegerField(default=0, editable=False)
+
     def __str__(self) -> str:
         return f'Comment by {self.username} @ {self.date_updated:%d %B %Y %H:%M:%S}'
 
@@ -100,6 +134,14 @@ class Comment(mixins.CreatedUpdatedMixin, models.Model):
     def hard_delete_tree_url(self) -> str:
         return reverse('comment-hard-delete-tree', kwargs={'comment_pk': self.pk})
 
+    @property
+    def replies_url(self) -> str:
+        return reverse('comment-replies', kwargs={'comment_pk': self.pk})
+
+    @property
+    def next_page_url(self) -> str:
+        return reverse('comment-next-page', kwargs={'comment_pk': self.pk})
+
     def soft_delete(self) -> None:
         """Instead of removing a comment, only marks it as deleted by setting its `date_deleted`.
 
@@ -115,33 +157,61 @@ class Comment(mixins.CreatedUpdatedMixin, models.Model):
         if not self.is_deleted:
             self.date_deleted = timezone.now()
             self.save()
+            self._update_parent_reply_count(-1)
 
     def soft_delete_tree(self) -> None:
-        """Soft-deletes (i.e. mark as deleted) the comment and all its replies."""
-        for reply in self.replies.all():
-            reply.soft_delete_tree()
-        self.soft_delete()
+        """Soft-deletes (i.e. mark as deleted) the comment and all its replies.
 
-    def _get_tree_comments_pks(self) -> List[int]:
-        """Returns the pks of all the comments in the `self` comment tree."""
-        root = self
-        while root.reply_to is not None:
-            root = root.reply_to
-
-        tree = [root]
-        replies = list(root.replies.all())
-
-        def add_replies_to_tree_comments(
-            tree: List['Comment'], replies: List['Comment']
-        ) -> List['Comment']:
-            tree.extend(replies)
-            for comment in replies:
-                tree = add_replies_to_tree_comments(tree, list(comment.replies.all()))
-            return tree
-
-        tree = add_replies_to_tree_comments(tree, replies)
+        The entire subtree is updated with a single query. Comments that were already
+        soft-deleted keep their original deletion date, same as with `soft_delete`.
+        """
+        now = timezone.now()
+        self.get_subtree_comments().update(
+            date_updated=Case(
+                When(date_deleted__isnull=True, then=Value(now)), default=F('date_updated')
+            ),
+            date_deleted=Coalesce(F('date_deleted'), Value(now)),
+            reply_count=0,
+        )
+        if not self.is_deleted:
+            self.date_deleted = self.date_updated = now
+            self._update_parent_reply_count(-1)
+        self.reply_count = 0
 
-        return [comment.pk for comment in tree]
+    def hard_delete_tree(self) -> None:
+        """Completely deletes the comment and all its replies."""
+        self.get_subtree_comments().delete()
+        if not self.is_deleted:
+            self._update_parent_reply_count(-1)
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        adding = self._state.adding
+        if not adding and kwargs.get('update_fields') is None:
+            # Counters are only changed with atomic UPDATEs: don't overwrite them with stale values
+            kwargs['update_fields'] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in ('like_count', 'reply_count')
+            ]
+        super().save(*args, **kwargs)
+        if adding and not self.is_deleted:
+            self._update_parent_reply_count(1)
+
+    def _update_parent_reply_count(self, delta: int) -> None:
+        if self.reply_to_id is None:
+            return
+        Comment.objects.filter(pk=self.reply_to_id).update(reply_count=F('reply_count') + delta)
+
+    def get_subtree_comments(self) -> 'models.QuerySet[Comment]':
+        """Return a queryset of the comment and all its replies, at any depth."""
+        return Comment.objects.filter(pk__in=RawSQL(_SUBTREE_PKS_SQL, (self.pk,)))
+
+    def get_tree_comments(self) -> 'models.QuerySet[Comment]':
+        """Return a queryset of all the comments in the `self` comment tree.
+
+        This includes the root comment of the conversation and all its replies, at any depth.
+        """
+        return Comment.objects.filter(pk__in=RawSQL(_TREE_PKS_SQL, (self.pk,)))
 
     def archive_tree(self) -> bool:
         """Switches the 'is_archived' status of the comment and the entire comment tree.
@@ -150,8 +220,8 @@ class Comment(mixins.CreatedUpdatedMixin, models.Model):
         also affects the comment's parents and replies - the entire tree.
         """
         new_archived_status = not self.is_archived
-        tree_pks = self._get_tree_comments_pks()
-        Comment.objects.filter(pk__in=tree_pks).update(is_archived=new_archived_status)
+        self.get_tree_comments().update(is_archived=new_archived_status)
+        self.is_archived = new_archived_status
 
         return new_archived_status
 
@@ -168,7 +238,7 @@ class Comment(mixins.CreatedUpdatedMixin, models.Model):
             'message_html': with_shortcodes(self.message_html),
             'like_url': self.like_url,
             'liked': False,
-            'likes': self.like_set.count(),
+            'likes': self.like_count,
             'edit_url': self.edit_url,
             'delete_url': self.delete_url,
         }
@@ -1,15 +1,103 @@
+from datetime import datetime
+import dataclasses
 import logging
-from typing import List
+from typing import Any, List, Optional
 
-from django.db.models import Model, Exists, OuterRef, Case, Value, When, Count, QuerySet
+from django.db.models import (
+    Model,
+    Exists,
+    OuterRef,
+    Case,
+    Value,
+    When,
+    Count,
+    QuerySet,
+    F,
+    Q,
+    Subquery,
+)
+from django.db.models.expressions import RawSQL
 from django.db.models.fields import BooleanField
+from django.db.models.functions import Coalesce
 
 import comments.models as models
 
-
 log = logging.getLogger(__name__)
 
 
+# Selects all replies, at any depth, to the comments with the given pks.
+_REPLIES_PKS_SQL = '''
+    WITH RECURSIVE replies AS (
+        SELECT id FROM comments_comment WHERE reply_to_id = ANY(%s)
+        UNION ALL
+        SELECT c.id FROM comments_comment c JOIN replies r ON c.reply_to_id = r.id
+    )
+    SELECT id FROM replies
+'''
+COMMENTS_PAGE_SIZE = 20
+# Relations of comments to the objects they belong to, and filters which these objects must match
+# to be visible to users other than staff, same as in the views which display them.
+COMMENT_TARGET_FILTERS = {
+    'section': {
+        'is_published': True,
+        'chapter__is_published': True,
+        'chapter__training__is_published': True,
+    },
+    'post': {'is_published': True},
+    'asset': {'is_published': True},
+    'character_version': {'is_published': True, 'character__is_published': True},
+    'character_showcase': {'is_published': True, 'character__is_published': True},
+}
+
+
+@dataclasses.dataclass
+class CommentsPage:
+    """A page of top-level comments of an object, ordered by number of likes and date.
+
+    If replies were requested, `comments` also contains all replies to the top-level comments.
+    """
+
+    comments: List[models.Comment]
+    number_of_comments: int
+    # Points to the last top-level comment on this page, None if this is the last page
+    next_cursor: Optional[str]
+    last_comment_pk: Optional[int]
+
+
+def _has_visible_replies() -> Exists:
+    """Check if the outer comment has a direct reply which is displayed.
+
+    Deleted replies are displayed as long as they have replies which are not deleted,
+    so a comment can have visible replies even if its `reply_count` is 0.
+    """
+    return Exists(
+        models.Comment.objects.filter(reply_to_id=OuterRef('pk')).exclude(
+            date_deleted__isnull=False, reply_count=0
+        )
+    )
+
+
+def _get_visible_comments(comments: 'QuerySet[models.Comment]') -> 'QuerySet[models.Comment]':
+    """Exclude comments which have been marked as deleted and don't have any other replies."""
+    return comments.filter(
+        _has_visible_replies() | Q(date_deleted__isnull=True) | Q(reply_count__gt=0)
+    )
+
+
+def _annotate_comments(
+    comments: 'QuerySet[models.Comment]', user_pk: int
+) -> 'QuerySet[models.Comment]':
+    return comments.prefetch_related('user', 'reply_to').annotate(
+        liked=Exists(models.Like.objects.filter(comment_id=OuterRef('pk'), user_id=user_pk)),
+        number_of_likes=F('like_count'),
+        owned_by_current_user=Case(
+            When(user_id=user_pk, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        ),
+    )
+
+
 def get_annotated_comments(obj: Model, user_pk: int) -> List[models.Comment]:
     """Return a list of annotated comments associated with the model instance `obj`.
 
@@ -25,38 +113,166 @@ def get_annotated_comments(obj: Model, user_pk: int) -> List[models.Comment]:
         - liked: bool; whether the current user (given by user_pk argument) likes a comment;
         - number_of_likes: int; the number of likes associated with a comment;
         - owned_by_current_user: bool.
+        Numbers of likes and replies are read from the comments' denormalized counters,
+        so no aggregation is necessary.
     """
     comments: 'QuerySet[models.Comment]' = getattr(obj, 'comments')
 
-    return list(
-        comments.exclude(date_deleted__isnull=False, replies__isnull=True)
-        .exclude(date_deleted__isnull=False, replies__date_deleted__isnull=False)
-        .prefetch_related('user', 'reply_to', 'like_set')
-        .annotate(
-            liked=Exists(models.Like.objects.filter(comment_id=OuterRef('pk'), user_id=user_pk)),
-            # This excludes likes from deleted users:
-            #    see https://code.djangoproject.com/ticket/15183
-            # number_of_likes=Count('likes'),
-            number_of_likes=Count('like__id'),
-            owned_by_current_user=Case(
-                When(user_id=user_pk, then=Value(True)),
-                default=Value(False),
-                output_field=BooleanField(),
-            ),
+    return list(_annotate_comments(_get_visible_comments(comments), user_pk).all())
+
+
+def _encode_cursor(comment: models.Comment) -> str:
+    return f'{comment.like_count},{comment.date_created.isoformat()},{comment.pk}'
+
+
+def _decode_cursor(cursor: str) -> Q:
+    """Return a filter selecting top-level comments which follow the one the cursor points to.
+
+    Raises:
+        ValueError: if the cursor is malformed.
+    """
+    like_count, rest = cursor.split(',', 1)
+    date_created, pk = rest.rsplit(',', 1)
+    likes, date, after_pk = int(like_count), datetime.fromisoformat(date_created), int(pk)
+    return (
+        Q(like_count__lt=likes)
+        | Q(like_count=likes, date_created__gt=date)
+        | Q(like_count=likes, date_created=date, pk__gt=after_pk)
+    )
+
+
+def get_annotated_comments_page(
+    obj: Model,
+    user_pk: int,
+    cursor: Optional[str] = None,
+    page_size: int = COMMENTS_PAGE_SIZE,
+    with_replies: bool = False,
+) -> CommentsPage:
+    """Return a page of annotated top-level comments associated with the model instance `obj`.
+
+    Top-level comments are ordered by number of likes and date, and are paginated using
+    a keyset cursor, so that fetching any page costs the same.
+    The same comments as in `get_annotated_comments` are excluded and the same annotations
+    are added, as well as `has_visible_replies` of the top-level comments.
+
+    Args:
+        obj: a model instance with comments under the attribute 'comments';
+        user_pk: an int, the pk of the currently logged-in user;
+        cursor: (optional) `next_cursor` of the previous page; by default, the first page;
+        page_size: (optional) number of top-level comments per page;
+        with_replies: (optional) whether all the replies to the top-level comments should also
+            be fetched. By default they are expected to be loaded on demand.
+
+    Raises:
+        ValueError: if the cursor is malformed.
+    """
+    comments: 'QuerySet[models.Comment]' = _get_visible_comments(getattr(obj, 'comments'))
+
+    top_level_comments = comments.filter(reply_to__isnull=True).order_by(
+        '-like_count', 'date_created', 'pk'
+    )
+    if cursor:
+        top_level_comments = top_level_comments.filter(_decode_cursor(cursor))
+    page = list(
+        _annotate_comments(top_level_comments, user_pk).annotate(
+            has_visible_replies=_has_visible_replies()
+        )[: page_size + 1]
+    )
+    has_next = len(page) > page_size
+    page = page[:page_size]
+
+    if with_replies and page:
+        replies = _annotate_comments(
+            comments.filter(pk__in=RawSQL(_REPLIES_PKS_SQL, ([c.pk for c in page],))), user_pk
         )
-        .all()
+        page.extend(replies)
+
+    return CommentsPage(
+        comments=page,
+        number_of_comments=comments.count(),
+        next_cursor=_encode_cursor(page[-1]) if has_next else None,
+        last_comment_pk=page[-1].pk if has_next else None,
+    )
+
+
+def get_annotated_replies(comment: models.Comment, user_pk: int) -> List[models.Comment]:
+    """Return a list of annotated replies, at any depth, to the given comment.
+
+    The same comments as in `get_annotated_comments` are excluded and the same annotations
+    are added.
+    """
+    replies = models.Comment.objects.filter(pk__in=RawSQL(_REPLIES_PKS_SQL, ([comment.pk],)))
+    return list(_annotate_comments(_get_visible_comments(replies), user_pk))
+
+
+def get_visible_comment_target(comment_pk: int, user: Any) -> Optional[Model]:
+    """Return the object the given comment belongs to, if the given user is allowed to see it.
+
+    Unlike `Comment.get_action_target`, looks up which object it is in a single query.
+    """
+    target_pks = (
+        models.Comment.objects.filter(pk=comment_pk).values(*COMMENT_TARGET_FILTERS).first()
     )
+    if not target_pks:
+        return None
+    for field, filters in COMMENT_TARGET_FILTERS.items():
+        if target_pks[field] is None:
+            continue
+        target_model = models.Comment._meta.get_field(field).related_model
+        targets = target_model.objects.filter(pk=target_pks[field])
+        if not user.is_staff and not user.is_superuser:
+            targets = targets.filter(**filters)
+        return targets.first()
+    return None
 
 
 def set_comment_like(*, comment_pk: int, user_pk: int, like: bool) -> int:
+    """Like or unlike a comment, keeping its `like_count` up to date.
+
+    Returns:
+        The updated number of likes of the comment.
+    """
     if like:
-        models.Like.objects.update_or_create(
-            comment_id=comment_pk, user_id=user_pk,
-        )
+        _, created = models.Like.objects.get_or_create(comment_id=comment_pk, user_id=user_pk)
+        delta = int(created)
     else:
-        models.Like.objects.filter(comment_id=comment_pk, user_id=user_pk).delete()
+        _, deleted = models.Like.objects.filter(comment_id=comment_pk, user_id=user_pk).delete()
+        delta = -deleted.get(models.Like._meta.label, 0)
+
+    comments = models.Comment.objects.filter(pk=comment_pk)
+    if delta:
+        comments.update(like_count=F('like_count') + delta)
+    return comments.values_list('like_count', flat=True).get()
+
+
+def update_comment_counters(comments: 'Optional[QuerySet[models.Comment]]' = None) -> int:
+    """Recalculate denormalized `like_count` and `reply_count` of the given comments.
 
-    return models.Like.objects.filter(comment_id=comment_pk).count()
+    Args:
+        comments: (optional) a queryset of comments to update, all comments by default.
+
+    Returns:
+        The number of updated comments.
+    """
+    if comments is None:
+        comments = models.Comment.objects.all()
+
+    like_counts = (
+        models.Like.objects.filter(comment_id=OuterRef('pk'))
+        .values('comment_id')
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    reply_counts = (
+        models.Comment.objects.filter(reply_to_id=OuterRef('pk'), date_deleted__isnull=True)
+        .values('reply_to_id')
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    return comments.update(
+        like_count=Coalesce(Subquery(like_counts), 0),
+        reply_count=Coalesce(Subquery(reply_counts), 0),
+    )
 
 
 def edit_comment(*, comment_pk: int, user_pk: int, message: str) -> models.Comment:
@@ -100,7 +316,7 @@ def delete_comment_tree(*, comment_pk: int) -> None:
 def hard_delete_comment_tree(*, comment_pk: int) -> None:
     """Completely deletes the comment and all its replies."""
     comment: models.Comment = models.Comment.objects.get(id=comment_pk)
-    comment.delete()
+    comment.hard_delete_tree()
 
 
 def archive_comment(*, comment_pk: int) -> bool:
@@ -669,17 +669,103 @@ window.comments = (function comments() {
     return EditInput.getOrWrap(element);
   };
 
+  function createFromData(data) {
+    return Comment.create(
+      data.id,
+      data.full_name,
+      data.profile_image_url,
+      data.date_string,
+      data.message,
+      data.message_html,
+      data.like_url,
+      data.liked,
+      data.likes,
+      data.edit_url,
+      data.delete_url
+    );
+  }
+
   class Section {
     constructor(element) {
       Section.instances.set(element, this);
       this.element = element;
       this.commentUrl = element.dataset.commentUrl;
       this.profileImageUrl = element.dataset.profileImageUrl;
+      this._setupEventListeners();
+    }
+
+    get loadMoreButton() {
+      return this.element.querySelector('.comments-load-more');
+    }
+
+    _setupEventListeners() {
+      this.loadMoreButton &&
+        this.loadMoreButton.addEventListener('click', (event) => {
+          event.preventDefault();
+          this._loadMoreComments();
+        });
+      this.element.querySelectorAll('.comments-show-replies').forEach((button) => {
+        const comment = Comment.getOrWrap(button.closest(`.${Comment.className}`));
+        Section._setupShowRepliesButton(comment, button);
+      });
     }
 
     prependComment(comment) {
       this.element.querySelector('.comments').prepend(comment.element);
     }
+
+    appendComment(comment) {
+      this.element.querySelector('.comments').append(comment.element);
+    }
+
+    _loadMoreComments() {
+      const { loadMoreButton } = this;
+      loadMoreButton.disabled = true;
+
+      ajax.jsonRequest('GET', loadMoreButton.dataset.nextPageUrl).then((data) => {
+        data.comments.forEach((commentData) => {
+          const comment = createFromData(commentData);
+          comment.element.classList.add('top-level-comment');
+          this.appendComment(comment);
+          if (commentData.has_visible_replies) {
+            Section._addShowRepliesButton(comment, commentData.replies_url);
+          }
+        });
+
+        if (data.next_page_url) {
+          loadMoreButton.dataset.nextPageUrl = data.next_page_url;
+          loadMoreButton.disabled = false;
+        } else {
+          loadMoreButton.remove();
+        }
+      });
+    }
+
+    static _addShowRepliesButton(comment, repliesUrl) {
+      const button = document.createElement('button');
+      button.className = 'btn btn-dark btn-sm more-comments-button comments-show-replies';
+      button.innerText = 'Show replies';
+      button.dataset.repliesUrl = repliesUrl;
+      comment.element.querySelector('.replies').append(button);
+      Section._setupShowRepliesButton(comment, button);
+    }
+
+    static _setupShowRepliesButton(comment, button) {
+      button.addEventListener('click', (event) => {
+        event.preventDefault();
+        button.disabled = true;
+        ajax.jsonRequest('GET', button.dataset.repliesUrl).then((data) => {
+          // Replies are displayed flat under the top-level comment, in the order of the thread
+          const appendReplies = (replies) =>
+            replies.forEach((replyData) => {
+              comment.appendReply(createFromData(replyData));
+              appendReplies(replyData.replies);
+            });
+          appendReplies(data.comments);
+          button.remove();
+        });
+      });
+    }
   }
 
   Section.className = 'comment-section';
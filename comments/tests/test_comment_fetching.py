@@ -1,10 +1,16 @@
 from unittest.mock import patch, Mock
 
+from django.core.management import call_command
 from django.test.testcases import TestCase
 from django.urls import reverse
 
-from comments.models import Like
-from comments.queries import get_annotated_comments, set_comment_like
+from comments.models import Comment, Like
+from comments.queries import (
+    get_annotated_comments,
+    get_annotated_comments_page,
+    set_comment_like,
+)
+from comments.views.common import comments_page_to_template_type
 from common.tests.factories.blog import PostFactory
 from common.tests.factories.comments import CommentUnderPostFactory
 from common.tests.factories.users import UserFactory
@@ -40,7 +46,9 @@ class TestCommentTreeConstruction(TestCase):
             comment_trees[0].id, self.comment_with_replies.id, [str(_) for _ in comment_trees]
         )
         self.assertEqual(comment_trees[0].message, '[deleted]')
-        self.assertEqual(len(comment_trees[0].replies), 2)
+        # Replies are loaded on demand
+        self.assertEqual(comment_trees[0].replies, [])
+        self.assertEqual(comment_trees[0].reply_count, 2)
 
     def test_deleted_comments_without_replies_are_not_included_in_tree(self):
         self.comment_no_replies.soft_delete()
@@ -50,7 +58,9 @@ class TestCommentTreeConstruction(TestCase):
         comment_trees = response.context['comments'].comment_trees
         self.assertEqual(len(comment_trees), 1)
         self.assertEqual(comment_trees[0].id, self.comment_with_replies.id)
-        self.assertEqual(len(comment_trees[0].replies), 2)
+        # Replies are loaded on demand
+        self.assertEqual(comment_trees[0].replies, [])
+        self.assertEqual(comment_trees[0].reply_count, 2)
 
     def test_deleted_comments_with_deleted_replies_not_included_in_tree(self):
         self.comment_with_replies.soft_delete_tree()
@@ -95,3 +105,205 @@ class TestCommentTreeConstruction(TestCase):
             annotated_comments[0].number_of_likes,
             Like.objects.filter(comment_id=annotated_comments[0].pk).count(),
         )
+
+    def test_get_annotated_comments_does_not_depend_on_number_of_comments(self):
+        for _ in range(10):
+            comment = CommentUnderPostFactory(comment_post__post=self.post)
+            set_comment_like(comment_pk=comment.pk, user_pk=self.user.pk, like=True)
+            CommentUnderPostFactory(comment_post__post=self.post, reply_to=comment)
+
+        with self.assertNumQueries(3):
+            get_annotated_comments(self.post, user_pk=self.user.pk)
+
+
+class TestCommentCounters(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = UserFactory()
+        cls.other_user = UserFactory()
+
+    def setUp(self) -> None:
+        self.comment = CommentUnderPostFactory()
+        self.replies = CommentUnderPostFactory.create_batch(3, reply_to=self.comment)
+
+    def test_reply_count_is_updated_on_reply_and_delete(self):
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.reply_count, 3)
+
+        self.replies[0].soft_delete()
+        self.replies[1].soft_delete_tree()
+        self.replies[2].hard_delete_tree()
+
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.reply_count, 0)
+
+    def test_like_count_is_updated_on_like_and_unlike(self):
+        set_comment_like(comment_pk=self.comment.pk, user_pk=self.user.pk, like=True)
+        set_comment_like(comment_pk=self.comment.pk, user_pk=self.user.pk, like=True)
+        likes = set_comment_like(comment_pk=self.comment.pk, user_pk=self.other_user.pk, like=True)
+        self.assertEqual(likes, 2)
+
+        likes = set_comment_like(comment_pk=self.comment.pk, user_pk=self.user.pk, like=False)
+        likes = set_comment_like(comment_pk=self.comment.pk, user_pk=self.user.pk, like=False)
+        self.assertEqual(likes, 1)
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.like_count, 1)
+
+    def test_saving_stale_comment_does_not_overwrite_counters(self):
+        stale_comment = Comment.objects.get(pk=self.comment.pk)
+        set_comment_like(comment_pk=self.comment.pk, user_pk=self.user.pk, like=True)
+        CommentUnderPostFactory(reply_to=self.comment)
+
+        stale_comment.message = 'Edited'
+        stale_comment.save()
+
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.like_count, 1)
+        self.assertEqual(self.comment.reply_count, 4)
+
+    def test_update_comment_counters_command(self):
+        Like.objects.create(comment=self.comment, user=self.user)
+        self.replies[0].date_deleted = self.replies[0].date_created
+        self.replies[0].save()
+        Comment.objects.update(like_count=0, reply_count=0)
+
+        call_command('update_comment_counters')
+
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.like_count, 1)
+        self.assertEqual(self.comment.reply_count, 2)
+
+
+@patch('sorl.thumbnail.base.ThumbnailBackend.get_thumbnail', Mock(url=''))
+class TestCommentPagination(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = UserFactory()
+        cls.post = PostFactory()
+
+    def setUp(self) -> None:
+        self.comments = CommentUnderPostFactory.create_batch(5, comment_post__post=self.post)
+        self.most_liked = self.comments[3]
+        set_comment_like(comment_pk=self.most_liked.pk, user_pk=self.user.pk, like=True)
+        self.reply = CommentUnderPostFactory(
+            comment_post__post=self.post, reply_to=self.comments[0]
+        )
+        self.nested_reply = CommentUnderPostFactory(
+            comment_post__post=self.post, reply_to=self.reply
+        )
+
+    def test_pages_are_ordered_by_likes_and_date(self):
+        expected = [self.most_liked] + [c for c in self.comments if c != self.most_liked]
+
+        top_level_comments = []
+        cursor = None
+        while True:
+            page = get_annotated_comments_page(
+                self.post, self.user.pk, cursor=cursor, page_size=2, with_replies=False
+            )
+            top_level_comments.extend(page.comments)
+            self.assertEqual(page.number_of_comments, 7)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+        self.assertEqual([c.pk for c in top_level_comments], [c.pk for c in expected])
+
+    def test_first_page_excludes_replies(self):
+        page = get_annotated_comments_page(self.post, self.user.pk)
+
+        self.assertEqual({c.pk for c in page.comments}, {c.pk for c in self.comments})
+
+    def test_first_page_includes_replies_if_requested(self):
+        page = get_annotated_comments_page(self.post, self.user.pk, with_replies=True)
+
+        self.assertIsNone(page.next_cursor)
+        self.assertEqual(
+            {c.pk for c in page.comments},
+            {c.pk for c in self.comments} | {self.reply.pk, self.nested_reply.pk},
+        )
+
+    def test_next_page_endpoint(self):
+        page = get_annotated_comments_page(self.post, self.user.pk, page_size=3)
+        comments = comments_page_to_template_type(page, self.post.comment_url, self.user)
+
+        response = self.client.get(comments.next_page_url)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(
+            [c['id'] for c in data['comments']], [self.comments[2].pk, self.comments[4].pk]
+        )
+        self.assertIsNone(data['next_page_url'])
+        self.assertEqual(data['comments'][0]['replies'], [])
+
+    def test_next_page_endpoint_invalid_cursor(self):
+        url = reverse('comment-next-page', kwargs={'comment_pk': self.comments[0].pk})
+
+        response = self.client.get(url, {'cursor': 'invalid'})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_replies_endpoint(self):
+        response = self.client.get(
+            reverse('comment-replies', kwargs={'comment_pk': self.comments[0].pk})
+        )
+
+        self.assertEqual(response.status_code, 200)
+        replies = response.json()['comments']
+        self.assertEqual(len(replies), 1)
+        self.assertEqual(replies[0]['id'], self.reply.pk)
+        self.assertEqual(replies[0]['reply_count'], 1)
+        self.assertEqual([r['id'] for r in replies[0]['replies']], [self.nested_reply.pk])
+
+    def test_replies_are_loaded_on_demand(self):
+        response = self.client.get(reverse('post-detail', kwargs={'slug': self.post.slug}))
+
+        self.assertContains(response, 'comments-show-replies', count=1)
+        self.assertContains(response, self.comments[0].replies_url)
+        self.assertNotContains(response, f'data-comment-id="{self.reply.pk}"')
+
+    def test_endpoints_do_not_show_comments_of_unpublished_objects(self):
+        self.post.is_published = False
+        self.post.save()
+        next_page_url = reverse('comment-next-page', kwargs={'comment_pk': self.comments[0].pk})
+        replies_url = reverse('comment-replies', kwargs={'comment_pk': self.comments[0].pk})
+        cursor = get_annotated_comments_page(self.post, self.user.pk, page_size=1).next_cursor
+
+        self.assertEqual(self.client.get(next_page_url, {'cursor': cursor}).status_code, 404)
+        self.assertEqual(self.client.get(replies_url).status_code, 404)
+
+        self.client.force_login(UserFactory(is_staff=True))
+        self.assertEqual(self.client.get(next_page_url, {'cursor': cursor}).status_code, 200)
+        self.assertEqual(self.client.get(replies_url).status_code, 200)
+
+    def test_replies_endpoint_unknown_comment(self):
+        response = self.client.get(reverse('comment-replies', kwargs={'comment_pk': 0}))
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_replies_can_be_shown_if_only_deleted_replies_have_replies(self):
+        self.reply.soft_delete()
+        self.comments[0].soft_delete()
+        self.comments[0].refresh_from_db()
+        self.assertEqual(self.comments[0].reply_count, 0)
+
+        response = self.client.get(reverse('post-detail', kwargs={'slug': self.post.slug}))
+
+        self.assertContains(response, 'comments-show-replies', count=1)
+        self.assertContains(response, self.comments[0].replies_url)
+        replies = self.client.get(self.comments[0].replies_url).json()['comments']
+        self.assertEqual([r['id'] for r in replies], [self.reply.pk])
+        self.assertEqual([r['id'] for r in replies[0]['replies']], [self.nested_reply.pk])
+
+    def test_next_page_endpoint_tells_which_comments_have_visible_replies(self):
+        self.reply.soft_delete()
+        page = get_annotated_comments_page(self.post, self.user.pk, page_size=1)
+        comments = comments_page_to_template_type(page, self.post.comment_url, self.user)
+
+        data = self.client.get(comments.next_page_url).json()
+
+        self.assertEqual(
+            {c['id']: c['has_visible_replies'] for c in data['comments']},
+            {c.pk: c == self.comments[0] for c in self.comments if c != self.most_liked},
+        )
@@ -0,0 +1,67 @@
+from django.test import TestCase
+
+from comments.models import Comment
+from common.tests.factories.comments import CommentFactory
+
+
+class TestCommentTreeOperations(TestCase):
+    def _create_thread(self, depth: int, replies_per_comment: int = 2) -> Comment:
+        root = CommentFactory()
+        level = [root]
+        for _ in range(depth):
+            level = [
+                reply
+                for comment in level
+                for reply in CommentFactory.create_batch(replies_per_comment, reply_to=comment)
+            ]
+        return root
+
+    def test_get_tree_comments_includes_ancestors_and_replies(self):
+        comment_0 = CommentFactory()
+        reply_1_0, reply_1_1 = CommentFactory.create_batch(2, reply_to=comment_0)
+        reply_2_0 = CommentFactory(reply_to=reply_1_0)
+        reply_3_0 = CommentFactory(reply_to=reply_2_0)
+        CommentFactory(reply_to=CommentFactory())
+
+        tree_pks = set(reply_2_0.get_tree_comments().values_list('pk', flat=True))
+
+        self.assertEqual(
+            tree_pks, {c.pk for c in (comment_0, reply_1_0, reply_1_1, reply_2_0, reply_3_0)}
+        )
+
+    def test_get_subtree_comments_does_not_include_ancestors_or_siblings(self):
+        comment_0 = CommentFactory()
+        reply_1_0, _ = CommentFactory.create_batch(2, reply_to=comment_0)
+        reply_2_0 = CommentFactory(reply_to=reply_1_0)
+        reply_3_0 = CommentFactory(reply_to=reply_2_0)
+
+        subtree_pks = set(reply_1_0.get_subtree_comments().values_list('pk', flat=True))
+
+        self.assertEqual(subtree_pks, {reply_1_0.pk, reply_2_0.pk, reply_3_0.pk})
+
+    def test_soft_delete_tree_keeps_date_deleted_of_deleted_replies(self):
+        comment = CommentFactory()
+        deleted_reply = CommentFactory(reply_to=comment)
+        deleted_reply.soft_delete()
+        date_deleted = deleted_reply.date_deleted
+
+        comment.soft_delete_tree()
+
+        deleted_reply.refresh_from_db()
+        self.assertEqual(deleted_reply.date_deleted, date_deleted)
+        self.assertTrue(comment.is_deleted)
+
+    def test_tree_operations_num_queries_does_not_depend_on_thread_size(self):
+        for depth in (1, 4):
+            root = self._create_thread(depth)
+            reply = root.replies.first()
+
+            with self.subTest(depth=depth):
+                with self.assertNumQueries(1):
+                    reply.archive_tree()
+                with self.assertNumQueries(1):
+                    root.soft_delete_tree()
+
+            self.assertFalse(Comment.objects.filter(date_deleted__isnull=True).exists())
+            self.assertFalse(Comment.objects.filter(is_archived=False).exists())
+            Comment.objects.all().delete()
@@ -11,6 +11,7 @@ class Comments:
     number_of_comments: int
     comment_trees: List[CommentTree]
     profile_image_url: str
+    next_page_url: Optional[str] = None
 
 
 @dc.dataclass
@@ -37,6 +38,9 @@ class CommentTree:
     delete_tree_url: Optional[str]
     hard_delete_tree_url: Optional[str]
     edited: bool
+    reply_count: int = 0
+    has_visible_replies: bool = False
+    replies_url: Optional[str] = None
 
 
 @dc.dataclass
@@ -4,6 +4,7 @@ from comments.views.api.archive import comment_archive_tree
 from comments.views.api.delete import comment_delete, comment_delete_tree, comment_hard_delete_tree
 from comments.views.api.edit import comment_edit
 from comments.views.api.like import comment_like
+from comments.views.api.threads import comment_next_page, comment_replies
 
 urlpatterns = [
     path(
@@ -18,6 +19,8 @@ urlpatterns = [
                 path(
                     'hard-delete-tree/', comment_hard_delete_tree, name='comment-hard-delete-tree'
                 ),
+                path('replies/', comment_replies, name='comment-replies'),
+                path('next-page/', comment_next_page, name='comment-next-page'),
             ]
         ),
     )
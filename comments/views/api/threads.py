@@ -0,0 +1,56 @@
+"""Comment threads API, used to load comments and replies on demand."""
+
+from django.http.request import HttpRequest
+from django.http.response import JsonResponse
+from django.views.decorators.http import require_safe
+
+from comments.models import Comment
+from comments.queries import (
+    get_annotated_comments_page,
+    get_annotated_replies,
+    get_visible_comment_target,
+)
+from comments.views.common import (
+    comment_tree_to_dict,
+    comments_page_to_template_type,
+    comments_to_template_type,
+)
+
+
+@require_safe
+def comment_next_page(request: HttpRequest, *, comment_pk: int) -> JsonResponse:
+    """Return the next page of top-level comments, without their replies.
+
+    The comment given by `comment_pk` is the last top-level comment of the previous page,
+    it is used to find the object the comments belong to. The position in the list of comments
+    is given by the `cursor` query parameter.
+    """
+    cursor = request.GET.get('cursor')
+    target = get_visible_comment_target(comment_pk, request.user)
+    if not cursor or target is None:
+        return JsonResponse({}, status=404)
+    try:
+        page = get_annotated_comments_page(target, request.user.pk, cursor=cursor)
+    except ValueError:
+        return JsonResponse({}, status=400, reason='Invalid cursor.')
+
+    comments = comments_page_to_template_type(page, target.comment_url, request.user)
+    return JsonResponse(
+        {
+            'comments': [comment_tree_to_dict(tree) for tree in comments.comment_trees],
+            'next_page_url': comments.next_page_url,
+        }
+    )
+
+
+@require_safe
+def comment_replies(request: HttpRequest, *, comment_pk: int) -> JsonResponse:
+    """Return all the replies to a comment, nested under the comments they reply to."""
+    if get_visible_comment_target(comment_pk, request.user) is None:
+        return JsonResponse({}, status=404)
+
+    replies = get_annotated_replies(Comment(pk=comment_pk), request.user.pk)
+    comments = comments_to_template_type(replies, '', request.user, root_pk=comment_pk)
+    return JsonResponse(
+        {'comments': [comment_tree_to_dict(tree) for tree in comments.comment_trees]}
+    )
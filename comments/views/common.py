@@ -1,5 +1,7 @@
 # noqa: D100
-from typing import Dict, List, Optional, Sequence
+from typing import Any, Dict, List, Optional, Sequence
+from urllib.parse import urlencode
+import dataclasses
 import json
 
 from django.contrib.auth import get_user_model
@@ -8,6 +10,7 @@ from django.http import JsonResponse
 
 from comments import typed_templates
 from comments.models import Comment
+from comments.queries import CommentsPage
 from common import markdown
 from common.types import assert_cast
 
@@ -15,7 +18,12 @@ User = get_user_model()
 
 
 def comments_to_template_type(
-    comments: Sequence[Comment], comment_url: str, user: User
+    comments: Sequence[Comment],
+    comment_url: str,
+    user: User,
+    number_of_comments: Optional[int] = None,
+    next_page_url: Optional[str] = None,
+    root_pk: Optional[int] = None,
 ) -> typed_templates.Comments:
     # noqa: D103
     user_is_moderator = user.has_perm('comments.moderate_comment')
@@ -64,6 +72,9 @@ def comments_to_template_type(
             edited=(comment.date_updated != comment.date_created),
             is_archived=comment.is_archived,
             is_top_level=True if comment.reply_to is None else False,
+            reply_count=comment.reply_count,
+            has_visible_replies=getattr(comment, 'has_visible_replies', comment.reply_count > 0),
+            replies_url=comment.replies_url,
         )
 
     def build_deleted_tree(comment: Comment) -> typed_templates.DeletedCommentTree:
@@ -81,20 +92,65 @@ def comments_to_template_type(
             replies=[build_tree(reply) for reply in lookup.get(comment.pk, [])],
             is_archived=comment.is_archived,
             is_top_level=True if comment.reply_to is None else False,
+            reply_count=comment.reply_count,
+            has_visible_replies=getattr(comment, 'has_visible_replies', comment.reply_count > 0),
+            replies_url=comment.replies_url,
         )
 
-    # Top-level comments are ordered by number of likes and date
-    top_level_comments = sorted(
-        (comment for comment in lookup.get(None, [])),
-        key=lambda c: (-c.number_of_likes, c.date_created),
-    )
+    if root_pk is None:
+        # Top-level comments are ordered by number of likes and date
+        top_level_comments = sorted(
+            (comment for comment in lookup.get(None, [])),
+            key=lambda c: (-c.number_of_likes, c.date_created, c.pk),
+        )
+    else:
+        # Replies to the given comment are ordered chronologically
+        top_level_comments = lookup.get(root_pk, [])
 
     return typed_templates.Comments(
         comment_url=comment_url,
-        number_of_comments=len(comments),
+        number_of_comments=len(comments) if number_of_comments is None else number_of_comments,
         comment_trees=[build_tree(comment) for comment in top_level_comments],
         profile_image_url=user.image_url if getattr(user, 'image', None) else None,
+        next_page_url=next_page_url,
+    )
+
+
+def comments_page_to_template_type(
+    page: CommentsPage, comment_url: str, user: User
+) -> typed_templates.Comments:
+    """Prepare a page of comments for the template, including a link to the next page."""
+    next_page_url = None
+    if page.next_cursor is not None:
+        last_comment = Comment(pk=page.last_comment_pk)
+        next_page_url = f'{last_comment.next_page_url}?{urlencode({"cursor": page.next_cursor})}'
+    return comments_to_template_type(
+        page.comments,
+        comment_url,
+        user,
+        number_of_comments=page.number_of_comments,
+        next_page_url=next_page_url,
+    )
+
+
+def comment_tree_to_dict(comment_tree: typed_templates.CommentTree) -> Dict[str, Any]:
+    """Return comment tree data as a dict, useful for preparing JSON API responses.
+
+    The format matches `Comment.to_dict`, with the replies nested under 'replies'.
+    """
+    from common.shortcodes import render as with_shortcodes
+
+    data = {
+        field.name: getattr(comment_tree, field.name)
+        for field in dataclasses.fields(comment_tree)
+        if field.name != 'replies'
+    }
+    data.update(
+        date_string=comment_tree.date.strftime('%d %B %Y - %H:%M'),
+        message_html=with_shortcodes(comment_tree.message_html),
+        replies=[comment_tree_to_dict(reply) for reply in comment_tree.replies],
     )
+    return data
 
 
 def comment_response(request, comment_model, to_field, field_pk):
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class CommonConfig(AppConfig):
     name = 'common'
+
+    def ready(self) -> None:
+        import common.signals  # noqa: F401
@@ -0,0 +1,36 @@
+"""What a user is entitled to see, resolved lazily and at most once."""
+from typing import Tuple
+
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+
+from common import queries
+
+User = get_user_model()
+
+
+class Entitlements:
+    """Subscription status and groups of a user.
+
+    Attached to the current user by `common.middleware.EntitlementsMiddleware`,
+    so that all the checks made while handling a request share the same results.
+    """
+
+    def __init__(self, user: User) -> None:
+        self.user = user
+
+    @cached_property
+    def has_active_subscription(self) -> bool:
+        """Check subscription status of the user."""
+        return queries.check_active_subscription(self.user)
+
+    @cached_property
+    def group_names(self) -> Tuple[str, ...]:
+        """Names of all the groups the user is assigned to."""
+        if self.user.is_anonymous:
+            return ()
+        return tuple(self.user.groups.values_list('name', flat=True))
+
+    def has_group(self, group_name: str) -> bool:
+        """Check if the user is assigned to a given group."""
+        return group_name in self.group_names
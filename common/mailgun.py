@@ -1,10 +1,17 @@
-"""Mailgun API calls."""
-from typing import Optional, Dict, List, Tuple
+"""Mailgun API calls.
+
+All calls share a pool of connections, and are retried with a backoff if Mailgun is unavailable
+or rate-limits them.
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from urllib.parse import quote as urlquote
+import itertools
 import json
 import logging
 
 from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import requests
 
 logger = logging.getLogger(__name__)
@@ -12,6 +19,35 @@ logger = logging.getLogger(__name__)
 BASE_URL = 'https://api.mailgun.net/v3'
 DOMAIN_URL = f'{BASE_URL}/{settings.MAILGUN_SENDER_DOMAIN}'
 UNSUBSCRIBES_URL = f'{DOMAIN_URL}/unsubscribes'
+# Mailgun accepts at most 1000 members per request to a mailing list
+MAX_MEMBERS_PER_REQUEST = 1000
+
+_session: Optional[requests.Session] = None
+
+
+def _get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            # All of the calls below are idempotent, including the upserts
+            method_whitelist=frozenset({'GET', 'POST', 'PUT', 'DELETE'}),
+            raise_on_status=False,
+        )
+        _session = requests.Session()
+        _session.mount('https://', HTTPAdapter(max_retries=retry))
+    return _session
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    items = iter(items)
+    while True:
+        chunk = list(itertools.islice(items, size))
+        if not chunk:
+            return
+        yield chunk
 
 
 def _request_mailgun(url: str, method='GET', **kwargs) -> Optional[Dict]:
@@ -20,7 +56,7 @@ def _request_mailgun(url: str, method='GET', **kwargs) -> Optional[Dict]:
         return
 
     logger.debug(f'--> [{method}] {url} with {kwargs}')
-    response = requests.request(
+    response = _get_session().request(
         method=method,
         url=url,
         auth=('api', settings.MAILGUN_API_KEY),
@@ -61,30 +97,35 @@ def delete_unsubscribe_record(email: str):
     return _request_mailgun(url, method='DELETE')
 
 
-def add_to_maillist(alias_address: str, recipients: List[Tuple[str]]) -> Optional[Dict]:
+def _upsert_maillist_members(alias_address: str, members: Iterable[Dict]) -> Optional[Dict]:
+    url = f'{BASE_URL}/lists/{urlquote(alias_address)}/members.json'
+    response = None
+    for chunk in _chunks(members, MAX_MEMBERS_PER_REQUEST):
+        response = _request_mailgun(
+            url,
+            method='POST',
+            data={
+                'upsert': True,
+                # The endpoint doesn't accept application/json with "members", it accepts
+                # "members" as JSON-encoded string instead.
+                'members': json.dumps(chunk),
+            },
+        )
+    return response
+
+
+def add_to_maillist(alias_address: str, recipients: Iterable[Tuple[str]]) -> Optional[Dict]:
     """Add given list of recipients to a mailing list with a given alias address.
 
     The `recipients` is expected to contain tuples of `(email, full_name)`.
+    Recipients are added in batches of MAX_MEMBERS_PER_REQUEST.
     """
-    url = f'{BASE_URL}/lists/{urlquote(alias_address)}/members.json'
-    return _request_mailgun(
-        url,
-        method='POST',
-        data={
-            'upsert': True,
-            # The endpoint doesn't accept application/json with "members", it accepts
-            # "members" as JSON-encoded string instead.
-            'members': json.dumps(
-                [
-                    {
-                        'address': email,
-                        'name': full_name,
-                        'subscribed': True,
-                    }
-                    for email, full_name in recipients
-                ]
-            ),
-        },
+    return _upsert_maillist_members(
+        alias_address,
+        (
+            {'address': email, 'name': full_name, 'subscribed': True}
+            for email, full_name in recipients
+        ),
     )
 
 
@@ -100,15 +141,19 @@ def delete_from_maillist(alias_address: str, email: str) -> Optional[Dict]:
     return _request_mailgun(url, method='DELETE')
 
 
-def download_maillist(alias_address: str, limit: int = 100) -> List[Tuple[str]]:
-    """Retrieve the full mailing list and write it down as a CSV."""
-    result = []
+def get_maillist_members(alias_address: str, limit: int = 100) -> Iterator[Dict]:
+    """Retrieve all members of a mailing list, page by page."""
     page_url = f'{BASE_URL}/lists/{urlquote(alias_address)}/members/pages?page=first&limit={limit}'
     page = _request_mailgun(page_url, method='GET')
     while page and page.get('items'):
-        result.extend([(_['name'], _['address']) for _ in page['items']])
+        yield from page['items']
         page_url = page.get('paging', {}).get('next')
         page = _request_mailgun(page_url, method='GET')
+
+
+def download_maillist(alias_address: str, limit: int = 100) -> List[Tuple[str]]:
+    """Retrieve the full mailing list and write it down as a CSV."""
+    result = [(_['name'], _['address']) for _ in get_maillist_members(alias_address, limit)]
     with open(f'mailgun_{alias_address}.csv', 'w+') as f:
         for _ in result:
             f.write(f'{_[0]}, {_[1]}\n')
@@ -0,0 +1,26 @@
+"""Generate static thumbnails which haven't been generated yet, e.g. after a deploy."""
+import logging
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from common.mixins import GeneratedThumbnailURLMixin
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class Command(BaseCommand):
+    """Generate thumbnails of all objects which have `GeneratedThumbnailURLMixin`."""
+
+    def handle(self, *args, **options):  # noqa: D102
+        for model in apps.get_models():
+            if not issubclass(model, GeneratedThumbnailURLMixin):
+                continue
+            generated = 0
+            for obj in model._base_manager.exclude(thumbnail='').iterator():
+                if obj.has_generated_thumbnails:
+                    continue
+                obj.generate_thumbnails()
+                generated += 1
+            logger.info('Generated thumbnails of %s %s', generated, model._meta.verbose_name_plural)
@@ -1,7 +1,10 @@
 """Handle cleaning and rendering of markdown."""
-from typing import Optional, Tuple
+from typing import Callable, Optional, Tuple
+import hashlib
 import re
 
+from django.conf import settings
+from django.core.cache import caches
 from markupsafe import Markup
 import bleach
 import bleach.sanitizer
@@ -12,6 +15,10 @@ from .markdown_renderers import TextRenderer
 _markdown: Optional[mistune.Markdown] = None
 _markdown_with_html: Optional[mistune.Markdown] = None
 _markdown_to_text: Optional[mistune.Markdown] = None
+# Rendered markdown is cached by the hash of its source.
+# Bump the version whenever a change of rendering should invalidate the cached HTML.
+RENDERED_CACHE_TIMEOUT = 60 * 60 * 24
+RENDERER_VERSION = 1
 SHORTCODE_PATTERN = r'{(?:attachment|iframe|youtube|subscribe_banner)\s+[^}]*}'
 ALLOWED_TAGS_EXTRA = {
     # <a> is already allowed by bleach, but we want more allowed attributes for it
@@ -75,8 +82,25 @@ def plugin_shortcode(md):
     md.renderer.register('shortcode', keep_shortcode_as_is)
 
 
+def _cached(name: str, render_func: Callable[[str], str], text: str) -> str:
+    if not isinstance(text, str):
+        return render_func(text)
+    cache = caches[settings.RENDERED_TEXT_CACHE]
+    text_hash = hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+    cache_key = f'{name}:{RENDERER_VERSION}:{text_hash}'
+    rendered = cache.get(cache_key)
+    if rendered is None:
+        rendered = str(render_func(text))
+        cache.set(cache_key, rendered, RENDERED_CACHE_TIMEOUT)
+    return rendered
+
+
 def render_as_text(text: str) -> str:
     """Turn markdown from plain text into even planer text."""
+    return _cached('markdown_as_text', _render_as_text, text)
+
+
+def _render_as_text(text: str) -> str:
     global _markdown_to_text
 
     if _markdown_to_text is None:
@@ -89,6 +113,10 @@ def render_as_text(text: str) -> str:
 
 def render(text: str) -> Markup:
     """Render given text as markdown."""
+    return Markup(_cached('markdown', _render, text))
+
+
+def _render(text: str) -> str:
     global _markdown
 
     if _markdown is None:
@@ -97,7 +125,7 @@ def render(text: str) -> Markup:
             plugins=[plugin_shortcode, mistune.plugins.extra.plugin_url, 'table'],
         )
 
-    return Markup(_markdown(text))
+    return _markdown(text)
 
 
 def render_unsafe(text: str) -> Markup:
@@ -105,6 +133,10 @@ def render_unsafe(text: str) -> Markup:
 
     This should only be used to render staff-edited content, e.g. blog content, but not comments.
     """
+    return Markup(_cached('markdown_unsafe', _render_unsafe, text))
+
+
+def _render_unsafe(text: str) -> str:
     global _markdown_with_html
 
     if _markdown_with_html is None:
@@ -114,4 +146,4 @@ def render_unsafe(text: str) -> Markup:
             plugins=[plugin_shortcode, mistune.plugins.extra.plugin_url, 'table'],
         )
 
-    return Markup(_markdown_with_html(text))
+    return _markdown_with_html(text)
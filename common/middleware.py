@@ -0,0 +1,31 @@
+"""Commonly used middleware."""
+from typing import Callable
+
+from django.contrib.auth.middleware import get_user
+from django.http import HttpRequest, HttpResponse
+from django.utils.functional import SimpleLazyObject
+
+from common.entitlements import Entitlements
+
+
+def _get_user_with_entitlements(request: HttpRequest):
+    user = get_user(request)
+    if not hasattr(user, 'entitlements'):
+        user.entitlements = Entitlements(user)
+    return user
+
+
+class EntitlementsMiddleware:
+    """Attach lazily resolved entitlements to the current user.
+
+    This way subscription status and groups of the user are queried at most once per request,
+    no matter how many views, templates and shortcodes check them.
+    Must come after `AuthenticationMiddleware`.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:  # noqa: D107
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:  # noqa: D102
+        request.user = SimpleLazyObject(lambda: _get_user_with_entitlements(request))
+        return self.get_response(request)
@@ -1,18 +1,19 @@
 """Commonly used model and admin mixins."""
-from functools import lru_cache
 from typing import Optional, Any, Union, List, Tuple
-import logging
 
 from django.conf import settings
 from django.contrib import admin
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
 from django.db.models.base import Model
 from django.http.request import HttpRequest
+from django.templatetags.static import static
 from django.utils.safestring import mark_safe
 
-from sorl.thumbnail import get_thumbnail
+from common.thumbnails import thumbnail_url_cache
 
-log = logging.getLogger(__name__)
+# How long to wait for a scheduled thumbnail generation before scheduling it again
+THUMBNAILS_SCHEDULE_TIMEOUT = 10 * 60
 
 
 class CreatedUpdatedMixin(models.Model):
@@ -80,25 +81,21 @@ class ViewOnSiteMixin:
     view_link.short_description = "View on site"
 
 
-@lru_cache(maxsize=1024)
-def _cacheable_get_thumnbnail(thumbnail, size_settings):
-    return get_thumbnail(thumbnail, size_settings, crop=settings.THUMBNAIL_CROP_MODE).url
-
-
 class StaticThumbnailURLMixin:
-    """Add `thumbnail_<size>_url` properties generating static cacheable thumbnail URLs."""
+    """Add `thumbnail_<size>_url` properties generating static cacheable thumbnail URLs.
+
+    URLs of many objects can be looked up at once with `common.thumbnails.prefetch_thumbnail_urls`.
+    """
 
     thumbnail = None  # Is always overridden
 
     def _get_thumbnail(self, size_settings):
         if not self.thumbnail:
             return None
-        try:
-            return _cacheable_get_thumnbnail(self.thumbnail, size_settings)
-        except OSError as e:
-            # Handle the classic 'cannot write mode RGBA as JPEG'
-            log.error(e)
-            return None
+        prefetched_urls = getattr(self, '_prefetched_thumbnail_urls', {})
+        if size_settings in prefetched_urls:
+            return prefetched_urls[size_settings]
+        return thumbnail_url_cache.get(self.thumbnail, size_settings)
 
     @property
     def thumbnail_m_url(self) -> Optional[str]:
@@ -111,6 +108,67 @@ class StaticThumbnailURLMixin:
         return self._get_thumbnail(settings.THUMBNAIL_SIZE_S)
 
 
+class GeneratedThumbnailURLMixin(StaticThumbnailURLMixin, models.Model):
+    """Store URLs of static thumbnails, generated in background whenever the thumbnail changes.
+
+    Until the thumbnails are generated, their URLs point to a placeholder image,
+    so that rendering a page never waits for a thumbnail to be resized and uploaded.
+    If THUMBNAILS_IN_BACKGROUND is disabled, missing thumbnails are generated on request instead.
+    """
+
+    class Meta:
+        abstract = True
+
+    # Name of the thumbnail file and URLs of the thumbnails generated from it, by size
+    thumbnail_urls = models.JSONField(default=dict, blank=True, editable=False)
+
+    @property
+    def has_generated_thumbnails(self) -> bool:
+        """Check if thumbnails of all sizes were generated from the current thumbnail file."""
+        return (
+            bool(self.thumbnail)
+            and self.thumbnail_urls.get('source') == self.thumbnail.name
+            and all(
+                size_settings in self.thumbnail_urls
+                for size_settings in (settings.THUMBNAIL_SIZE_S, settings.THUMBNAIL_SIZE_M)
+            )
+        )
+
+    def generate_thumbnails(self) -> None:
+        """Generate thumbnails of all sizes and store their URLs."""
+        thumbnail_urls = {}
+        if self.thumbnail:
+            thumbnail_urls['source'] = self.thumbnail.name
+            for size_settings in (settings.THUMBNAIL_SIZE_S, settings.THUMBNAIL_SIZE_M):
+                thumbnail_urls[size_settings] = super()._get_thumbnail(size_settings)
+        self.thumbnail_urls = thumbnail_urls
+        # Neither bumps `date_updated` nor sends `post_save`
+        type(self)._base_manager.filter(pk=self.pk).update(thumbnail_urls=thumbnail_urls)
+        import search.signals
+
+        search.signals.update_search_indexes_of_thumbnails(self)
+
+    def schedule_thumbnails(self) -> None:
+        """Generate thumbnails in background, once the current transaction is committed."""
+        import common.tasks
+
+        model_label, pk = self._meta.label_lower, self.pk
+        transaction.on_commit(lambda: common.tasks.generate_thumbnails(model_label, pk))
+
+    def _get_thumbnail(self, size_settings):
+        if not self.thumbnail:
+            return None
+        if self.has_generated_thumbnails:
+            return self.thumbnail_urls[size_settings]
+        if not settings.THUMBNAILS_IN_BACKGROUND:
+            return super()._get_thumbnail(size_settings)
+        # E.g. objects which existed before their thumbnails were generated in background
+        schedule_key = f'schedule_thumbnails:{self._meta.label_lower}:{self.pk}'
+        if cache.add(schedule_key, True, THUMBNAILS_SCHEDULE_TIMEOUT):
+            self.schedule_thumbnails()
+        return static(settings.THUMBNAIL_PLACEHOLDER)
+
+
 class ThumbnailMixin:
     """Display an asset thumbnail, if available."""
 
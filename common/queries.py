@@ -1,7 +1,10 @@
-from typing import Optional, Union, Dict, List
+from typing import Optional, Union, Dict, Iterable, List
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core import paginator
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
 from django.db.models import QuerySet, Q
 from django.db.models.base import Model
 from django.db.models.expressions import Value
@@ -9,13 +12,23 @@ from django.db.models.fields import CharField
 
 from blog.models import Post
 from characters.models import Character
-from films.models import ProductionLog, Asset, AssetCategory
+from films.models import Film, ProductionLog, Asset, AssetCategory
 from static_assets.models.static_assets import StaticAsset
 from training.models import Training
 
 User = get_user_model()
 DEFAULT_FEED_PAGE_SIZE = 10
 
+FEATURED_CACHE_KEY = 'common_featured'
+# Name of the cached fragment in common/components/navigation/footer.html
+FOOTER_FRAGMENT_NAME = 'navigation_footer'
+# Featured content is invalidated when it changes, see common.signals. The default cache
+# is per process, so the invalidation only reaches the process which changed the content:
+# the other processes see the change once their cached content expires.
+FEATURED_CACHE_TIMEOUT = 60
+# Number of characters shown in the footer
+FEATURED_CHARACTERS_LIMIT = 4
+
 
 def get_activity_feed_page(
     page_number: Optional[Union[int, str]] = 1,
@@ -94,6 +107,9 @@ def has_group(user: User, group_name: str) -> bool:
     """Check if given user is assigned to a given group."""
     if not user or user.is_anonymous:
         return False
+    entitlements = getattr(user, 'entitlements', None)
+    if entitlements is not None:
+        return entitlements.has_group(group_name)
     return user.groups.filter(name=group_name).exists()
 
 
@@ -105,18 +121,54 @@ def has_active_subscription(user: User) -> bool:
      * "demo"
      * "subscriber"
      * "_org_<name>" for organisation-level subscriptions.
+
+    The status of the current user is checked at most once per request,
+    see `common.middleware.EntitlementsMiddleware`.
+    """
+    if not user:
+        return False
+    entitlements = getattr(user, 'entitlements', None)
+    if entitlements is not None:
+        return entitlements.has_active_subscription
+    return check_active_subscription(user)
+
+
+def _get_active_subscription_cache_key(user_id: int) -> str:
+    return f'has_active_subscription:{user_id}'
+
+
+def check_active_subscription(user: User) -> bool:
+    """Check subscription status of the given user, bypassing the per-request entitlements.
+
+    If ENTITLEMENTS_CACHE_TIMEOUT is set, the status is also cached across requests
+    until it expires or is invalidated by `invalidate_active_subscription`.
     """
     import subscriptions.queries
 
-    if not user:
+    if not user or user.is_anonymous:
         return False
 
+    cache_timeout = settings.ENTITLEMENTS_CACHE_TIMEOUT
+    cache_key = _get_active_subscription_cache_key(user.pk)
+    if cache_timeout:
+        is_active = cache.get(cache_key)
+        if is_active is not None:
+            return is_active
+
     # The old way, that supports Store-based and manual team subscriptions
-    if user.has_perm('users.can_view_content'):
-        return True
+    is_active = user.has_perm('users.can_view_content')
+    if not is_active:
+        # The new way, with subscriptions managed by Studio itself
+        is_active = subscriptions.queries.has_active_subscription(user)
+
+    if cache_timeout:
+        cache.set(cache_key, is_active, cache_timeout)
+    return is_active
 
-    # The new way, with subscriptions managed by Studio itself
-    return subscriptions.queries.has_active_subscription(user)
+
+def invalidate_active_subscription(user_ids: Iterable[int]) -> None:
+    """Forget cached subscription status of the given users."""
+    cache.delete_many([_get_active_subscription_cache_key(user_id) for user_id in user_ids])
 
 
 def get_latest_trainings_and_production_lessons(production_lessons_limit=2, trainings_limit=10):
@@ -132,6 +184,29 @@ def get_latest_trainings_and_production_lessons(production_lessons_limit=2, trai
     )
 
 
+def get_featured() -> Dict[str, List[Model]]:
+    """Return featured films, latest trainings and production lessons and published characters.
+
+    The result is cached until any of these objects is changed.
+    """
+    featured = cache.get(FEATURED_CACHE_KEY)
+    if featured is None:
+        featured = {
+            'films': list(Film.objects.filter(is_featured=True)),
+            'trainings': get_latest_trainings_and_production_lessons(),
+            'characters': list(
+                Character.objects.filter(is_published=True)[:FEATURED_CHARACTERS_LIMIT]
+            ),
+        }
+        cache.set(FEATURED_CACHE_KEY, featured, FEATURED_CACHE_TIMEOUT)
+    return featured
+
+
+def invalidate_featured() -> None:
+    """Remove cached featured content and the footer rendered from it."""
+    cache.delete_many([FEATURED_CACHE_KEY, make_template_fragment_key(FOOTER_FRAGMENT_NAME)])
+
+
 def get_latest_characters():
     """Return latest characters."""
     return Character.objects.filter(is_published=True).order_by('-date_created')
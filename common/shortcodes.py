@@ -16,13 +16,23 @@ pass them though Markdown unscathed.
 
 NOTE: The reason this is not implemented as a markdown plugin is that
 shortcodes are often applied after markdown has been rendered and stored as HTML.
+
+NOTE: rendered text is cached by its hash. Shortcodes that depend on the viewer
+(e.g. the ones with a `group`) or on data that can change (e.g. attachments)
+are left as placeholders in the cached HTML and rendered on every call.
 """
+import contextlib
+import contextvars
+import hashlib
 import html as html_module  # I want to be able to use the name 'html' in local scope.
 import logging
 import re
 import typing
 import urllib.parse
 import shortcodes
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import QuerySet
 from django.template.loader import render_to_string
 
 from common import queries
@@ -32,9 +42,56 @@ _parser: shortcodes.Parser = None
 _commented_parser: shortcodes.Parser = None
 log = logging.getLogger(__name__)
 
+RENDERED_CACHE_TIMEOUT = 60 * 60 * 24
+# Bump whenever a change of a shortcode handler should invalidate the cached HTML
+RENDERER_VERSION = 1
+_handlers: typing.Dict[str, typing.Callable[..., str]] = {}
+_placeholder = '\x00shortcode-{}\x00'
+_placeholder_re = re.compile(r'\x00shortcode-(\d+)\x00')
+_attachment_id_re = re.compile(r'{attachment\s+[\'"]?(\d+)')
+# Static assets of all the attachments in the text that is being rendered, see `render`
+_attachments: 'contextvars.ContextVar[typing.Optional[typing.Dict[int, typing.Any]]]' = (
+    contextvars.ContextVar('attachments', default=None)
+)
+
+
+class _Deferred(typing.NamedTuple):
+    name: str
+    content: typing.Optional[str]
+    pargs: typing.List[str]
+    kwargs: typing.Dict[str, str]
+
+
+class _DeferringContext:
+    """Context used for rendering shortcodes once for all viewers.
+
+    Collects the shortcodes that have to be rendered on every call instead.
+    """
+
+    def __init__(self) -> None:  # noqa: D107
+        self.deferred: typing.List[_Deferred] = []
+
+    def get(self, key: str, default: typing.Any = None) -> typing.Any:
+        """Nothing is known about the viewer."""
+        return default
+
+    def defer(
+        self,
+        name: str,
+        content: typing.Optional[str],
+        pargs: typing.List[str],
+        kwargs: typing.Dict[str, str],
+    ) -> str:
+        """Remember a shortcode and return a placeholder for its output."""
+        self.deferred.append(_Deferred(name, content, list(pargs), dict(kwargs)))
+        return _placeholder.format(len(self.deferred) - 1)
+
 
-def shortcode(name: str):
-    """Class decorator for shortcodes."""
+def shortcode(name: str, volatile: bool = False):
+    """Class decorator for shortcodes.
+
+    Output of volatile shortcodes is never cached, e.g. because it depends on the viewer.
+    """
 
     def decorator(decorated):
         assert hasattr(decorated, '__call__'), '@shortcode should be used on callables.'
@@ -42,7 +99,17 @@ def shortcode(name: str):
             as_callable = decorated()
         else:
             as_callable = decorated
-        shortcodes.register(name)(as_callable)
+        _handlers[name] = as_callable
+
+        def handler(context, content, pargs, kwargs):
+            if isinstance(context, _DeferringContext) and (
+                volatile
+                or (isinstance(as_callable, group_check) and group_check.is_checked(kwargs))
+            ):
+                return context.defer(name, content, pargs, kwargs)
+            return as_callable(context, content, pargs, kwargs)
+
+        shortcodes.register(name)(handler)
         return decorated
 
     return decorator
@@ -69,6 +136,11 @@ class group_check:
             as_callable = decorated
         self.decorated = as_callable
 
+    @staticmethod
+    def is_checked(kwargs: typing.Dict[str, str]) -> bool:
+        """Check if output of a shortcode with given kwargs depends on the viewer."""
+        return bool(kwargs.get('group', kwargs.get('cap', '')))
+
     def __call__(
         self,
         context: typing.Any,
@@ -120,7 +192,7 @@ class Test:
         return ''.join(parts)
 
 
-@shortcode('subscribe_banner')
+@shortcode('subscribe_banner', volatile=True)
 @group_check
 class SubscribeBanner:
     # noqa: D101
@@ -233,7 +305,8 @@ def iframe(
     return html
 
 
-@shortcode('attachment')
+# Attachments are rendered on every view: their URLs can expire and their files can change
+@shortcode('attachment', volatile=True)
 @group_check
 class Attachment:
     # noqa: D101
@@ -256,13 +329,23 @@ class Attachment:
         except ValueError:
             return '{attachment Invalid slug %s - should be a static_asset id}' % slug
 
-        try:
-            attachment = models_static_assets.StaticAsset.objects.get(pk=static_asset_id)
-        except models_static_assets.StaticAsset.DoesNotExist:
+        attachments = _attachments.get()
+        if attachments is not None and static_asset_id in attachments:
+            attachment = attachments[static_asset_id]
+        else:
+            attachment = self.get_static_assets().filter(pk=static_asset_id).first()
+        if attachment is None:
             return html_module.escape('{attachment %r does not exist}' % slug)
 
         return self.render(attachment, pargs, kwargs)
 
+    @staticmethod
+    def get_static_assets() -> 'QuerySet[models_static_assets.StaticAsset]':
+        """Return static assets with all the data their templates need."""
+        return models_static_assets.StaticAsset.objects.select_related(
+            'video', 'image'
+        ).prefetch_related('video__variations', 'video__tracks')
+
     def render(
         self,
         static_asset: models_static_assets.StaticAsset,
@@ -366,8 +449,7 @@ def _get_parser() -> typing.Tuple[shortcodes.Parser, shortcodes.Parser]:
     return _parser
 
 
-def render(text: str, context: typing.Any = None) -> str:
-    """Parse and render shortcodes."""
+def _parse(text: str, context: typing.Any) -> str:
     parser = _get_parser()
 
     try:
@@ -375,3 +457,72 @@ def render(text: str, context: typing.Any = None) -> str:
     except shortcodes.ShortcodeError as e:
         log.exception('Error rendering tag: %s', e)
         return text
+
+
+def _render_deferred(
+    text: str, deferred: typing.List[_Deferred], context: typing.Any
+) -> typing.Optional[str]:
+    """Replace placeholders in the given text with output of the deferred shortcodes.
+
+    Return None if any of the shortcodes fails, same as `shortcodes.Parser.parse` would.
+    """
+
+    def render_shortcode(match: re.Match) -> str:
+        name, content, pargs, kwargs = deferred[int(match.group(1))]
+        return str(_handlers[name](context, content, list(pargs), dict(kwargs)))
+
+    try:
+        return _placeholder_re.sub(render_shortcode, text)
+    except Exception:
+        return None
+
+
+def render(text: str, context: typing.Any = None) -> str:
+    """Parse and render shortcodes.
+
+    Text is parsed once and cached, only the shortcodes which are different
+    for different viewers or requests are rendered on every call.
+    """
+    if '\x00' in text:
+        # Can be mixed up with the placeholders, so is never cached
+        with _prefetched_attachments(text):
+            return _parse(text, context)
+
+    cache = caches[settings.RENDERED_TEXT_CACHE]
+    text_hash = hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+    cache_key = f'shortcodes:{RENDERER_VERSION}:{text_hash}'
+    rendered = cache.get(cache_key)
+    if rendered is None:
+        deferring_context = _DeferringContext()
+        rendered = (_parse(text, deferring_context), deferring_context.deferred)
+        cache.set(cache_key, rendered, RENDERED_CACHE_TIMEOUT)
+
+    html, deferred = rendered
+    if not deferred:
+        return html
+    with _prefetched_attachments(text):
+        rendered_html = _render_deferred(html, deferred, context)
+        if rendered_html is None:
+            # Report the error the same way it is reported without caching
+            return _parse(text, context)
+    return rendered_html
+
+
+@contextlib.contextmanager
+def _prefetched_attachments(text: str) -> typing.Iterator[None]:
+    """Fetch static assets of all attachments in the given text with a single query."""
+    static_asset_ids = {int(_id) for _id in _attachment_id_re.findall(text)}
+    if not static_asset_ids:
+        yield
+        return
+    # IDs of static assets that don't exist are mapped to None
+    attachments = dict.fromkeys(static_asset_ids)
+    attachments.update(
+        (static_asset.pk, static_asset)
+        for static_asset in Attachment.get_static_assets().filter(pk__in=static_asset_ids)
+    )
+    token = _attachments.set(attachments)
+    try:
+        yield
+    finally:
+        _attachments.reset(token)
@@ -0,0 +1,61 @@
+from typing import Any, Optional, Set
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from characters.models import Character
+from common.mixins import GeneratedThumbnailURLMixin
+from common.queries import invalidate_active_subscription, invalidate_featured
+from films.models import Film, Asset
+from training.models import Training
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Film)
+@receiver(post_save, sender=Asset)
+@receiver(post_save, sender=Training)
+@receiver(post_save, sender=Character)
+@receiver(post_delete, sender=Film)
+@receiver(post_delete, sender=Asset)
+@receiver(post_delete, sender=Training)
+@receiver(post_delete, sender=Character)
+def invalidate_featured_content(sender: object, **kwargs: Any) -> None:
+    """Make sure that the footer and other featured content blocks are rendered anew."""
+    invalidate_featured()
+
+
+@receiver(post_save)
+def schedule_thumbnails(sender: object, instance: Any, raw: bool, **kwargs: Any) -> None:
+    """Generate static thumbnails in background when a new thumbnail is uploaded."""
+    if (
+        settings.THUMBNAILS_IN_BACKGROUND
+        and not raw
+        and isinstance(instance, GeneratedThumbnailURLMixin)
+        and instance.thumbnail
+        and not instance.has_generated_thumbnails
+    ):
+        instance.schedule_thumbnails()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_active_subscription_on_group_change(
+    sender: object,
+    instance: Any,
+    action: str,
+    reverse: bool,
+    pk_set: Optional[Set[int]],
+    **kwargs: Any,
+) -> None:
+    """Forget cached subscription status of users added to or removed from groups.
+
+    Groups grant the `can_view_content` permission, e.g. "subscriber" or "demo".
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        invalidate_active_subscription([instance.pk])
+    elif pk_set:
+        invalidate_active_subscription(pk_set)
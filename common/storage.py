@@ -1,11 +1,13 @@
 """Custom file storage classes."""
+from typing import Any, Optional
+import hashlib
+
 from django.conf import settings
+from django.core.cache import cache
 from storages.backends.s3boto3 import S3Boto3Storage
 import boto3
 from botocore.client import Config
 
-_s3_client = None
-
 
 class S3PublicStorage(S3Boto3Storage):
     """Disable signing for URLs generated by this storage.
@@ -34,24 +36,63 @@ class S3Boto3CustomStorage(S3Boto3Storage):
         return params
 
 
-def get_s3_url(path, expires_in_seconds=3600):
-    """Generate a pre-signed S3 URL to a given path."""
-    global _s3_client
-    if not _s3_client:
-        _s3_client = boto3.client(
-            's3',
-            config=Config(signature_version='s3v4'),
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_S3_REGION_NAME,
+class URLSigner:
+    """Generate pre-signed S3 URLs, reusing them until shortly before they expire.
+
+    Signed URLs are cached, so that the same file keeps the same URL for a while,
+    which also lets browsers cache it.
+
+    The boto3 client is created on first use, unless a `client` is given, e.g. a stub in tests.
+    """
+
+    def __init__(  # noqa: D107
+        self, client: Optional[Any] = None, expiry_margin_seconds: int = 5 * 60
+    ) -> None:
+        self.client = client
+        self.expiry_margin_seconds = expiry_margin_seconds
+
+    def _get_client(self) -> Any:
+        if self.client is None:
+            self.client = boto3.client(
+                's3',
+                config=Config(signature_version='s3v4'),
+                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                region_name=settings.AWS_S3_REGION_NAME,
+            )
+        return self.client
+
+    def _presign(self, path: str, expires_in_seconds: int) -> str:
+        return self._get_client().generate_presigned_url(
+            'get_object',
+            Params={
+                'Bucket': settings.AWS_STORAGE_BUCKET_NAME,
+                'Key': path,
+            },
+            HttpMethod='GET',
+            ExpiresIn=expires_in_seconds,
         )
 
-    return _s3_client.generate_presigned_url(
-        'get_object',
-        Params={
-            'Bucket': settings.AWS_STORAGE_BUCKET_NAME,
-            'Key': path,
-        },
-        HttpMethod='GET',
-        ExpiresIn=expires_in_seconds,
-    )
+    def _cache_key(self, path: str, expires_in_seconds: int) -> str:
+        path_hash = hashlib.blake2b(path.encode(), digest_size=16).hexdigest()
+        return f's3_url:{settings.AWS_STORAGE_BUCKET_NAME}:{expires_in_seconds}:{path_hash}'
+
+    def sign(self, path: str, expires_in_seconds: int = 3600) -> str:
+        """Return a pre-signed URL of the given path, signing it only if it isn't cached."""
+        cache_key = self._cache_key(path, expires_in_seconds)
+        url = cache.get(cache_key)
+        if url is None:
+            url = self._presign(path, expires_in_seconds)
+            # A cached URL must remain valid long enough to be followed
+            timeout = expires_in_seconds - self.expiry_margin_seconds
+            if timeout > 0:
+                cache.set(cache_key, url, timeout)
+        return url
+
+
+url_signer = URLSigner()
+
+
+def get_s3_url(path: str, expires_in_seconds: int = 3600) -> str:
+    """Generate a pre-signed S3 URL to a given path."""
+    return url_signer.sign(path, expires_in_seconds)
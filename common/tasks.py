@@ -0,0 +1,24 @@
+"""Background tasks shared by all apps."""
+import logging
+
+from background_task import background
+from django.apps import apps
+
+logger = logging.getLogger(__name__)
+
+
+@background()
+def generate_thumbnails(model_label: str, pk: int) -> None:
+    """Generate static thumbnails of an object which has `GeneratedThumbnailURLMixin`.
+
+    Because of the @background decorator, the object is identified by its model label,
+    e.g. "blog.post", and its primary key.
+    """
+    model = apps.get_model(model_label)
+    obj = model._base_manager.filter(pk=pk).first()
+    if obj is None:
+        logger.debug('Not generating thumbnails of deleted %s pk=%s', model_label, pk)
+        return
+    if obj.has_generated_thumbnails:
+        return
+    obj.generate_thumbnails()
@@ -13,10 +13,7 @@ from common.markdown import (
     render_unsafe as render_markdown_unsafe,
     render_as_text as render_markdown_as_text,
 )
-from characters.queries import get_published_characters
-from common.queries import get_latest_trainings_and_production_lessons
 from common.shortcodes import render
-from films.models import Film
 from markupsafe import Markup
 
 User = get_user_model()
@@ -134,12 +131,8 @@ def add_form_classes(form, size_class=""):
 
 @register.simple_tag()
 def get_featured() -> Dict[str, Any]:
-    """Return featured content: trainings and films."""
-    return {
-        'films': Film.objects.filter(is_featured=True),
-        'trainings': get_latest_trainings_and_production_lessons(),
-        'characters': get_published_characters(),
-    }
+    """Return featured content: trainings, films and characters."""
+    return queries.get_featured()
 
 
 @register.simple_tag(takes_context=True)
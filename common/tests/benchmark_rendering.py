@@ -0,0 +1,59 @@
+"""Compare rendering of markdown and shortcodes with and without caching.
+
+Not collected by the test runner, run with:
+
+    ./manage.sh test common.tests.benchmark_rendering
+"""
+from timeit import timeit
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+from django.test.client import RequestFactory
+
+from common.markdown import render_unsafe
+from common.shortcodes import render
+from common.tests.test_markdown import (
+    markdown_html_with_audio_tag,
+    markdown_html_with_figure_tag,
+)
+
+NUMBER = 200
+TEXT = '\n\n'.join(
+    [
+        markdown_html_with_audio_tag,
+        markdown_html_with_figure_tag,
+        '{youtube https://www.youtube.com/watch?v=NwVGvcIrNWA}',
+        '{iframe src="https://docs.python.org/3/library/" group="subscriber" nogroup="Subscribe"}',
+        '| Column | Another |\n| --- | --- |\n| **bold** | _em_ |\n' * 10,
+    ]
+    * 5
+)
+
+
+class RenderingBenchmark(SimpleTestCase):
+    def setUp(self):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        self.context = {'request': request}
+
+    def _render(self):
+        return render(render_unsafe(TEXT), self.context)
+
+    def test_benchmark(self):
+        caches[settings.RENDERED_TEXT_CACHE].clear()
+        expected = self._render()
+        dummy_cache = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+        with override_settings(
+            CACHES={**settings.CACHES, settings.RENDERED_TEXT_CACHE: dummy_cache}
+        ):
+            self.assertEqual(self._render(), expected)
+            uncached = timeit(self._render, number=NUMBER)
+        cached = timeit(self._render, number=NUMBER)
+
+        print(
+            f'\nRendered {len(TEXT)} characters {NUMBER} times:'
+            f' {uncached:.3f}s without cache, {cached:.3f}s with cache'
+        )
+        self.assertEqual(self._render(), expected)
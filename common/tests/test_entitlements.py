@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from common.entitlements import Entitlements
+from common.queries import has_active_subscription, has_group
+from common.tests.factories.users import UserFactory
+
+User = get_user_model()
+
+
+class TestEntitlements(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserFactory()
+        self.user.groups.add(Group.objects.get_or_create(name='subscriber')[0])
+
+    def test_checks_are_made_once(self):
+        self.user.entitlements = Entitlements(self.user)
+
+        self.assertTrue(has_active_subscription(self.user))
+        self.assertTrue(has_group(self.user, 'subscriber'))
+
+        with self.assertNumQueries(0):
+            self.assertTrue(has_active_subscription(self.user))
+            self.assertTrue(has_group(self.user, 'subscriber'))
+            self.assertFalse(has_group(self.user, 'demo'))
+
+    def test_middleware_attaches_entitlements_to_current_user(self):
+        self.client.force_login(self.user)
+
+        response = self.client.get('/')
+        user = response.wsgi_request.user
+        self.assertTrue(has_active_subscription(user))
+
+        with self.assertNumQueries(0):
+            self.assertTrue(has_active_subscription(user))
+
+    @override_settings(ENTITLEMENTS_CACHE_TIMEOUT=60)
+    def test_cached_across_requests_until_groups_change(self):
+        self.assertTrue(has_active_subscription(User.objects.get(pk=self.user.pk)))
+
+        # A different request gets a different user object
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(has_active_subscription(user))
+
+        self.user.groups.clear()
+
+        self.assertFalse(has_active_subscription(self.user))
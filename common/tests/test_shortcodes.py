@@ -1,10 +1,14 @@
+from unittest.mock import patch
 import unittest
 
 from django.contrib.auth.models import Group, AnonymousUser
+from django.conf import settings
+from django.core.cache import caches
 from django.test import TestCase
 from django.test.client import RequestFactory
 
-from common.shortcodes import render
+from common.shortcodes import render, _parse
+from common.tests.factories.static_assets import StaticAssetFactory
 from common.tests.factories.users import UserFactory
 
 
@@ -214,3 +218,59 @@ class IFrameTest(TestCaseWithRequest):
         self.request.user = user
         context = {'request': self.request}
         self.assertEqual(expect, render(md, context=context))
+
+
+class CachingTest(TestCaseWithRequest):
+    def setUp(self):
+        super().setUp()
+        caches[settings.RENDERED_TEXT_CACHE].clear()
+
+    def test_shortcodes_with_group_are_rendered_for_each_viewer(self):
+        md = '{test a="b"} {iframe group="subscriber" nogroup="Subscribe"}'
+
+        self.assertEqual(
+            '<dl><dt>test</dt><dt>a</dt><dd>b</dd></dl> <p class="shortcode nogroup">Subscribe</p>',
+            render(md, {'request': self.request}),
+        )
+
+        user = UserFactory(email='mail@example.com')
+        group, _ = Group.objects.get_or_create(name='demo')
+        user.groups.add(group)
+        self.request.user = user
+        self.assertEqual(
+            '<dl><dt>test</dt><dt>a</dt><dd>b</dd></dl> '
+            '<div class="embed-responsive embed-responsive-16by9"><iframe class="shortcode"></iframe>'
+            '</div>',
+            render(md, {'request': self.request}),
+        )
+
+    def test_text_is_parsed_once(self):
+        md = '{test a="c"}'
+
+        with patch('common.shortcodes._parse', wraps=_parse) as mock_parse:
+            self.assertEqual(render(md), render(md))
+
+        mock_parse.assert_called_once()
+
+    def test_rendered_text_is_kept_in_its_own_cache(self):
+        md = '{test a="d"}'
+
+        render(md)
+
+        self.assertEqual(len(caches[settings.RENDERED_TEXT_CACHE]._cache), 1)
+
+
+class AttachmentTest(TestCaseWithRequest):
+    @patch('common.shortcodes.Attachment.render', lambda self, static_asset, *args: static_asset.pk)
+    def test_attachments_are_fetched_with_one_query(self):
+        static_assets = [StaticAssetFactory(source_type='file') for _ in range(3)]
+        md = ' '.join(f'{{attachment {static_asset.pk}}}' for static_asset in static_assets)
+
+        with self.assertNumQueries(1):
+            rendered = render(md + ' {attachment 12345}', {'request': self.request})
+
+        self.assertEqual(
+            ' '.join(str(static_asset.pk) for static_asset in static_assets)
+            + " {attachment &#x27;12345&#x27; does not exist}",
+            rendered,
+        )
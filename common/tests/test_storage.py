@@ -0,0 +1,36 @@
+from unittest.mock import Mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from common.storage import URLSigner
+
+
+def _presign(method, Params, HttpMethod, ExpiresIn):
+    return f'https://s3/{Params["Key"]}?e={ExpiresIn}'
+
+
+class TestURLSigner(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Mock()
+        self.client.generate_presigned_url.side_effect = _presign
+        self.url_signer = URLSigner(client=self.client)
+
+    def test_signs_only_urls_which_are_not_cached(self):
+        self.assertEqual(self.url_signer.sign('a.mp4'), 'https://s3/a.mp4?e=3600')
+        self.assertEqual(self.url_signer.sign('b.mp4'), 'https://s3/b.mp4?e=3600')
+        self.assertEqual(self.client.generate_presigned_url.call_count, 2)
+
+        self.assertEqual(self.url_signer.sign('b.mp4'), 'https://s3/b.mp4?e=3600')
+        self.assertEqual(self.client.generate_presigned_url.call_count, 2)
+
+        # URLs which expire at a different time are signed separately
+        self.assertEqual(self.url_signer.sign('a.mp4', 7200), 'https://s3/a.mp4?e=7200')
+        self.assertEqual(self.client.generate_presigned_url.call_count, 3)
+
+    def test_short_lived_urls_are_not_cached(self):
+        self.url_signer.sign('a.mp4', expires_in_seconds=60)
+        self.url_signer.sign('a.mp4', expires_in_seconds=60)
+
+        self.assertEqual(self.client.generate_presigned_url.call_count, 2)
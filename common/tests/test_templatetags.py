@@ -1,8 +1,12 @@
 from django.contrib.auth.models import Group, AnonymousUser
+from django.core.cache import cache
 from django.template import engines
+from django.template.loader import render_to_string
 from django.test import TestCase
 from django.test.client import RequestFactory
 
+from common.queries import FEATURED_CHARACTERS_LIMIT, get_featured
+from common.tests.factories.characters import CharacterFactory
 from common.tests.factories.users import UserFactory
 from common.templatetags.common_extras import has_group
 
@@ -179,3 +183,31 @@ class CommonExtrasTest(TestCase):
         )
 
         self.assertEqual(content.strip(), 'Title\n**Bold!**\nList:\n\n- one;\n- two;')
+
+
+class FooterTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_footer_is_rendered_once_until_featured_content_changes(self):
+        character = CharacterFactory(name='Sprite', is_published=True)
+
+        content = render_to_string('common/components/navigation/footer.html')
+        self.assertIn('Sprite', content)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(render_to_string('common/components/navigation/footer.html'), content)
+
+        # Invalidated right away in the process which changed it
+        character.name = 'Snail'
+        character.save()
+
+        content = render_to_string('common/components/navigation/footer.html')
+        self.assertIn('Snail', content)
+        self.assertNotIn('Sprite', content)
+
+    def test_footer_fetches_only_shown_characters(self):
+        for _ in range(6):
+            CharacterFactory(is_published=True)
+
+        self.assertEqual(len(get_featured()['characters']), FEATURED_CHARACTERS_LIMIT)
@@ -0,0 +1,164 @@
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache, caches
+from django.templatetags.static import static
+from django.test import TestCase, override_settings
+
+from blog.models import Post
+from common.tasks import generate_thumbnails
+from common.tests.factories.blog import PostFactory
+from common.tests.factories.films import AssetFactory
+from common.tests.factories.training import SectionFactory
+from common.thumbnails import ThumbnailURLCache, prefetch_thumbnail_urls, thumbnail_url_cache
+from search.models import PendingIndexUpdate
+
+
+def _get_thumbnail(thumbnail, size_settings, crop):
+    return Mock(url=f'https://thumbnails/{size_settings}/{thumbnail.name}')
+
+
+@override_settings(THUMBNAILS_IN_BACKGROUND=True)
+@patch('common.thumbnails.get_thumbnail', Mock(side_effect=_get_thumbnail))
+class TestGeneratedThumbnails(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches['thumbnails'].clear()
+        thumbnail_url_cache.clear_local()
+
+    @patch('common.tasks.generate_thumbnails')
+    def test_thumbnails_are_generated_in_background_when_uploaded(self, mock_task):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = PostFactory()
+        mock_task.assert_called_once_with('blog.post', post.pk)
+
+        # Nothing is generated while the page is rendered
+        self.assertEqual(post.thumbnail_s_url, static('training/images/placeholders/card.jpg'))
+
+        generate_thumbnails.task_function('blog.post', post.pk)
+
+        post = Post.objects.get(pk=post.pk)
+        self.assertEqual(post.thumbnail_s_url, f'https://thumbnails/400x225/{post.thumbnail.name}')
+        self.assertEqual(post.thumbnail_m_url, f'https://thumbnails/1280x720/{post.thumbnail.name}')
+
+        # Saving without a new thumbnail doesn't generate it again
+        mock_task.reset_mock()
+        with self.captureOnCommitCallbacks(execute=True):
+            post.title = 'Another title'
+            post.save()
+        mock_task.assert_not_called()
+
+    def test_search_documents_are_updated_once_thumbnails_are_generated(self):
+        asset = AssetFactory()
+        static_asset = asset.static_asset
+        PendingIndexUpdate.objects.all().delete()
+
+        generate_thumbnails.task_function('static_assets.staticasset', static_asset.pk)
+
+        self.assertEqual(
+            list(PendingIndexUpdate.objects.values_list('model_label', 'object_id')),
+            [('films.asset', asset.pk)],
+        )
+
+    @patch('common.tasks.generate_thumbnails')
+    def test_missing_thumbnails_are_scheduled_once(self, mock_task):
+        post = PostFactory()
+        Post.objects.filter(pk=post.pk).update(thumbnail_urls={})
+        post = Post.objects.get(pk=post.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post.thumbnail_s_url
+            post.thumbnail_m_url
+
+        mock_task.assert_called_once_with('blog.post', post.pk)
+
+    @override_settings(THUMBNAILS_IN_BACKGROUND=False)
+    def test_thumbnails_are_generated_on_request_if_not_in_background(self):
+        post = PostFactory()
+
+        self.assertEqual(post.thumbnail_s_url, f'https://thumbnails/400x225/{post.thumbnail.name}')
+
+
+@patch('common.thumbnails.get_thumbnail')
+class TestThumbnailURLCache(TestCase):
+    def setUp(self):
+        caches['thumbnails'].clear()
+        thumbnail_url_cache.clear_local()
+        self.thumbnail_url_cache = ThumbnailURLCache()
+
+    def test_generates_only_thumbnails_which_are_not_cached(self, mock_get_thumbnail):
+        mock_get_thumbnail.side_effect = _get_thumbnail
+        a, b, c = (SimpleNamespace(name=name) for name in ('a.jpg', 'b.jpg', 'c.jpg'))
+
+        self.assertEqual(
+            self.thumbnail_url_cache.get_many([(a, '400x225'), (b, '400x225')]),
+            {
+                ('a.jpg', '400x225'): 'https://thumbnails/400x225/a.jpg',
+                ('b.jpg', '400x225'): 'https://thumbnails/400x225/b.jpg',
+            },
+        )
+        self.assertEqual(mock_get_thumbnail.call_count, 2)
+
+        self.assertEqual(
+            self.thumbnail_url_cache.get(b, '400x225'), 'https://thumbnails/400x225/b.jpg'
+        )
+        self.assertEqual(
+            self.thumbnail_url_cache.get(c, '1280x720'), 'https://thumbnails/1280x720/c.jpg'
+        )
+        self.assertEqual(mock_get_thumbnail.call_count, 3)
+        self.assertEqual(self.thumbnail_url_cache.stats(), {'hits': 1, 'misses': 3})
+
+        # Other processes reuse the same URLs
+        self.assertEqual(ThumbnailURLCache().get(a, '400x225'), 'https://thumbnails/400x225/a.jpg')
+        self.assertEqual(mock_get_thumbnail.call_count, 3)
+
+    def test_failed_thumbnails_are_not_cached(self, mock_get_thumbnail):
+        mock_get_thumbnail.side_effect = OSError('cannot write mode RGBA as JPEG')
+        thumbnail = SimpleNamespace(name='a.png')
+
+        self.assertIsNone(self.thumbnail_url_cache.get(thumbnail, '400x225'))
+        self.assertIsNone(self.thumbnail_url_cache.get(thumbnail, '400x225'))
+
+        self.assertEqual(mock_get_thumbnail.call_count, 2)
+
+    def test_prefetch_thumbnail_urls(self, mock_get_thumbnail):
+        mock_get_thumbnail.side_effect = _get_thumbnail
+        sections = [
+            SectionFactory(thumbnail='a.jpg'),
+            SectionFactory(thumbnail='b.jpg'),
+            SectionFactory(),
+        ]
+
+        with patch.object(
+            caches['thumbnails'], 'get_many', wraps=caches['thumbnails'].get_many
+        ) as mock_get_many:
+            prefetch_thumbnail_urls(sections)
+            thumbnail_urls = [section.thumbnail_s_url for section in sections]
+
+        mock_get_many.assert_called_once()
+        self.assertEqual(
+            thumbnail_urls,
+            ['https://thumbnails/400x225/a.jpg', 'https://thumbnails/400x225/b.jpg', None],
+        )
+
+    def test_recently_used_urls_are_kept_in_memory(self, mock_get_thumbnail):
+        mock_get_thumbnail.side_effect = _get_thumbnail
+        url_cache = ThumbnailURLCache(local_cache_size=2)
+        a, b, c = (SimpleNamespace(name=name) for name in ('a.jpg', 'b.jpg', 'c.jpg'))
+        url_cache.get_many([(a, '400x225'), (b, '400x225')])
+
+        with patch.object(
+            caches['thumbnails'], 'get_many', wraps=caches['thumbnails'].get_many
+        ) as mock_get_many:
+            self.assertEqual(url_cache.get(a, '400x225'), 'https://thumbnails/400x225/a.jpg')
+            mock_get_many.assert_not_called()
+
+            # The least recently used URL is forgotten, but still in the shared cache
+            url_cache.get(c, '400x225')
+            self.assertEqual(url_cache.get(b, '400x225'), 'https://thumbnails/400x225/b.jpg')
+            self.assertEqual(
+                [call.args[0] for call in mock_get_many.call_args_list],
+                [[url_cache._cache_key(name, '400x225')] for name in ('c.jpg', 'b.jpg')],
+            )
+
+        self.assertEqual(mock_get_thumbnail.call_count, 3)
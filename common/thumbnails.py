@@ -0,0 +1,148 @@
+"""Static thumbnail URLs, cached in a cache shared by all processes."""
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+import hashlib
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from sorl.thumbnail import get_thumbnail
+
+log = logging.getLogger(__name__)
+
+# Key of a thumbnail URL: name of the original file and size settings, e.g. "400x225"
+ThumbnailKey = Tuple[str, str]
+
+# Number of recently used URLs each process keeps in memory
+LOCAL_CACHE_SIZE = 2000
+
+
+class ThumbnailURLCache:
+    """Look up URLs of static thumbnails, generating only those which aren't cached.
+
+    URLs are kept in the THUMBNAIL_URL_CACHE cache, which is bounded and shared by all processes,
+    so that they reuse thumbnails resolved by any of them.
+    In front of it, each process keeps the most recently used URLs in memory, so that
+    popular thumbnails don't cost a query to the shared cache every time.
+    URLs never have to be invalidated: a new thumbnail is a new file, with a new name.
+    Many URLs can be looked up at once, e.g. for all cards on a page.
+
+    Counts cache hits and misses of this process, see `stats`.
+    """
+
+    def __init__(  # noqa: D107
+        self, cache_alias: Optional[str] = None, local_cache_size: int = LOCAL_CACHE_SIZE
+    ) -> None:
+        self.cache_alias = cache_alias
+        self.local_cache_size = local_cache_size
+        self._local_urls: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self) -> Any:
+        """Return the cache the URLs are kept in."""
+        return caches[self.cache_alias or settings.THUMBNAIL_URL_CACHE]
+
+    def _cache_key(self, name: str, size_settings: str) -> str:
+        key = f'{name}:{size_settings}:{settings.THUMBNAIL_CROP_MODE}'
+        return 'thumbnail_url:' + hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+    def _get_local(self, cache_keys: Iterable[str]) -> Dict[str, str]:
+        urls = {}
+        with self._lock:
+            for cache_key in cache_keys:
+                url = self._local_urls.get(cache_key)
+                if url is not None:
+                    self._local_urls.move_to_end(cache_key)
+                    urls[cache_key] = url
+        return urls
+
+    def _set_local(self, urls: Dict[str, str]) -> None:
+        with self._lock:
+            for cache_key, url in urls.items():
+                self._local_urls[cache_key] = url
+                self._local_urls.move_to_end(cache_key)
+            # Forget the least recently used URLs
+            while len(self._local_urls) > self.local_cache_size:
+                self._local_urls.popitem(last=False)
+
+    def clear_local(self) -> None:
+        """Forget the URLs kept in memory of this process."""
+        with self._lock:
+            self._local_urls.clear()
+
+    def _generate(self, thumbnail: Any, size_settings: str) -> Optional[str]:
+        try:
+            return get_thumbnail(thumbnail, size_settings, crop=settings.THUMBNAIL_CROP_MODE).url
+        except OSError as e:
+            # Handle the classic 'cannot write mode RGBA as JPEG'
+            log.error(e)
+            return None
+
+    def get_many(self, thumbnails: Iterable[Tuple[Any, str]]) -> Dict[ThumbnailKey, Optional[str]]:
+        """Return URLs of thumbnails of the given files and sizes, keyed by file name and size.
+
+        Args:
+            thumbnails: pairs of a file, e.g. a `FieldFile`, and size settings, e.g. "400x225".
+        """
+        files = {}
+        for thumbnail, size_settings in thumbnails:
+            files[self._cache_key(thumbnail.name, size_settings)] = (thumbnail, size_settings)
+        urls = self._get_local(files)
+        not_local = [cache_key for cache_key in files if cache_key not in urls]
+        if not_local:
+            shared_urls = self.cache.get_many(not_local)
+            self._set_local(shared_urls)
+            urls.update(shared_urls)
+        self.hits += len(urls)
+        self.misses += len(files) - len(urls)
+
+        generated_urls = {
+            cache_key: self._generate(thumbnail, size_settings)
+            for cache_key, (thumbnail, size_settings) in files.items()
+            if cache_key not in urls
+        }
+        # Thumbnails which failed to generate are retried next time
+        generated_urls = {cache_key: url for cache_key, url in generated_urls.items() if url}
+        if generated_urls:
+            self.cache.set_many(generated_urls)
+            self._set_local(generated_urls)
+        urls.update(generated_urls)
+        return {
+            (thumbnail.name, size_settings): urls.get(cache_key)
+            for cache_key, (thumbnail, size_settings) in files.items()
+        }
+
+    def get(self, thumbnail: Any, size_settings: str) -> Optional[str]:
+        """Return URL of a thumbnail of the given file and size."""
+        return self.get_many([(thumbnail, size_settings)])[(thumbnail.name, size_settings)]
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of cache hits and misses of this process."""
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+thumbnail_url_cache = ThumbnailURLCache()
+
+
+def prefetch_thumbnail_urls(objects: Iterable[Any]) -> None:
+    """Look up URLs of small and medium thumbnails of all the given objects at once.
+
+    Objects are expected to have `StaticThumbnailURLMixin`, which then returns the prefetched URLs.
+    """
+    objects = [
+        obj
+        for obj in objects
+        if obj.thumbnail and not getattr(obj, 'has_generated_thumbnails', False)
+    ]
+    sizes = (settings.THUMBNAIL_SIZE_S, settings.THUMBNAIL_SIZE_M)
+    urls = thumbnail_url_cache.get_many(
+        (obj.thumbnail, size_settings) for obj in objects for size_settings in sizes
+    )
+    for obj in objects:
+        obj._prefetched_thumbnail_urls = {
+            size_settings: urls[(obj.thumbnail.name, size_settings)] for size_settings in sizes
+        }
@@ -9,7 +9,6 @@ from django.template import Template, Context
 from django.utils import timezone
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
-import anymail.exceptions
 import django.core.mail
 
 import looper.admin.mixins
@@ -18,6 +17,7 @@ import looper.taxes
 
 from blog.models import Post
 from common.queries import get_latest_trainings_and_production_lessons
+from emails.bulk import send_emails
 from emails.models import Email
 from emails.util import get_template_context
 from subscriptions.tasks import _construct_subscription_mail
@@ -58,14 +58,18 @@ class EmailAdmin(admin.ModelAdmin):
     search_fields = ['to', 'subject']
 
     def send(self, request, queryset):
-        """Custom action for sending an email."""
-        for email in queryset:
-            try:
-                email.send()
-                msg = f'Message "{email.subject}" sent to {email.to}'
-                self.message_user(request, msg, messages.SUCCESS)
-            except anymail.exceptions.AnymailRequestsAPIError as e:
-                self.message_user(request, str(e), messages.ERROR)
+        """Custom action for sending emails, skipping the ones that were already sent."""
+        sent, failed = send_emails(queryset)
+        if sent:
+            self.message_user(request, f'Sent {sent} email(s)', messages.SUCCESS)
+        if failed:
+            self.message_user(
+                request,
+                f'Unable to send {failed} email(s), see the logs. Try sending them again later.',
+                messages.ERROR,
+            )
+        if not sent and not failed:
+            self.message_user(request, 'Selected emails were already sent', messages.WARNING)
 
     send.short_description = "Send selected emails"
 
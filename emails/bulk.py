@@ -0,0 +1,153 @@
+"""Sending of many emails at once, reusing a single connection to the email backend per batch."""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import itertools
+import logging
+import re
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import QuerySet
+from django.utils import timezone
+import anymail.exceptions
+
+from emails.models import Email
+
+logger = logging.getLogger(__name__)
+
+# Mailgun accepts at most 1000 recipients per batch message
+BATCH_SIZE = 1000
+# Same syntax as Mailgun's, so that a mail can be rendered once, and personalised afterwards
+RECIPIENT_VARIABLE_RE = re.compile(r'%recipient\.(\w+)%')
+# Errors after which sending can be continued with other recipients
+SEND_ERRORS = (anymail.exceptions.AnymailError, OSError)
+
+
+def _batches(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    items = iter(items)
+    while True:
+        batch = list(itertools.islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _supports_batch_sending(connection: Any) -> bool:
+    return getattr(connection, 'esp_name', None) == 'Mailgun'
+
+
+def _personalise(text: str, variables: Dict[str, Any]) -> str:
+    return RECIPIENT_VARIABLE_RE.sub(lambda m: str(variables.get(m.group(1), '')), text)
+
+
+def send_batch_mail(
+    subject: str,
+    message: str,
+    html_message: str,
+    recipient_variables: Dict[str, Dict[str, Any]],
+    from_email: Optional[str] = None,
+    reply_to: Optional[List[str]] = None,
+    batch_size: int = BATCH_SIZE,
+) -> Tuple[List[str], List[str]]:
+    """Send a separate copy of the same mail to each of the given recipients.
+
+    The mail is rendered only once: `%recipient.<name>%` in it is replaced by the value
+    of the recipient's variable `<name>`.
+    When sending via Mailgun, each batch of recipients takes a single API request, and the
+    variables are substituted by Mailgun. Otherwise, e.g. in tests, mails are personalised here,
+    and each batch is sent over a single connection to the email backend.
+
+    Args:
+        recipient_variables: variables of each recipient, keyed by recipient's email address.
+
+    Returns:
+        A tuple (sent, failed) of lists of email addresses.
+    """
+    sent, failed = [], []
+    with get_connection() as connection:
+        for recipients in _batches(recipient_variables, batch_size):
+            if _supports_batch_sending(connection):
+                msg = EmailMultiAlternatives(
+                    subject, message, from_email, recipients, reply_to=reply_to
+                )
+                msg.attach_alternative(html_message, 'text/html')
+                # Makes Mailgun deliver a separate copy to each recipient
+                msg.merge_data = {email: recipient_variables[email] for email in recipients}
+                try:
+                    connection.send_messages([msg])
+                except SEND_ERRORS:
+                    logger.exception('Unable to send "%s" to %s recipients', subject, recipients)
+                    failed.extend(recipients)
+                else:
+                    sent.extend(recipients)
+                continue
+
+            for email in recipients:
+                variables = recipient_variables[email]
+                msg = EmailMultiAlternatives(
+                    _personalise(subject, variables),
+                    _personalise(message, variables),
+                    from_email,
+                    [email],
+                    reply_to=reply_to,
+                )
+                msg.attach_alternative(_personalise(html_message, variables), 'text/html')
+                try:
+                    connection.send_messages([msg])
+                except SEND_ERRORS:
+                    logger.exception('Unable to send "%s" to %s', subject, email)
+                    failed.append(email)
+                else:
+                    sent.append(email)
+    return sent, failed
+
+
+def _content_key(email: Email) -> Tuple[str, ...]:
+    return (
+        email.subject,
+        email.from_email,
+        email.reply_to,
+        email.message,
+        email.html_message,
+        email.base_html_template,
+    )
+
+
+def send_emails(emails: 'QuerySet[Email]', batch_size: int = BATCH_SIZE) -> Tuple[int, int]:
+    """Send all given emails that haven't been sent yet.
+
+    Emails with the same content are rendered once and sent together, see `send_batch_mail`:
+    each of their recipients gets a separate copy.
+    `date_sent` is recorded for each batch as soon as it's sent, so that if sending fails
+    or is interrupted, calling this again only sends the emails which weren't sent yet.
+
+    Returns:
+        A tuple (sent, failed) with the numbers of sent and failed emails.
+    """
+    emails_by_content: Dict[Tuple[str, ...], List[Email]] = {}
+    for email in emails.filter(date_sent__isnull=True).order_by('pk'):
+        emails_by_content.setdefault(_content_key(email), []).append(email)
+
+    sent_count, failed_count = 0, 0
+    for group in emails_by_content.values():
+        first = group[0]
+        html_message = first.render_html()
+        for batch in _batches(group, batch_size):
+            recipients: Dict[str, Set[int]] = {}
+            for email in batch:
+                for address in email.recipient_list:
+                    recipients.setdefault(address, set()).add(email.pk)
+            sent, failed = send_batch_mail(
+                first.subject,
+                first.message,
+                html_message,
+                recipient_variables={address: {} for address in recipients},
+                from_email=first.from_email,
+                reply_to=first.reply_to_list,
+                batch_size=batch_size,
+            )
+            # An email isn't sent unless all of its recipients got it
+            failed_pks = set().union(*(recipients[address] for address in failed))
+            sent_pks = set().union(*(recipients[address] for address in sent)) - failed_pks
+            Email.objects.filter(pk__in=sent_pks).update(date_sent=timezone.now())
+            sent_count += len(sent_pks)
+            failed_count += len(failed_pks)
+    return sent_count, failed_count
@@ -41,12 +41,22 @@ class Email(mixins.CreatedUpdatedMixin, models.Model):
             return self.html_message
         return render_to_string(self.base_html_template, {'email': self, **get_template_context()})
 
+    @property
+    def recipient_list(self):
+        return [addr.strip() for addr in self.to.split(',')]
+
+    @property
+    def reply_to_list(self):
+        return [addr.strip() for addr in self.reply_to.split(',')]
+
     def send(self):
         """Send this email."""
-        recipient_list = [addr.strip() for addr in self.to.split(',')]
-        reply_to = [addr.strip() for addr in self.reply_to.split(',')]
         msg = EmailMultiAlternatives(
-            self.subject, self.message, self.from_email, recipient_list, reply_to=reply_to
+            self.subject,
+            self.message,
+            self.from_email,
+            self.recipient_list,
+            reply_to=self.reply_to_list,
         )
         msg.attach_alternative(self.render_html(), 'text/html')
         msg.send()
@@ -0,0 +1,85 @@
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase
+
+from emails.bulk import send_batch_mail, send_emails
+from emails.models import Email
+
+
+def _create_email(to: str, subject: str = 'Announcement') -> Email:
+    return Email.objects.create(
+        subject=subject,
+        from_email='studio@example.com',
+        reply_to='reply@example.com',
+        to=to,
+        message='Hello',
+        html_message='<p>Hello</p>',
+    )
+
+
+class TestSendEmails(TestCase):
+    def test_emails_are_sent_over_one_connection_and_marked_as_sent(self):
+        for i in range(3):
+            _create_email(f'user{i}@example.com')
+        _create_email('other@example.com', subject='Other')
+
+        with patch.object(EmailBackend, 'open', autospec=True) as mock_open:
+            sent, failed = send_emails(Email.objects.all())
+
+        self.assertEqual((sent, failed), (4, 0))
+        self.assertEqual(mock_open.call_count, 2)
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertEqual(mail.outbox[0].to, ['user0@example.com'])
+        self.assertEqual(mail.outbox[0].reply_to, ['reply@example.com'])
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        self.assertFalse(Email.objects.filter(date_sent__isnull=True).exists())
+
+        # Emails are not sent twice
+        self.assertEqual(send_emails(Email.objects.all()), (0, 0))
+        self.assertEqual(len(mail.outbox), 4)
+
+    def test_sending_resumes_after_failure(self):
+        for i in range(3):
+            _create_email(f'user{i}@example.com')
+        send_messages = EmailBackend.send_messages
+
+        def _fail_for_second_user(backend, messages):
+            if messages[0].to == ['user1@example.com']:
+                raise OSError('Connection reset by peer')
+            return send_messages(backend, messages)
+
+        with patch.object(EmailBackend, 'send_messages', _fail_for_second_user):
+            self.assertEqual(send_emails(Email.objects.all()), (2, 1))
+
+        self.assertEqual(
+            list(Email.objects.filter(date_sent__isnull=True).values_list('to', flat=True)),
+            ['user1@example.com'],
+        )
+
+        self.assertEqual(send_emails(Email.objects.all()), (1, 0))
+        self.assertEqual(
+            [message.to for message in mail.outbox],
+            [['user0@example.com'], ['user2@example.com'], ['user1@example.com']],
+        )
+
+
+class TestSendBatchMail(TestCase):
+    def test_mail_is_personalised_with_recipient_variables(self):
+        sent, failed = send_batch_mail(
+            'Hi %recipient.name%',
+            'Hello, %recipient.name%!',
+            '<p>Hello, %recipient.name%!</p>',
+            recipient_variables={'a@example.com': {'name': 'Ann'}, 'b@example.com': {'name': 'Bo'}},
+        )
+
+        self.assertEqual((sent, failed), (['a@example.com', 'b@example.com'], []))
+        self.assertEqual(
+            [(message.to, message.subject, message.body) for message in mail.outbox],
+            [
+                (['a@example.com'], 'Hi Ann', 'Hello, Ann!'),
+                (['b@example.com'], 'Hi Bo', 'Hello, Bo!'),
+            ],
+        )
+        self.assertEqual(mail.outbox[1].alternatives[0][0], '<p>Hello, Bo!</p>')
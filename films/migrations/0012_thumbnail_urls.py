@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('films', '0011_update_help_text_replace_float_classes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collection',
+            name='thumbnail_urls',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='productionlog',
+            name='thumbnail_urls',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -18,7 +18,7 @@ class ThumbnailAspectRatioChoices(models.TextChoices):
     four_by_three = '4:3', 'Four-By-Three (4:3)'
 
 
-class Collection(mixins.CreatedUpdatedMixin, mixins.StaticThumbnailURLMixin, models.Model):
+class Collection(mixins.CreatedUpdatedMixin, mixins.GeneratedThumbnailURLMixin, models.Model):
     class Meta:
         ordering = ['order', 'date_created']
 
@@ -12,7 +12,7 @@ from films.models import Asset, Film
 User = get_user_model()
 
 
-class ProductionLog(mixins.CreatedUpdatedMixin, mixins.StaticThumbnailURLMixin, models.Model):
+class ProductionLog(mixins.CreatedUpdatedMixin, mixins.GeneratedThumbnailURLMixin, models.Model):
     """A log (collection) of all authors' production log entries in one week."""
 
     class Meta:
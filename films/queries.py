@@ -1,17 +1,19 @@
 from enum import Enum
-from typing import List, Optional, cast, Dict, Union, Any
+from typing import List, Optional, cast, Dict, Union, Any, Tuple
 import logging
 import random
 
 from django.contrib.auth import get_user_model
 from django.core import paginator
+from django.db.models import F, Model, Window
+from django.db.models.expressions import OrderBy
+from django.db.models.functions import Lag, Lead
 from django.db.models.query import Prefetch, QuerySet
 from django.http.request import HttpRequest
 
 from comments import typed_templates
-from comments.models import Comment
-from comments.queries import get_annotated_comments
-from comments.views.common import comments_to_template_type
+from comments.queries import get_annotated_comments_page
+from comments.views.common import comments_page_to_template_type
 from films.models import Asset, Collection, Film, ProductionLogEntryAsset, Like, ProductionLog
 import common.queries
 
@@ -44,74 +46,95 @@ def _get_assets_in_production_log_entry(asset: Asset) -> QuerySet:
     )
 
 
-def _get_previous_in_query(q: QuerySet, instance: Asset) -> Optional[Asset]:
-    """Fetch a record previous from this one in the given query.
+def _get_ordering(q: QuerySet) -> List[Any]:
+    """Return ordering of the given query, resolved the same way as the SQL compiler does."""
+    query = q.query
+    if query.extra_order_by:
+        return list(query.extra_order_by)
+    if not query.default_ordering:
+        return list(query.order_by)
+    return list(query.order_by or q.model._meta.ordering or [])
 
-    Because some records, such as assets, must be ordered by multiple columns,
-    ORM's `get_previous_by_FOO` cannot be used.
-    See https://code.djangoproject.com/ticket/16505 for more details.
-    """
-    result_list = list(q)
-    instance_index = result_list.index(instance)
-    if instance_index == 0:
-        return None
-    return result_list[instance_index - 1]
+
+def _to_order_by(field: Any) -> OrderBy:
+    if isinstance(field, OrderBy):
+        return field
+    if hasattr(field, 'resolve_expression'):
+        return field.asc()
+    if field.startswith('-'):
+        return F(field[1:]).desc()
+    return F(field).asc()
 
 
-def _get_next_in_query(q: QuerySet, instance: Asset) -> Optional[Any]:
-    """Fetch a record next to this one in the given query.
+def _get_neighbours_in_query(
+    q: QuerySet, instance: Model
+) -> Tuple[Optional[Model], Optional[Model]]:
+    """Fetch records previous and next to this one in the given query, in a single query.
 
     Because some records, such as assets, must be ordered by multiple columns,
-    ORM's `get_next_by_FOO` cannot be used.
+    ORM's `get_previous_by_FOO` and `get_next_by_FOO` cannot be used.
     See https://code.djangoproject.com/ticket/16505 for more details.
-    """
-    result_list = list(q)
-    instance_index = result_list.index(instance)
-    if instance_index == len(result_list) - 1:
-        return None
-    return result_list[instance_index + 1]
 
+    Instead of loading the whole query to find the position of the given record in it,
+    the neighbouring primary keys are computed by the database using LAG/LEAD window
+    functions ordered the same way as the query, so that the cost of this lookup
+    doesn't depend on the number of records in the query.
+    Primary key is added as the last ordering column to break ties deterministically,
+    and is the only one if the query isn't ordered.
+    """
+    window_order_by = [*map(_to_order_by, _get_ordering(q)), F('pk').asc()]
+    window_query = q.annotate(
+        previous_pk=Window(expression=Lag('pk'), order_by=window_order_by),
+        next_pk=Window(expression=Lead('pk'), order_by=window_order_by),
+    ).values('pk', 'previous_pk', 'next_pk')
+    window_sql, window_params = window_query.query.sql_with_params()
+    pk_column = q.model._meta.pk.column
+    neighbours = q.model.objects.raw(
+        f'''
+        SELECT t.*, w.previous_pk
+        FROM {q.model._meta.db_table} t
+        JOIN ({window_sql}) w ON t.{pk_column} IN (w.previous_pk, w.next_pk)
+        WHERE w.{pk_column} = %s
+        ''',
+        [*window_params, instance.pk],
+    )
 
-def get_previous_asset_in_production_logs(asset: Asset) -> Optional[Asset]:  # noqa: D103
-    current_log_entry_assets = _get_assets_in_production_log_entry(asset)
-    return _get_previous_in_query(current_log_entry_assets, asset)
+    previous = next_ = None
+    for neighbour in neighbours:
+        if neighbour.pk == getattr(neighbour, 'previous_pk'):
+            previous = neighbour
+        else:
+            next_ = neighbour
+    return previous, next_
 
 
-def get_next_asset_in_production_logs(asset: Asset) -> Optional[Asset]:  # noqa: D103
+def get_neighbour_assets_in_production_logs(
+    asset: Asset,
+) -> Tuple[Optional[Asset], Optional[Asset]]:
+    """Fetch assets previous and next to this one in its production log entry."""
     current_log_entry_assets = _get_assets_in_production_log_entry(asset)
-    return _get_next_in_query(current_log_entry_assets, asset)
+    return _get_neighbours_in_query(current_log_entry_assets, asset)
 
 
-def get_previous_production_log(production_logs, production_log):  # noqa: D103
-    return _get_previous_in_query(production_logs, production_log)
+def get_neighbour_production_logs(
+    production_logs: QuerySet, production_log: ProductionLog
+) -> Tuple[Optional[ProductionLog], Optional[ProductionLog]]:
+    """Fetch production logs previous and next to this one in the given query."""
+    return _get_neighbours_in_query(production_logs, production_log)
 
 
-def get_next_production_log(production_logs, production_log):  # noqa: D103
-    return _get_next_in_query(production_logs, production_log)
-
-
-def get_previous_asset_in_featured_artwork(asset: Asset) -> Optional[Asset]:
-    """Fetch asset previous from this one in featured film assets."""
-    featured_assets = get_featured_assets(asset.film)
-    return _get_previous_in_query(featured_assets, asset)
-
-
-def get_next_asset_in_featured_artwork(asset: Asset) -> Optional[Asset]:
-    """Fetch asset next from this one in featured film assets."""
+def get_neighbour_assets_in_featured_artwork(
+    asset: Asset,
+) -> Tuple[Optional[Asset], Optional[Asset]]:
+    """Fetch assets previous and next to this one in featured film assets."""
     featured_assets = get_featured_assets(asset.film)
-    return _get_next_in_query(featured_assets, asset)
-
-
-def get_previous_asset_in_gallery(asset: Asset) -> Optional[Asset]:
-    """Fetch asset previous from this one in this asset's collection."""
-    collection_assets = _get_other_assets_in_collection(asset)
-    return _get_previous_in_query(collection_assets, asset)
+    return _get_neighbours_in_query(featured_assets, asset)
 
 
-def get_next_asset_in_gallery(asset: Asset) -> Optional[Asset]:
-    """Fetch asset next from this one in the this asset's collection."""
+def get_neighbour_assets_in_gallery(asset: Asset) -> Tuple[Optional[Asset], Optional[Asset]]:
+    """Fetch assets previous and next to this one in this asset's collection."""
     collection_assets = _get_other_assets_in_collection(asset)
-    return _get_next_in_query(collection_assets, asset)
+    return _get_neighbours_in_query(collection_assets, asset)
 
 
 def get_asset_context(
@@ -150,25 +173,22 @@ def get_asset_context(
     site_context = request.GET.get('site_context')
 
     if site_context == SiteContexts.PRODUCTION_LOGS.value:
-        previous_asset = get_previous_asset_in_production_logs(asset)
-        next_asset = get_next_asset_in_production_logs(asset)
+        previous_asset, next_asset = get_neighbour_assets_in_production_logs(asset)
     elif site_context == SiteContexts.FEATURED_ARTWORK.value:
-        previous_asset = get_previous_asset_in_featured_artwork(asset)
-        next_asset = get_next_asset_in_featured_artwork(asset)
+        previous_asset, next_asset = get_neighbour_assets_in_featured_artwork(asset)
     elif site_context == SiteContexts.GALLERY.value:
-        previous_asset = get_previous_asset_in_gallery(asset)
-        next_asset = get_next_asset_in_gallery(asset)
+        previous_asset, next_asset = get_neighbour_assets_in_gallery(asset)
     else:
         previous_asset = next_asset = None
 
-    comments: List[Comment] = get_annotated_comments(asset, request.user.pk)
+    comments = get_annotated_comments_page(asset, request.user.pk)
 
     context = {
         'asset': asset,
         'previous_asset': previous_asset,
         'next_asset': next_asset,
         'site_context': site_context,
-        'comments': comments_to_template_type(comments, asset.comment_url, request.user),
+        'comments': comments_page_to_template_type(comments, asset.comment_url, request.user),
         'user_can_edit_asset': (
             request.user.is_staff and request.user.has_perm('films.change_asset')
         ),
@@ -197,8 +217,10 @@ def get_asset_by_slug(slug: str, film_id: int, request: HttpRequest = None) -> O
             'static_asset__license',
             'static_asset__author',
             'static_asset__user',
+            'static_asset__video',
             'entry_asset__production_log_entry',
         )
+        .prefetch_related('static_asset__video__variations')
         .get()
     )
     return _get_asset_liked(asset, request)
@@ -215,8 +237,10 @@ def get_asset(asset_pk: int, request: HttpRequest = None) -> Optional[Asset]:
             'static_asset__license',
             'static_asset__author',
             'static_asset__user',
+            'static_asset__video',
             'entry_asset__production_log_entry',
         )
+        .prefetch_related('static_asset__video__variations')
         .get()
     )
 
@@ -15,7 +15,12 @@ from common.tests.factories.films import (
 )
 from common.tests.factories.static_assets import StaticAssetFactory
 from common.tests.factories.users import UserFactory
-from films.queries import SiteContexts, get_asset_context
+from films.queries import (
+    SiteContexts,
+    get_asset_context,
+    get_neighbour_assets_in_featured_artwork,
+    get_neighbour_assets_in_gallery,
+)
 
 
 class TestSiteContextResolution(TestCase):
@@ -27,38 +32,32 @@ class TestSiteContextResolution(TestCase):
         cls.asset = AssetFactory()
         cls.other_asset = AssetFactory(film=cls.asset.film, collection=cls.asset.collection)
 
-    @patch('films.queries.get_next_asset_in_gallery', return_value=None)
-    @patch('films.queries.get_previous_asset_in_gallery', return_value=None)
-    def test_gallery_site_context(self, get_previous_asset_mock, get_next_asset_mock):
+    @patch('films.queries.get_neighbour_assets_in_gallery', return_value=(None, None))
+    def test_gallery_site_context(self, get_neighbour_assets_mock):
         query_string = f'site_context={SiteContexts.GALLERY.value}'
         request = self.factory.get(f'{reverse("api-asset", args=(self.asset.pk,))}?{query_string}')
         request.user = self.user
         _ = get_asset_context(self.asset, request)
 
-        get_previous_asset_mock.assert_called_once_with(self.asset)
-        get_next_asset_mock.assert_called_once_with(self.asset)
+        get_neighbour_assets_mock.assert_called_once_with(self.asset)
 
-    @patch('films.queries.get_next_asset_in_featured_artwork', return_value=None)
-    @patch('films.queries.get_previous_asset_in_featured_artwork', return_value=None)
-    def test_featured_artwork_site_context(self, get_previous_asset_mock, get_next_asset_mock):
+    @patch('films.queries.get_neighbour_assets_in_featured_artwork', return_value=(None, None))
+    def test_featured_artwork_site_context(self, get_neighbour_assets_mock):
         query_string = f'site_context={SiteContexts.FEATURED_ARTWORK.value}'
         request = self.factory.get(f'{reverse("api-asset", args=(self.asset.pk,))}?{query_string}')
         request.user = self.user
         _ = get_asset_context(self.asset, request)
 
-        get_previous_asset_mock.assert_called_once_with(self.asset)
-        get_next_asset_mock.assert_called_once_with(self.asset)
+        get_neighbour_assets_mock.assert_called_once_with(self.asset)
 
-    @patch('films.queries.get_next_asset_in_production_logs', return_value=None)
-    @patch('films.queries.get_previous_asset_in_production_logs', return_value=None)
-    def test_production_logs_site_context(self, get_previous_asset_mock, get_next_asset_mock):
+    @patch('films.queries.get_neighbour_assets_in_production_logs', return_value=(None, None))
+    def test_production_logs_site_context(self, get_neighbour_assets_mock):
         query_string = f'site_context={SiteContexts.PRODUCTION_LOGS.value}'
         request = self.factory.get(f'{reverse("api-asset", args=(self.asset.pk,))}?{query_string}')
         request.user = self.user
         _ = get_asset_context(self.asset, request)
 
-        get_previous_asset_mock.assert_called_once_with(self.asset)
-        get_next_asset_mock.assert_called_once_with(self.asset)
+        get_neighbour_assets_mock.assert_called_once_with(self.asset)
 
     def test_wrong_site_context(self):
         query_string = 'site_context=definitely-incorrect'
@@ -298,3 +297,30 @@ class TestAssetOrderingInProductionLogs(TestCase):
             self.assertEqual(context['previous_asset'], previous_asset)
             self.assertEqual(context['asset'], asset)
             self.assertEqual(context['next_asset'], next_asset)
+
+
+class TestNeighbourAssetsQueryCount(TestCase):
+    """Looking up neighbouring assets must not get more expensive as collections grow."""
+
+    def _assert_num_queries_flat(self, get_neighbour_assets, **asset_kwargs):
+        for collection_size in (3, 30, 300):
+            film = FilmFactory()
+            collection = CollectionFactory(film=film)
+            assets = [
+                AssetFactory(film=film, collection=collection, order=i, **asset_kwargs)
+                for i in range(collection_size)
+            ]
+            asset = assets[collection_size // 2]
+
+            with self.subTest(collection_size=collection_size):
+                with self.assertNumQueries(1):
+                    previous_asset, next_asset = get_neighbour_assets(asset)
+
+                self.assertIsNotNone(previous_asset)
+                self.assertIsNotNone(next_asset)
+
+    def test_gallery_neighbours_num_queries_does_not_depend_on_collection_size(self):
+        self._assert_num_queries_flat(get_neighbour_assets_in_gallery)
+
+    def test_featured_artwork_neighbours_num_queries_does_not_depend_on_number_of_assets(self):
+        self._assert_num_queries_flat(get_neighbour_assets_in_featured_artwork, is_featured=True)
@@ -1,10 +1,11 @@
 import random
 
+from django.db.models import F
 from django.test import TestCase
 
 from common.tests.factories.films import AssetFactory
 from films.models.assets import Asset
-from films.queries import get_random_featured_assets
+from films.queries import _get_neighbours_in_query, get_random_featured_assets
 
 
 class TestQueries(TestCase):
@@ -64,3 +65,15 @@ class TestQueries(TestCase):
         self.assertEqual(len(random_assets2), len({asset.pk for asset in random_assets2}))
         # That's no necessarily true all the time, but most of the times this test should not fail
         self.assertNotEqual({a.pk for a in random_assets1}, {a.pk for a in random_assets2})
+
+    def test_get_neighbours_in_query_ordered_by_expression(self):
+        assets = [AssetFactory(order=order) for order in (3, 1, 2)]
+        query = Asset.objects.order_by(F('order').desc())
+
+        self.assertEqual(_get_neighbours_in_query(query, assets[2]), (assets[0], assets[1]))
+
+    def test_get_neighbours_in_query_without_ordering(self):
+        assets = sorted((AssetFactory() for _ in range(3)), key=lambda asset: asset.pk)
+        query = Asset.objects.order_by()
+
+        self.assertEqual(_get_neighbours_in_query(query, assets[0]), (None, assets[1]))
@@ -9,8 +9,7 @@ from django.views.generic import dates, detail
 from common.queries import has_active_subscription
 from films.models import Film, ProductionLog
 from films.queries import (
-    get_next_production_log,
-    get_previous_production_log,
+    get_neighbour_production_logs,
     get_production_logs,
     should_show_landing_page,
 )
@@ -68,11 +67,12 @@ class ProductionLogDetailView(LandingPageMixin, detail.DetailView):
         context = super().get_context_data(**kwargs)
         context.update(_get_shared_context(self.request))
         production_log = context['production_log']
-        film_production_logs = list(
-            production_log.film.production_logs.order_by(*ProductionLog._meta.ordering).all()
+        film_production_logs = production_log.film.production_logs.order_by(
+            *ProductionLog._meta.ordering
+        )
+        context['previous'], context['next'] = get_neighbour_production_logs(
+            film_production_logs, production_log
         )
-        context['previous'] = get_previous_production_log(film_production_logs, production_log)
-        context['next'] = get_next_production_log(film_production_logs, production_log)
         if self.request.user.is_authenticated:
             context['user_has_production_credit'] = self.request.user.production_credits.filter(film=self.object.film)
 
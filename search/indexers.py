@@ -0,0 +1,89 @@
+"""Apply changes of searchable objects to the search indexes."""
+from abc import ABC
+from typing import Any, Dict, Iterable, List, Tuple, Type
+import logging
+
+from django.conf import settings
+
+from common.types import assert_cast
+from search import MAIN_INDEX_UIDS, TRAINING_INDEX_UIDS
+from search.serializers.base import SearchableModel, BaseSearchSerializer
+from search.serializers.main_search import MainSearchSerializer
+from search.serializers.training_search import TrainingSearchSerializer
+
+log = logging.getLogger(__name__)
+
+
+class BaseSearchIndexer(ABC):
+    """A base class for updating documents of changed objects in a group of indexes.
+
+    Attributes:
+        name: A short name of the group of indexes, e.g. used in management commands.
+        index_uids: A list of index uids to which documents should be added.
+        searchable_attributes: A list of document attributes which should be searchable.
+        serializer: A BaseSearchSerializer instance, used to prepare the objects to be
+            added to the indexes from the index_uids list.
+    """
+
+    name: str
+    index_uids: List[str]
+    searchable_attributes: List[str]
+    serializer: BaseSearchSerializer
+
+    def get_changes(
+        self, model: Type[SearchableModel], object_ids: Iterable[int]
+    ) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Return documents to add to the indexes, and search IDs of documents to delete.
+
+        Objects which no longer exist or are no longer searchable (e.g. were unpublished)
+        have to be deleted from the indexes.
+        """
+        if model not in self.serializer.models_to_index:
+            return [], []
+
+        object_ids = set(object_ids)
+        queryset = self.serializer.get_searchable_queryset(model, id__in=object_ids)
+        documents = self.serializer.prepare_data_for_indexing(queryset)
+        indexed_ids = {document['id'] for document in documents}
+        search_ids_to_delete = [
+            f'{model._meta.model_name}_{object_id}'
+            for object_id in sorted(object_ids - indexed_ids)
+        ]
+        return documents, search_ids_to_delete
+
+    def apply_changes(self, documents: List[Dict[str, Any]], search_ids: List[str]) -> None:
+        """Send a single batch of added and a single batch of deleted documents to each index."""
+        for index_uid in self.index_uids:
+            index = settings.SEARCH_CLIENT.get_index(index_uid)
+            if documents:
+                index.add_documents(documents)
+                # There seems to be no way in MeiliSearch v0.13.0 to disable adding new document
+                # fields automatically to searchable attrs, so we update the settings to set them:
+                index.update_searchable_attributes(self.searchable_attributes)
+            if search_ids:
+                index.delete_documents(search_ids)
+        log.info(
+            f'Added {len(documents)} and deleted {len(search_ids)} documents '
+            f'in the {self.index_uids} search indexes.'
+        )
+
+
+class MainSearchIndexer(BaseSearchIndexer):
+    """Updates documents in the main index and its replicas."""
+
+    name = 'main'
+    index_uids = MAIN_INDEX_UIDS
+    searchable_attributes = assert_cast(list, settings.MAIN_SEARCH['SEARCHABLE_ATTRIBUTES'])
+    serializer = MainSearchSerializer()
+
+
+class TrainingSearchIndexer(BaseSearchIndexer):
+    """Updates documents in the training index and its replicas."""
+
+    name = 'training'
+    index_uids = TRAINING_INDEX_UIDS
+    searchable_attributes = assert_cast(list, settings.TRAINING_SEARCH['SEARCHABLE_ATTRIBUTES'])
+    serializer = TrainingSearchSerializer()
+
+
+ALL_INDEXERS: List[BaseSearchIndexer] = [MainSearchIndexer(), TrainingSearchIndexer()]
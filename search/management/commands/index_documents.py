@@ -1,38 +1,96 @@
-from typing import Any
-from typing import List, Dict
+from typing import Any, Dict, List, Optional, Tuple, Type
 
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 
-from search import TRAINING_INDEX_UIDS, ALL_INDEX_UIDS
 from search.health_check import MeiliSearchServiceError, check_meilisearch
-from search.serializers.base import BaseSearchSerializer
-from search.serializers.main_search import MainSearchSerializer
-from search.serializers.training_search import TrainingSearchSerializer
+from search.indexers import ALL_INDEXERS, BaseSearchIndexer
+from search.serializers.base import SearchableModel
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _step_name(indexer: BaseSearchIndexer, model: Type[SearchableModel]) -> str:
+    return f'{indexer.name}:{model._meta.label_lower}'
 
 
 class Command(BaseCommand):
     help = (
         f'Add database objects to the main search index "{settings.MEILISEARCH_INDEX_UID}". '
-        f'Also update replica indexes for different search results ordering. The following '
-        f'models are indexed: Film, Asset, Training, Section, Post. '
-        f'Objects already present in the indexes are updated.'
+        f'Also update replica indexes for different search results ordering, and the training '
+        f'index. The following models are indexed: Film, Asset, Training, Section, Post. '
+        f'Objects already present in the indexes are updated. '
+        f'Objects are streamed from the database and sent to the indexes in batches, so that '
+        f'memory use doesn\'t depend on the number of objects. Each model of each group of '
+        f'indexes is a separate step, e.g. "main:films.asset"; an interrupted run can be resumed '
+        f'using the --from-step and --after-pk options.'
     )
 
-    def _prepare_data(self, serializer: BaseSearchSerializer) -> Any:
-        objects_to_load: List[Dict[str, Any]] = []
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Number of documents sent to an index at once (default {DEFAULT_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--from-step', help='Skip all the steps before this one, e.g. "main:films.asset"'
+        )
+        parser.add_argument(
+            '--after-pk',
+            type=int,
+            help='In the first step, skip objects with pk lower than or equal to this one',
+        )
 
-        for model in serializer.models_to_index:
-            queryset = serializer.get_searchable_queryset(model)
-            self.stdout.write(f'Preparing {len(queryset)} "{model._meta.label}" objects...')
+    def _get_steps(
+        self, from_step: Optional[str]
+    ) -> List[Tuple[BaseSearchIndexer, Type[SearchableModel]]]:
+        steps = [
+            (indexer, model)
+            for indexer in ALL_INDEXERS
+            for model in indexer.serializer.models_to_index
+        ]
+        step_names = [_step_name(indexer, model) for indexer, model in steps]
+        if from_step is None:
+            return steps
+        if from_step not in step_names:
+            raise CommandError(f'Unknown step "{from_step}", expected one of: {step_names}')
+        first_step = step_names.index(from_step)
+        return steps[first_step:]
 
-            qs_values = serializer.prepare_data_for_indexing(queryset)
-            objects_to_load.extend(qs_values)
-            self.stdout.write(f'Done ({len(qs_values)} objects).')
+    def _send_batch(self, indexer: BaseSearchIndexer, documents: List[Dict[str, Any]]) -> None:
+        for index_uid in indexer.index_uids:
+            settings.SEARCH_CLIENT.get_index(index_uid).add_documents(documents)
 
-        self.stdout.write(f'{len(objects_to_load)} objects to load')
+    def _index_model(
+        self,
+        indexer: BaseSearchIndexer,
+        model: Type[SearchableModel],
+        batch_size: int,
+        after_pk: Optional[int],
+    ) -> None:
+        step_name = _step_name(indexer, model)
+        queryset = indexer.serializer.get_searchable_queryset(model)
+        if after_pk is not None:
+            queryset = queryset.filter(pk__gt=after_pk)
+        total = queryset.count()
+        self.stdout.write(f'{step_name}: indexing {total} objects...')
 
-        return objects_to_load
+        done = 0
+        batch: List[Dict[str, Any]] = []
+        documents = indexer.serializer.iter_documents(queryset, chunk_size=batch_size)
+        for document in documents:
+            batch.append(document)
+            if len(batch) < batch_size:
+                continue
+            self._send_batch(indexer, batch)
+            done += len(batch)
+            self.stdout.write(f'{step_name}: {done}/{total} (last pk {document["id"]})')
+            batch = []
+        if batch:
+            self._send_batch(indexer, batch)
+            done += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'{step_name}: done ({done} objects).'))
 
     def handle(self, *args: Any, **options: Any) -> None:
         try:
@@ -41,29 +99,19 @@ class Command(BaseCommand):
         except MeiliSearchServiceError as err:
             raise CommandError(err)
 
-        self.stdout.write('Preparing the data, it may take a while...')
-        data_to_load = self._prepare_data(serializer=MainSearchSerializer())
-        self.stdout.write('Preparing the training data, it may take a while...')
-        training_data_to_load = self._prepare_data(serializer=TrainingSearchSerializer())
-
-        # Update the main index and its replicas, and the training index and its replicas
-        for index_uid in ALL_INDEX_UIDS:
-            index = settings.SEARCH_CLIENT.get_index(index_uid)
-            if index_uid in TRAINING_INDEX_UIDS:
-                response = index.add_documents(training_data_to_load)
-                index.update_searchable_attributes(
-                    settings.TRAINING_SEARCH['SEARCHABLE_ATTRIBUTES']
-                )
-            else:
-                response = index.add_documents(data_to_load)
-                # There seems to be no way in MeiliSearch v0.13 to disable adding new document
-                # fields automatically to searchable attrs, so we update the settings to set them:
-                # TODO(fsiddi) Investigate if this is still the case with v0.15
-                index.update_searchable_attributes(settings.MAIN_SEARCH['SEARCHABLE_ATTRIBUTES'])
+        steps = self._get_steps(options['from_step'])
+        after_pk = options['after_pk']
+        for indexer, model in steps:
+            self._index_model(indexer, model, options['batch_size'], after_pk)
+            # Only the step being resumed is partially done
+            after_pk = None
 
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f'Successfully updated the index "{index_uid}". '
-                    f'Update ID: {response["updateId"]}.'
+        # There seems to be no way in MeiliSearch v0.13 to disable adding new document
+        # fields automatically to searchable attrs, so we update the settings to set them:
+        for indexer in dict.fromkeys(indexer for indexer, _ in steps):
+            for index_uid in indexer.index_uids:
+                index = settings.SEARCH_CLIENT.get_index(index_uid)
+                index.update_searchable_attributes(indexer.searchable_attributes)
+                self.stdout.write(
+                    self.style.SUCCESS(f'Successfully updated the index "{index_uid}".')
                 )
-            )
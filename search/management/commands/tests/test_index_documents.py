@@ -0,0 +1,57 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from common.tests.factories.blog import PostFactory
+from common.tests.factories.films import FilmFactory
+from search import ALL_INDEX_UIDS, MAIN_INDEX_UIDS
+from search.tests.fake_search_client import FakeSearchClient
+
+
+class IndexDocumentsCommandTest(TestCase):
+    def setUp(self) -> None:
+        self.search_client = FakeSearchClient(ALL_INDEX_UIDS)
+        override = override_settings(SEARCH_CLIENT=self.search_client)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_documents_are_sent_in_batches(self):
+        film = FilmFactory()
+        posts = PostFactory.create_batch(5, film=film)
+        PostFactory(film=film, is_published=False)
+
+        call_command('index_documents', batch_size=2, stdout=StringIO())
+
+        for index_uid in MAIN_INDEX_UIDS:
+            index = self.search_client.get_index(index_uid)
+            self.assertEqual(
+                set(index.documents),
+                {f'film_{film.pk}', *(f'post_{post.pk}' for post in posts)},
+            )
+            post_documents = [d for d in index.documents.values() if d['model'] == 'post']
+            self.assertEqual(len(post_documents), 5)
+            # A batch with the film, 3 batches of posts and a settings update
+            self.assertEqual(index.requests.count('add_documents'), 4)
+            self.assertEqual(index.requests[-1], 'update_searchable_attributes')
+
+    def test_resume_from_step(self):
+        posts = PostFactory.create_batch(3)
+        out = StringIO()
+
+        call_command(
+            'index_documents', from_step='main:blog.post', after_pk=posts[0].pk, stdout=out
+        )
+
+        for index_uid in MAIN_INDEX_UIDS:
+            self.assertEqual(
+                set(self.search_client.get_index(index_uid).documents),
+                {f'post_{posts[1].pk}', f'post_{posts[2].pk}'},
+            )
+        self.assertNotIn('films.film', out.getvalue())
+
+    def test_unknown_step(self):
+        with self.assertRaises(CommandError):
+            call_command('index_documents', from_step='main:blog.comment', stdout=StringIO())
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingIndexUpdate',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('model_label', models.CharField(max_length=100)),
+                ('object_id', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='pendingindexupdate',
+            constraint=models.UniqueConstraint(
+                fields=('model_label', 'object_id'), name='only_one_pending_update_per_object'
+            ),
+        ),
+    ]
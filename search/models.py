@@ -0,0 +1,26 @@
+from django.db import models
+
+
+class PendingIndexUpdate(models.Model):
+    """An object that was saved or deleted, whose search documents have to be updated.
+
+    Signals only record these, so that saving an object never waits for the search service.
+    Pending updates are applied in batches by `search.tasks.process_pending_index_updates`:
+    each recorded object is either added to the indexes, if it is still searchable,
+    or removed from them otherwise.
+    """
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['model_label', 'object_id'], name='only_one_pending_update_per_object'
+            )
+        ]
+
+    date_created = models.DateTimeField(auto_now_add=True)
+    # E.g. "films.asset", see `Model._meta.label_lower`
+    model_label = models.CharField(max_length=100)
+    object_id = models.PositiveIntegerField()
+
+    def __str__(self) -> str:
+        return f'Pending search index update of {self.model_label} {self.object_id}'
@@ -2,25 +2,24 @@ from abc import ABC
 from html.parser import HTMLParser
 from html import unescape
 from io import StringIO
-from typing import Optional, Any, Type, Dict, Union, Callable, List, TYPE_CHECKING
-import json
+from typing import Optional, Any, Type, Dict, Union, Callable, List, Iterator
 
 from django.core.serializers.json import DjangoJSONEncoder
 from django.db.models.expressions import Value
 from django.db.models.fields import CharField
+from django.db.models.fields.files import FieldFile
 from django.db.models.functions.text import Concat
 from django.db.models.query import QuerySet
 
-if TYPE_CHECKING:
-    # ValuesQuerySet has long been removed from Django, but it is required by mypy
-    from django.db.models.query import ValuesQuerySet
-
 from blog.models import Post
 from films.models import Film, Asset
 from training.models import Training, Section
 
 SearchableModel = Union[Film, Asset, Training, Section, Post]
 
+DEFAULT_CHUNK_SIZE = 500
+_json_encoder = DjangoJSONEncoder()
+
 
 class HTMLText(HTMLParser):
     def __init__(self):
@@ -55,36 +54,79 @@ class BaseSearchSerializer(ABC):
         additional_fields: For each model, a dict with additional fields to be added
             to each instance; the values of the fields are lambda functions, taking the
             instance as their only argument and returning the additional field's value.
+        select_related, prefetch_related: For each model, a list of related objects used
+            by the additional fields, fetched together with the objects to avoid a query
+            per indexed object.
     """
 
     models_to_index: List[Type[SearchableModel]]
     filter_params: Dict[Type[SearchableModel], Dict[str, Any]]
     annotations: Dict[Type[SearchableModel], Dict[str, Any]]
     additional_fields: Dict[Type[SearchableModel], Dict[str, Callable[[Any], Any]]]
+    select_related: Dict[Type[SearchableModel], List[str]] = {}
+    prefetch_related: Dict[Type[SearchableModel], List[str]] = {}
 
     def get_searchable_queryset(
         self, model: Type[SearchableModel], **filter_params: Any
     ) -> 'QuerySet[SearchableModel]':
         """Only returns the model's objects that should be available in search."""
-        filters = self.filter_params.get(model, {})
-        filters.update(**filter_params)
-        return model.objects.filter(**filters)
+        filters = {**self.filter_params.get(model, {}), **filter_params}
+        return (
+            model.objects.filter(**filters)
+            .select_related(*self.select_related.get(model, []))
+            .prefetch_related(*self.prefetch_related.get(model, []))
+        )
 
     def prepare_data_for_indexing(
         self, queryset: 'QuerySet[SearchableModel]'
     ) -> List[Dict[str, Any]]:
         """Serializes objects for search, adding all the necessary additional fields."""
+        return list(self.iter_documents(queryset))
+
+    def iter_documents(
+        self,
+        queryset: 'QuerySet[SearchableModel]',
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        after_pk: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Serializes objects for search one by one, fetching them from the database in chunks.
+
+        Objects are ordered by pk, and each chunk starts after the last pk of the previous one,
+        so each row is fetched and serialized only once, and memory use is bounded by the chunk
+        size no matter how many objects there are.
+
+        Args:
+            queryset: objects to serialize, e.g. from `get_searchable_queryset`;
+            chunk_size: (optional) number of objects fetched with one query;
+            after_pk: (optional) only serialize objects with pk greater than this one.
+        """
         model = queryset.model
+        annotations = self.annotations.get(model, {})
 
         queryset = self._add_common_annotations(queryset)
-        queryset = queryset.annotate(**self.annotations.get(model, {}))
-        qs_values = queryset.values()
-        for instance_dict, instance in zip(qs_values, queryset):
-            instance_dict = self._set_common_additional_fields(instance_dict, instance)
-            for key, func in self.additional_fields.get(model, {}).items():
-                instance_dict[key] = func(instance)
-
-        return self._serialize_data(qs_values)
+        queryset = queryset.annotate(**annotations).order_by('pk')
+        # Same attributes, in the same order, as `queryset.values()` would return
+        attnames = [
+            *(field.attname for field in model._meta.concrete_fields),
+            'model',
+            'search_id',
+            *annotations,
+        ]
+        while True:
+            chunk_queryset = queryset if after_pk is None else queryset.filter(pk__gt=after_pk)
+            chunk = list(chunk_queryset[:chunk_size])
+            for instance in chunk:
+                yield self._serialize_instance(instance, attnames)
+            if len(chunk) < chunk_size:
+                return
+            after_pk = chunk[-1].pk
+
+    def _serialize_instance(self, instance: SearchableModel, attnames: List[str]) -> Dict[str, Any]:
+        instance_dict = {attname: getattr(instance, attname) for attname in attnames}
+        instance_dict = self._set_common_additional_fields(instance_dict, instance)
+        for key, func in self.additional_fields.get(type(instance), {}).items():
+            instance_dict[key] = func(instance)
+        return {key: self._serialize_value(value) for key, value in instance_dict.items()}
 
     def _add_common_annotations(
         self, queryset: 'QuerySet[SearchableModel]'
@@ -117,18 +159,32 @@ class BaseSearchSerializer(ABC):
             instance_dict['thumbnail_url'] = instance.thumbnail_s_url or ''
         return instance_dict
 
-    def _serialize_data(
-        self, qs_values: 'ValuesQuerySet[SearchableModel, Any]'
-    ) -> List[Dict[str, Any]]:
-        """Turns values queryset into a list of objects that can be added to a search index.
+    @classmethod
+    def _serialize_value(cls, value: Any) -> Any:
+        """Turns a value into one that can be added to a search index as a part of a document.
+
+        Datetime values have to be serialized with DjangoJSONEncoder, and files - by their name,
+        same as in `queryset.values()`.
+        """
+        if isinstance(value, FieldFile):
+            return value.name
+        if value is None or isinstance(value, (str, int, float, list, dict)):
+            return value
+        return _json_encoder.default(value)
+
+    @classmethod
+    def get_section_tags(cls, training: Training) -> List[str]:
+        """Return names of the tags of all the training's sections, without duplicates.
 
-        The Index.add_documents method expects a list of objects, not a single object.
-        Datetime values have to be serialized with DjangoJSONEncoder.
+        Expects the training's chapters, their sections and the sections' tags to be prefetched.
         """
-        serialized_data: List[Dict[str, Any]] = json.loads(
-            json.dumps(list(qs_values), cls=DjangoJSONEncoder)
+        tag_names = (
+            tag.name
+            for chapter in training.chapters.all()
+            for section in chapter.sections.all()
+            for tag in section.tags.all()
         )
-        return serialized_data
+        return list(dict.fromkeys(tag_names))
 
     @classmethod
     def clean_html(cls, text: Optional[str]) -> Optional[str]:
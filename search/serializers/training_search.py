@@ -1,6 +1,5 @@
 from django.db.models.expressions import F, Value, Case, When
 from django.db.models.fields import CharField
-from taggit.models import Tag
 
 from films.models import Asset, AssetCategory
 from search.serializers.base import BaseSearchSerializer
@@ -37,11 +36,21 @@ class TrainingSearchSerializer(BaseSearchSerializer):
         Training: {
             'tags': lambda instance: [clean_tag(tag.name) for tag in instance.tags.all()],
             'secondary_tags': lambda instance: [
-                clean_tag(tag.name)
-                for tag in Tag.objects.filter(section__chapter__training__pk=instance.pk).distinct()
+                clean_tag(tag_name) for tag_name in BaseSearchSerializer.get_section_tags(instance)
             ],
             'favorite_url': lambda instance: instance.favorite_url,
-            'is_free': lambda instance: instance.is_free,
+            # Same as `Training.is_free`, but using the prefetched sections
+            'is_free': lambda instance: all(
+                section.is_free
+                for chapter in instance.chapters.all()
+                for section in chapter.sections.all()
+            ),
         },
         Asset: {'tags': lambda instance: [clean_tag(tag.name) for tag in instance.tags.all()]},
     }
+
+    select_related = {Asset: ['film', 'collection', 'static_asset']}
+    prefetch_related = {
+        Training: ['tags', 'chapters__sections__tags'],
+        Asset: ['tags'],
+    }
@@ -0,0 +1,114 @@
+"""Background tasks for keeping the search indexes up to date."""
+from collections import defaultdict
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Set, Type
+import logging
+
+from background_task import background
+from background_task.models import Task
+from django.apps import apps
+from django.db import transaction
+
+from search.health_check import check_meilisearch
+from search.indexers import ALL_INDEXERS
+from search.models import PendingIndexUpdate
+from search.serializers.base import SearchableModel
+
+log = logging.getLogger(__name__)
+
+# Waiting a bit before applying the updates allows to collect all the changes made by
+# e.g. a bulk edit in the admin, and to send them to the search service all at once.
+INDEX_UPDATE_DELAY = timedelta(seconds=10)
+INDEX_UPDATE_BATCH_SIZE = 500
+
+
+def schedule_index_updates(model: Type[SearchableModel], object_ids: Iterable[int]) -> None:
+    """Record objects which have changed and schedule updating their search documents.
+
+    Repeated changes of the same object are recorded only once.
+    """
+    PendingIndexUpdate.objects.bulk_create(
+        [
+            PendingIndexUpdate(model_label=model._meta.label_lower, object_id=object_id)
+            for object_id in object_ids
+        ],
+        ignore_conflicts=True,
+    )
+    is_scheduled = Task.objects.filter(
+        task_name=process_pending_index_updates.name,
+        locked_by__isnull=True,
+        failed_at__isnull=True,
+    ).exists()
+    if not is_scheduled:
+        process_pending_index_updates(schedule=INDEX_UPDATE_DELAY)
+
+
+def _claim_pending_updates() -> List[PendingIndexUpdate]:
+    """Remove a batch of pending updates from the queue and return it.
+
+    Updates are removed before they are applied, so that an object changed in the meantime
+    is recorded again instead of being lost.
+    """
+    with transaction.atomic():
+        pending_updates = list(
+            PendingIndexUpdate.objects.select_for_update(skip_locked=True).order_by('pk')[
+                :INDEX_UPDATE_BATCH_SIZE
+            ]
+        )
+        PendingIndexUpdate.objects.filter(pk__in=[u.pk for u in pending_updates]).delete()
+    return pending_updates
+
+
+def apply_pending_index_updates() -> int:
+    """Apply all pending index updates, sending changes to the indexes in batches.
+
+    For each index, documents of all the changed objects in a batch that are still searchable
+    are added with a single request, and the rest are deleted with a single request.
+    If the search service fails, the claimed updates are put back in the queue.
+
+    Returns:
+        The number of applied updates.
+
+    Raises:
+        MeiliSearchServiceError: if the search service or some of the indexes are unavailable.
+    """
+    check_meilisearch(check_indexes=True)
+
+    number_of_updates = 0
+    while True:
+        pending_updates = _claim_pending_updates()
+        if not pending_updates:
+            return number_of_updates
+
+        object_ids: Dict[str, Set[int]] = defaultdict(set)
+        for pending_update in pending_updates:
+            object_ids[pending_update.model_label].add(pending_update.object_id)
+
+        try:
+            for indexer in ALL_INDEXERS:
+                documents: List[Dict[str, Any]] = []
+                search_ids_to_delete: List[str] = []
+                for model_label, ids in object_ids.items():
+                    model = apps.get_model(model_label)
+                    to_add, to_delete = indexer.get_changes(model, ids)
+                    documents.extend(to_add)
+                    search_ids_to_delete.extend(to_delete)
+                indexer.apply_changes(documents, search_ids_to_delete)
+        except Exception:
+            log.exception('Failed to update search indexes, will retry')
+            PendingIndexUpdate.objects.bulk_create(
+                [
+                    PendingIndexUpdate(model_label=u.model_label, object_id=u.object_id)
+                    for u in pending_updates
+                ],
+                ignore_conflicts=True,
+            )
+            raise
+        number_of_updates += len(pending_updates)
+
+
+@background()
+def process_pending_index_updates() -> None:
+    """Apply pending search index updates, recorded by the search signals."""
+    number_of_updates = apply_pending_index_updates()
+    log.info(f'Applied {number_of_updates} pending search index updates')
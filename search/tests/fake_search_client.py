@@ -0,0 +1,65 @@
+"""An in-process replacement of the MeiliSearch client, for testing indexing offline."""
+from typing import Any, Dict, List, Optional
+
+
+class FakeIndex:
+    """Keeps documents in a dict, and records every request made to the index."""
+
+    def __init__(self, uid: str, primary_key: str = 'search_id'):
+        """Create an empty index."""
+        self.uid = uid
+        self.primary_key = primary_key
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.searchable_attributes: List[str] = ['*']
+        self.requests: List[str] = []
+        self._update_id = 0
+
+    def _update(self, request: str) -> Dict[str, int]:
+        self.requests.append(request)
+        self._update_id += 1
+        return {'updateId': self._update_id}
+
+    def add_documents(
+        self, documents: List[Dict[str, Any]], primary_key: Optional[str] = None
+    ) -> Dict[str, int]:
+        for document in documents:
+            self.documents[document[primary_key or self.primary_key]] = document
+        return self._update('add_documents')
+
+    def delete_documents(self, ids: List[str]) -> Dict[str, int]:
+        for document_id in ids:
+            self.documents.pop(document_id, None)
+        return self._update('delete_documents')
+
+    def delete_document(self, document_id: str) -> Dict[str, int]:
+        return self.delete_documents([document_id])
+
+    def update_searchable_attributes(self, body: List[str]) -> Dict[str, int]:
+        self.searchable_attributes = body
+        return self._update('update_searchable_attributes')
+
+
+class FakeSearchClient:
+    """Keeps indexes in a dict; indexes which don't exist yet are created on first access."""
+
+    def __init__(self, index_uids: List[str]):
+        """Create the given empty indexes."""
+        self.indexes = {uid: FakeIndex(uid) for uid in index_uids}
+
+    def get_index(self, uid: str) -> FakeIndex:
+        return self.indexes.setdefault(uid, FakeIndex(uid))
+
+    def get_indexes(self) -> List[Dict[str, Any]]:
+        return [
+            {'name': uid, 'uid': uid, 'primaryKey': index.primary_key}
+            for uid, index in self.indexes.items()
+        ]
+
+    def create_index(self, uid: str, options: Optional[Dict[str, Any]] = None) -> FakeIndex:
+        primary_key = (options or {}).get('primaryKey', 'search_id')
+        self.indexes[uid] = FakeIndex(uid, primary_key=primary_key)
+        return self.indexes[uid]
+
+    @property
+    def number_of_requests(self) -> int:
+        return sum(len(index.requests) for index in self.indexes.values())
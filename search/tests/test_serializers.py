@@ -0,0 +1,64 @@
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from common.tests.factories.blog import PostFactory
+from common.tests.factories.films import AssetFactory, FilmFactory
+from common.tests.factories.training import ChapterFactory, SectionFactory, TrainingFactory
+from films.models import AssetCategory
+from search.serializers.base import BaseSearchSerializer
+from search.serializers.main_search import MainSearchSerializer
+from search.serializers.training_search import TrainingSearchSerializer
+
+
+@patch(
+    'sorl.thumbnail.base.ThumbnailBackend.get_thumbnail',
+    **{'return_value.url': 'https://thumbnail.jpg'},
+)
+class TestSearchSerializersNumQueries(TestCase):
+    def _create_objects(self, number: int) -> None:
+        film = FilmFactory()
+        PostFactory.create_batch(number, film=film)
+        for asset in AssetFactory.create_batch(
+            number, film=film, category=AssetCategory.production_lesson
+        ):
+            asset.tags.add('lighting', 'animation')
+        for _ in range(number):
+            training = TrainingFactory(is_published=True)
+            training.tags.add('modeling')
+            chapter = ChapterFactory(training=training, is_published=True)
+            for section in SectionFactory.create_batch(2, chapter=chapter, is_published=True):
+                section.tags.add('rigging', 'modeling')
+
+    def _count_queries(self, serializer: BaseSearchSerializer) -> int:
+        with CaptureQueriesContext(connection) as context:
+            for model in serializer.models_to_index:
+                queryset = serializer.get_searchable_queryset(model)
+                serializer.prepare_data_for_indexing(queryset)
+        return len(context.captured_queries)
+
+    def test_num_queries_does_not_depend_on_number_of_objects(self, _):
+        for serializer in (MainSearchSerializer(), TrainingSearchSerializer()):
+            with self.subTest(serializer=serializer.__class__.__name__):
+                self._create_objects(1)
+                expected_num_queries = self._count_queries(serializer)
+                self._create_objects(10)
+
+                self.assertEqual(self._count_queries(serializer), expected_num_queries)
+
+    def test_training_secondary_tags(self, _):
+        training = TrainingFactory(is_published=True)
+        chapter = ChapterFactory(training=training, is_published=True)
+        SectionFactory(chapter=chapter, is_published=True).tags.add('rigging', 'modeling')
+        SectionFactory(chapter=chapter, is_published=True).tags.add('modeling')
+        serializer = TrainingSearchSerializer()
+
+        documents = serializer.prepare_data_for_indexing(
+            serializer.get_searchable_queryset(type(training))
+        )
+
+        self.assertEqual(len(documents), 1)
+        self.assertEqual(sorted(documents[0]['secondary_tags']), ['modeling', 'rigging'])
+        self.assertEqual(documents[0]['is_free'], training.is_free)
@@ -1,13 +1,20 @@
 from unittest.mock import patch
 
+from background_task.models import Task
+from django.conf import settings
 from django.db.models.signals import post_save, pre_delete
 from django.test.testcases import TestCase
+from django.test.utils import override_settings
 
 from blog.models import Post
 from common.tests.factories.films import FilmFactory
 from common.tests.factories.helpers import generate_file_path, catch_signal
 from common.tests.factories.users import UserFactory
 from films.models import Film, FilmStatus
+from search import MAIN_INDEX_UIDS, TRAINING_INDEX_UIDS, ALL_INDEX_UIDS
+from search.models import PendingIndexUpdate
+from search.tasks import apply_pending_index_updates
+from search.tests.fake_search_client import FakeSearchClient
 
 
 class TestBlogPostIndexing(TestCase):
@@ -22,23 +29,82 @@ class TestBlogPostIndexing(TestCase):
             'thumbnail': generate_file_path(),
         }
 
-    @patch('search.signals.check_meilisearch')
-    @patch('django.conf.settings.SEARCH_CLIENT')
-    def test_unpublished_posts_trigger_signal_but_are_not_indexed(
-        self, search_client_mock, check_meilisearch_mock
-    ):
+    def setUp(self) -> None:
+        self.search_client = FakeSearchClient(ALL_INDEX_UIDS)
+        override = override_settings(SEARCH_CLIENT=self.search_client)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_saving_posts_only_records_pending_updates(self):
         with catch_signal(post_save, sender=Post) as handler:
-            Post.objects.create(**self.post_data, is_published=False)
+            post = Post.objects.create(**self.post_data, is_published=True)
+            post.save()
             handler.assert_called()
-            check_meilisearch_mock.assert_called_once()
-            search_client_mock.assert_not_called()
 
-    @patch('search.signals.check_meilisearch')
-    @patch('django.conf.settings.SEARCH_CLIENT')
-    def test_new_published_posts_are_indexed(self, search_client_mock, check_meilisearch_mock):
-        Post.objects.create(**self.post_data, is_published=True)
-        check_meilisearch_mock.assert_called_once()
-        search_client_mock.get_index.return_value.add_documents.assert_called()
+        self.assertEqual(
+            list(PendingIndexUpdate.objects.values_list('model_label', 'object_id')),
+            [('blog.post', post.pk)],
+        )
+        self.assertEqual(Task.objects.count(), 1)
+        self.assertEqual(self.search_client.number_of_requests, 0)
+
+    def test_unpublished_posts_trigger_signal_but_are_not_indexed(self):
+        post = Post.objects.create(**self.post_data, is_published=False)
+
+        self.assertEqual(apply_pending_index_updates(), 1)
+
+        for index_uid in MAIN_INDEX_UIDS:
+            index = self.search_client.get_index(index_uid)
+            self.assertNotIn(f'post_{post.pk}', index.documents)
+            self.assertEqual(index.requests, ['delete_documents'])
+        self.assertFalse(PendingIndexUpdate.objects.exists())
+
+    def test_new_published_posts_are_indexed(self):
+        post = Post.objects.create(**self.post_data, is_published=True)
+
+        apply_pending_index_updates()
+
+        for index_uid in MAIN_INDEX_UIDS:
+            self.assertIn(f'post_{post.pk}', self.search_client.get_index(index_uid).documents)
+        for index_uid in TRAINING_INDEX_UIDS:
+            self.assertEqual(self.search_client.get_index(index_uid).documents, {})
+
+    def test_unpublished_posts_are_removed_from_index(self):
+        post = Post.objects.create(**self.post_data, is_published=True)
+        apply_pending_index_updates()
+
+        post.is_published = False
+        post.save()
+        apply_pending_index_updates()
+
+        for index_uid in MAIN_INDEX_UIDS:
+            self.assertNotIn(f'post_{post.pk}', self.search_client.get_index(index_uid).documents)
+
+    def test_changes_are_sent_in_one_batch_per_index(self):
+        for i in range(10):
+            Post.objects.create(**{**self.post_data, 'slug': f'post-{i}'}, is_published=bool(i % 2))
+
+        self.assertEqual(apply_pending_index_updates(), 10)
+
+        for index_uid in MAIN_INDEX_UIDS:
+            index = self.search_client.get_index(index_uid)
+            self.assertEqual(len(index.documents), 5)
+            self.assertEqual(
+                index.requests,
+                ['add_documents', 'update_searchable_attributes', 'delete_documents'],
+            )
+
+    def test_pending_updates_are_kept_if_search_service_fails(self):
+        post = Post.objects.create(**self.post_data, is_published=True)
+
+        with patch.object(self.search_client, 'get_index', side_effect=ConnectionError):
+            with self.assertRaises(ConnectionError):
+                apply_pending_index_updates()
+
+        self.assertEqual(
+            list(PendingIndexUpdate.objects.values_list('model_label', 'object_id')),
+            [('blog.post', post.pk)],
+        )
 
 
 class TestPostDeleteSignal(TestCase):
@@ -72,3 +138,19 @@ class TestPostDeleteSignal(TestCase):
         with catch_signal(pre_delete, sender=Film) as handler:
             film.delete()
             handler.assert_called()
+
+    @override_settings(SEARCH_CLIENT=FakeSearchClient(ALL_INDEX_UIDS))
+    def test_deleted_film_is_removed_from_index(self):
+        film = Film.objects.create(**self.film_data)
+        apply_pending_index_updates()
+        for index_uid in MAIN_INDEX_UIDS:
+            self.assertIn(f'film_{film.pk}', settings.SEARCH_CLIENT.get_index(index_uid).documents)
+
+        film_pk = film.pk
+        film.delete()
+        apply_pending_index_updates()
+
+        for index_uid in MAIN_INDEX_UIDS:
+            self.assertNotIn(
+                f'film_{film_pk}', settings.SEARCH_CLIENT.get_index(index_uid).documents
+            )
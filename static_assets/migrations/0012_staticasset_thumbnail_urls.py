@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('static_assets', '0011_add_static_asset_view_download_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='staticasset',
+            name='thumbnail_urls',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -9,6 +9,7 @@ from django.core.exceptions import ValidationError, ObjectDoesNotExist
 from django.db import models
 from django.template.defaultfilters import filesizeformat
 from django.urls.base import reverse
+from django.utils.functional import cached_property
 from django.utils.text import slugify
 
 from common import mixins
@@ -32,7 +33,7 @@ class StaticAssetFileTypeChoices(models.TextChoices):
     video = 'video', 'Video'
 
 
-class StaticAsset(mixins.CreatedUpdatedMixin, mixins.StaticThumbnailURLMixin, models.Model):
+class StaticAsset(mixins.CreatedUpdatedMixin, mixins.GeneratedThumbnailURLMixin, models.Model):
     class Meta:
         ordering = ['-date_created']
 
@@ -247,8 +248,15 @@ class Video(models.Model):
         seconds_str = f'{seconds:02d}'
         return f'{hours_str}{minutes_str}{seconds_str}'
 
-    @property
+    @cached_property
     def default_variation(self) -> Optional['VideoVariation']:
+        """Return the first variation of this video, looked up once per instance.
+
+        To avoid a query per video when many are shown, prefetch `variations`.
+        """
+        if 'variations' in getattr(self, '_prefetched_objects_cache', {}):
+            # Avoid a query when variations were prefetched, e.g. for attachment shortcodes
+            return min(self.variations.all(), key=lambda variation: variation.pk, default=None)
         return self.variations.first()
 
     @property
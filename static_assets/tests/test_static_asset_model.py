@@ -4,7 +4,11 @@ import mimetypes
 
 from django.test import TestCase
 
-from common.tests.factories.static_assets import StaticAssetFactory, VideoFactory
+from common.tests.factories.static_assets import (
+    StaticAssetFactory,
+    VideoFactory,
+    VideoVariationFactory,
+)
 from static_assets.models import StaticAsset, Video
 
 
@@ -70,3 +74,23 @@ class TestStaticAssetModel(TestCase):
 
         content_type, _ = mimetypes.guess_type('test.jpg')
         self.assertEqual(content_type, 'image/jpeg')
+
+    def test_video_default_variation_is_looked_up_once(self):
+        video_variation = VideoVariationFactory(
+            size_bytes=1024, video__static_asset__source_type='file'
+        )
+        # Saving a new video static asset would create another video for it
+        StaticAsset.objects.filter(pk=video_variation.video.static_asset_id).update(
+            source_type='video'
+        )
+        video = Video.objects.get(pk=video_variation.video_id)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(video.default_variation, video_variation)
+            self.assertEqual(video.source, video_variation.source)
+
+        static_asset = StaticAsset.objects.prefetch_related('video__variations').get(
+            pk=video.static_asset_id
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(static_asset.download_size, '1.0\xa0KB')
@@ -0,0 +1,87 @@
+from unittest.mock import patch
+import datetime
+import json
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from common.tests.factories.static_assets import VideoFactory
+from common.tests.factories.training import SectionFactory
+from common.tests.factories.users import UserFactory
+from static_assets.models import UserVideoProgress
+from training.models import UserSectionProgress
+from training.tasks import update_section_progress_of_video
+
+
+class TestVideoProgress(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserFactory()
+        self.video = VideoFactory(duration=datetime.timedelta(seconds=100))
+        self.section = SectionFactory(static_asset=self.video.static_asset)
+        self.client.force_login(self.user)
+
+    def _post_position(self, video_pk: int, position: float):
+        return self.client.post(
+            reverse('video-progress', kwargs={'video_pk': video_pk}),
+            json.dumps({'position': position}),
+            content_type='application/json',
+        )
+
+    def test_records_video_and_section_progress(self):
+        response = self._post_position(self.video.pk, 10)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'position': 10})
+        progress = UserVideoProgress.objects.get(user=self.user, video=self.video)
+        self.assertEqual(progress.position, datetime.timedelta(seconds=10))
+        section_progress = UserSectionProgress.objects.get(user=self.user, section=self.section)
+        self.assertTrue(section_progress.started)
+        self.assertFalse(section_progress.finished)
+
+        self._post_position(self.video.pk, 90)
+
+        progress.refresh_from_db()
+        self.assertEqual(progress.position, datetime.timedelta(seconds=90))
+        section_progress.refresh_from_db()
+        self.assertTrue(section_progress.finished)
+
+        # Watching a finished section again doesn't make it unfinished
+        self._post_position(self.video.pk, 5)
+
+        section_progress.refresh_from_db()
+        self.assertTrue(section_progress.finished)
+
+    def test_unknown_video(self):
+        response = self._post_position(self.video.pk + 1000, 10)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(UserVideoProgress.objects.count(), 0)
+
+    @override_settings(BUFFER_VIDEO_PROGRESS=True)
+    def test_section_progress_is_updated_in_background(self):
+        with patch('training.tasks.update_section_progress_of_video') as mock_task:
+            with self.captureOnCommitCallbacks(execute=True):
+                for position in (10, 20, 30):
+                    self._post_position(self.video.pk, position)
+
+        # The latest position is written right away
+        self.assertEqual(
+            self.video.get_progress_position(self.user.pk), datetime.timedelta(seconds=30)
+        )
+        self.assertEqual(UserSectionProgress.objects.count(), 0)
+        # Section progress is updated once, after the latest position
+        mock_task.assert_called_once_with(
+            user_pk=self.user.pk, video_pk=self.video.pk, is_finished=False, schedule=10
+        )
+
+        update_section_progress_of_video.task_function(
+            user_pk=self.user.pk, video_pk=self.video.pk, is_finished=False
+        )
+
+        self.assertTrue(
+            UserSectionProgress.objects.filter(
+                user=self.user, section=self.section, started=True, finished=False
+            ).exists()
+        )
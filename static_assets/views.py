@@ -5,7 +5,7 @@ import logging
 import mimetypes
 
 from django.contrib.auth.decorators import login_required
-from django.core.exceptions import ObjectDoesNotExist, SuspiciousOperation
+from django.core.exceptions import SuspiciousOperation
 from django.http import Http404
 from django.http.request import HttpRequest
 from django.http.response import JsonResponse, HttpResponse
@@ -17,13 +17,8 @@ import requests
 
 from common.storage import get_s3_url
 from common.queries import has_active_subscription, is_free_static_asset
-from static_assets.models.progress import UserVideoProgress
 from static_assets.models import Video, VideoTrack, StaticAsset
-from training.queries.progress import (
-    set_video_progress,
-    set_section_progress_started,
-    set_section_progress_finished,
-)
+from training.queries.progress import record_video_progress
 from static_assets.coconut import events
 from stats.models import StaticAssetDownload
 
@@ -39,20 +34,9 @@ def video_progress(request: HttpRequest, *, video_pk: int) -> JsonResponse:
     parsed_body = json.loads(request.body)
 
     position = datetime.timedelta(seconds=float(parsed_body['position']))
-    set_video_progress(user_pk=request.user.id, video_pk=video_pk, position=position)
-
-    # TODO(fsiddi) Separate this part, as section progress is specific to training
-    video = Video.objects.get(pk=video_pk)
-    try:
-        section = video.static_asset.section
-    except ObjectDoesNotExist:
-        section = None
-
-    if section:
-        set_section_progress_started(user_pk=request.user.id, section_pk=section.id)
-
-        if position / video.duration > UserVideoProgress.section_completion_fraction:
-            set_section_progress_finished(user_pk=request.user.id, section_pk=section.id)
+    # Progress is buffered: this is called every few seconds by every video being watched
+    if not record_video_progress(user_pk=request.user.id, video_pk=video_pk, position=position):
+        raise Http404()
 
     return JsonResponse({'position': position.total_seconds()})
 
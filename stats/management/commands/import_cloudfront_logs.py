@@ -1,11 +1,16 @@
 """
 Import CloudFront logs into postgresql.
 
+Log files are imported in parallel, each in its own process and transaction, and streamed
+into the table with COPY. Names of the imported files are recorded, so that running the
+command again only imports new files.
+
 Use the following command to the info about progress and ETA:
     kill -SIGUSR1 $(ps aux | grep import_cloud | grep -v grep | awk '{print $2}')
 """
-# from pprint import pprint
 from datetime import timedelta, datetime
+from multiprocessing import Pool
+from typing import Iterable, Iterator, List, Optional, Tuple
 import gzip
 import logging
 import os
@@ -17,14 +22,14 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
 from django.utils.text import slugify
-from psycopg2.extras import execute_values
 import psycopg2
 
 logger = logging.getLogger('write_stats')
 logger.setLevel(logging.DEBUG)
 User = get_user_model()
-BATCH_SIZE = 5000
 TABLE_NAME = 'cflogs'
+IMPORTED_FILES_TABLE_NAME = 'cflogs_imported_files'
+DEFAULT_PATH = '../cloudfront-logs/cloudfront'
 varchar_len_max = 2000
 field_defs = {
     # contains comma-separated IPs sometimes, cannot use cidr
@@ -63,69 +68,138 @@ field_defs = {
     'x-forwarded-for': f'VARCHAR({varchar_len_max})',
     'x-host-header': f'VARCHAR({varchar_len_max})',
 }
+# Each worker process uses its own connection, see `_init_worker`
+_connection = None
 
 
 def _cf_field_to_table(value: str) -> str:
     return slugify(value.replace('-', '_'))
 
 
+def _connect():
+    dbname = settings.DATABASES['default']['NAME']
+    user = settings.DATABASES['default']['USER']
+    password = settings.DATABASES['default']['PASSWORD']
+    return psycopg2.connect(f'dbname={dbname} user={user} password={password}')
+
+
+def _to_copy_value(field: str, value: bytes) -> str:
+    """Convert a log value into its COPY text format representation."""
+    if value in (b'-', b''):
+        return r'\N'
+    if field in ('time-taken', 'time-to-first-byte'):
+        # Seconds with millisecond precision, stored as milliseconds
+        return str(round(float(value) * 1000))
+    # Tabs and newlines can't be in the value, since the line is split by them
+    return value.decode()[:varchar_len_max].replace('\\', '\\\\')
+
+
+class LogParser:
+    """Turn lines of a CloudFront log into rows of the COPY text format.
+
+    Attributes:
+        columns: names of the table columns, in the order of the values in the rows.
+    """
+
+    def __init__(self, fields_line: bytes):
+        """Find positions of the imported fields in the lines, using the '#Fields' line."""
+        fields = fields_line.decode().split()[1:]
+        self._indexes = [(i, field) for i, field in enumerate(fields) if field in field_defs]
+        self._status_index = fields.index('sc-status')
+        self.columns = [_cf_field_to_table(field) for _, field in self._indexes]
+
+    def parse(self, line: bytes) -> Optional[str]:
+        """Return a row of the COPY text format, or None if the line shouldn't be imported."""
+        if line.startswith(b'#'):
+            return None
+        # Each line is split only once
+        values = line.rstrip(b'\n').split(b'\t')
+        if values[self._status_index] != b'200':
+            return None
+        return '\t'.join(_to_copy_value(field, values[i]) for i, field in self._indexes) + '\n'
+
+
+class _RowsFile:
+    """A read-only file-like object over rows, so that they can be streamed with COPY."""
+
+    def __init__(self, rows: Iterable[str]):
+        """Wrap an iterable of rows, each ending with a newline."""
+        self._rows = iter(rows)
+        self._buffer = ''
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._buffer) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._buffer += row
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def _read_rows(lines: Iterator[bytes], parser: LogParser) -> Iterator[str]:
+    for line in lines:
+        row = parser.parse(line)
+        if row is not None:
+            yield row
+
+
+def _init_worker() -> None:
+    global _connection
+    # Only the main process reports progress
+    for signalnum in (signal.SIGHUP, signal.SIGUSR1, signal.SIGUSR2):
+        signal.signal(signalnum, signal.SIG_IGN)
+    _connection = _connect()
+
+
+def import_file(file_path: str) -> Tuple[str, int]:
+    """Import a single log file, and record it as imported, in a single transaction.
+
+    Returns:
+        Name of the file and the number of imported rows.
+    """
+    file_name = os.path.basename(file_path)
+    with _connection, _connection.cursor() as cursor, gzip.open(file_path, 'r') as f:
+        lines = iter(f)
+        fields_line = next((line for line in lines if line.startswith(b'#Fields')), None)
+        if fields_line is None:
+            logger.warning('Skipping %s: no #Fields line', file_name)
+            return file_name, 0
+        parser = LogParser(fields_line)
+        cursor.copy_expert(
+            f"COPY {TABLE_NAME} ({','.join(parser.columns)}) FROM STDIN",
+            _RowsFile(_read_rows(lines, parser)),
+        )
+        row_count = cursor.rowcount
+        cursor.execute(
+            f'INSERT INTO {IMPORTED_FILES_TABLE_NAME} (name, row_count) VALUES (%s, %s)',
+            (file_name, row_count),
+        )
+    return file_name, row_count
+
+
 class Command(BaseCommand):
     """Do subj."""
 
     files_handled = 0
-    table_fields = None
-    insert_q = None
-    data = []
-
-    def _handle_line(self, line):
-        if line.startswith(b'#Version') or line.startswith(b'#Fields'):
-            return
-        values = {field: line.split(b'\t')[self.fields.index(field)] for field in self.fields}
-        status = values['sc-status']
-        if status != b'200':
-            return
 
-        q_values = []
-        for k in self.fields:
-            if k not in field_defs:
-                continue
-            v = values[k].decode()
-            if v in ('-', '-\n'):
-                v = None
-            elif k in ('time-taken', 'time-to-first-byte'):
-                v = float(v) + 1000
-            else:
-                v = v[:varchar_len_max]
-            q_values.append(v)
-        self.data.append(q_values)
-
-        if len(self.data) > BATCH_SIZE:
-            assert all(
-                len(_) == len(self.table_fields) for _ in self.data
-            ), f'{len(self.data[0])} == {len(self.table_fields)}'
-            # pprint(self.data)
-            execute_values(self.cursor, self.insert_q, self.data)
-            self.connection.commit()
-            self.data = []
-
-    def _handle_gz(self, file_path):
-        self.line_count = 0
-        with gzip.open(file_path, 'r') as f:
-            for line in f:
-                if line.startswith(b'#Fields'):
-                    if not self.table_fields:
-                        self.fields = line.decode().split()[1:]
-                        self.table_fields = [
-                            _cf_field_to_table(f) for f in self.fields if f in field_defs
-                        ]
-                        # placeholders = ','.join(['%s'] * len(self.table_fields))
-                        self.insert_q = (
-                            f"INSERT INTO cflogs ({','.join(self.table_fields)}) VALUES %s"
-                        )
-                    continue
-                self._handle_line(line)
-                self.line_count += 1
-        self.files_handled += 1
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=DEFAULT_PATH, help='Directory with gzipped CloudFront logs'
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=os.cpu_count(),
+            help='Number of files imported in parallel (default: number of CPUs)',
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Drop all the imported logs, and import all the files again',
+        )
 
     def _print_summary(self):
         logger.info('Files handled: %s/%s', self.files_handled, self.files_total)
@@ -145,33 +219,48 @@ class Command(BaseCommand):
         except Exception:
             pass
 
-    def _drop_table(self):
+    def _drop_tables(self):
         self.cursor.execute(f"DROP TABLE IF EXISTS {TABLE_NAME};")
+        self.cursor.execute(f"DROP TABLE IF EXISTS {IMPORTED_FILES_TABLE_NAME};")
         self.connection.commit()
 
-    def _create_table(self):
-        dbname = settings.DATABASES['default']['NAME']
-        user = settings.DATABASES['default']['USER']
-        password = settings.DATABASES['default']['PASSWORD']
-        self.connection = psycopg2.connect(f'dbname={dbname} user={user} password={password}')
+    def _create_tables(self, rebuild: bool):
+        self.connection = _connect()
         self.cursor = self.connection.cursor()
 
-        self._drop_table()
+        if rebuild:
+            self._drop_tables()
 
         fields = ','.join(
             [_cf_field_to_table(name) + ' ' + datatype for name, datatype in field_defs.items()]
         )
-        table_def = f"CREATE TABLE {TABLE_NAME} ({fields});"
-        self.cursor.execute(table_def)
+        self.cursor.execute(f"CREATE TABLE IF NOT EXISTS {TABLE_NAME} ({fields});")
+        # Used to only aggregate the recent logs, see `rollup_cloudfront_logs`
+        self.cursor.execute(f"CREATE INDEX IF NOT EXISTS {TABLE_NAME}_date ON {TABLE_NAME} (date);")
+        self.cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {IMPORTED_FILES_TABLE_NAME} ("
+            "name VARCHAR(256) PRIMARY KEY,"
+            "row_count bigint NOT NULL,"
+            "date_imported timestamptz NOT NULL DEFAULT now()"
+            ");"
+        )
         self.connection.commit()
 
+    def _get_files_to_import(self, path: str) -> List[str]:
+        self.cursor.execute(f"SELECT name FROM {IMPORTED_FILES_TABLE_NAME};")
+        imported_files = {name for name, in self.cursor.fetchall()}
+        all_files = sorted(os.listdir(path))
+        logger.info('%s of %s files are already imported', len(imported_files), len(all_files))
+        return [
+            os.path.join(str(path), _file) for _file in all_files if _file not in imported_files
+        ]
+
     def handle(self, *args, **options):
         """Do subj."""
-        self._create_table()
-
-        path = '../cloudfront-logs/cloudfront'
-        all_files = sorted(os.listdir(path))
-        self.files_total = len(all_files)
+        self._create_tables(rebuild=options['rebuild'])
+        files_to_import = self._get_files_to_import(options['path'])
+        self.connection.close()
+        self.files_total = len(files_to_import)
 
         def receiveSignal(signalNumber, frame):
             self._print_summary()
@@ -182,14 +271,15 @@ class Command(BaseCommand):
         signal.signal(signal.SIGUSR2, receiveSignal)
 
         self.start_t = time.time()
-        for _file in all_files:
+        with Pool(processes=options['processes'], initializer=_init_worker) as pool:
             try:
-                file_path = os.path.join(str(path), _file)
-                self._handle_gz(file_path)
+                for file_name, row_count in pool.imap_unordered(import_file, files_to_import):
+                    self.files_handled += 1
+                    logger.debug('Imported %s rows from %s', row_count, file_name)
             except KeyboardInterrupt:
                 self._print_summary()
-                break
             except Exception:
-                logger.exception('Stopped at %s:%s', file_path, self.line_count)
+                logger.exception('Stopped importing files')
                 self._print_summary()
                 raise
+        self._print_summary()
@@ -0,0 +1,171 @@
+"""
+Roll up CloudFront logs imported into postgresql into per-day static asset counts.
+
+Unique visitors of film assets and training sections, and downloads of their sources, are
+aggregated per day and static asset into the StaticAssetDailyCount table, and the difference
+from the previous rollup is added to StaticAsset.view_count and download_count in bulk.
+
+Only the days starting from the last rolled up one are aggregated again (see --overlap-days),
+so running this daily after `import_cloudfront_logs` only touches the newly imported logs.
+"""
+from datetime import timedelta
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+
+from films.models import Asset
+from static_assets.models import StaticAsset, Video, VideoVariation
+from stats.management.commands.import_cloudfront_logs import TABLE_NAME
+from stats.models import StaticAssetDailyCount
+from training.models import Chapter, Section, Training
+
+logger = logging.getLogger('write_stats')
+logger.setLevel(logging.DEBUG)
+ROLLUP_TABLE_NAME = StaticAssetDailyCount._meta.db_table
+NEW_COUNTS_TABLE_NAME = 'cflogs_new_daily_counts'
+
+uniq_visitor = """
+count(distinct (
+   c_ip, csuser_agent, cs_protocol, cs_protocol_version, x_forwarded_for, cscookie
+))
+"""
+common_filters = """
+and cs_method = 'GET'
+and csreferer not like '%%studio.local%%'
+and sc_status = 200
+and x_edge_response_result_type != 'Error'
+"""
+# Same filters as the ones used by count_cloudfront, but counting per day and static asset
+film_asset_views_q = f"""
+select l.date, a.static_asset_id, {uniq_visitor} as visitors, 0 as downloads
+from {TABLE_NAME} l
+join {Asset._meta.db_table} a on a.id::text = split_part(
+    split_part(split_part(l.csreferer, '.org/', 2), '?asset=', 2), '&', 1
+)
+where l.date >= %(since)s
+      and l.csreferer != 'https://cloud.blender.org/'
+      and l.csreferer like '%%?asset=%%'
+      {common_filters}
+group by l.date, a.static_asset_id
+"""
+section_views_q = f"""
+select l.date, s.static_asset_id, {uniq_visitor} as visitors, 0 as downloads
+from {TABLE_NAME} l
+join {Training._meta.db_table} t on t.slug = split_part(
+    split_part(split_part(l.csreferer, '.org/', 2), '?', 1), '/', 2
+)
+join {Chapter._meta.db_table} c on c.training_id = t.id
+join {Section._meta.db_table} s on s.chapter_id = c.id and s.slug = split_part(
+    split_part(split_part(l.csreferer, '.org/', 2), '?', 1), '/', 3
+)
+where l.date >= %(since)s
+      and s.static_asset_id is not null
+      and l.csreferer like '%%/training/%%'
+      and l.csreferer not like '%%/chapter/%%'
+      and l.csreferer not like '%%/chapters/%%'
+      and l.csreferer not like '%%/pages/%%'
+      {common_filters}
+group by l.date, s.static_asset_id
+"""
+source_downloads_q = f"""
+select d.date, sa.id, 0 as visitors, sum(d.downloads) as downloads
+from (
+    select l.date, split_part(l.cs_uri_stem, '/', 3) as source_hash, {uniq_visitor} as downloads
+    from {TABLE_NAME} l
+    where l.date >= %(since)s
+          and l.cs_uri_stem like '/__/%%/%%.%%'
+          and l.cs_uri_query like '%%Expires%%Signature%%'
+          {common_filters}
+    group by 1, 2
+) d
+join {StaticAsset._meta.db_table} sa on sa.id in (
+    select id from {StaticAsset._meta.db_table} where strpos(source, d.source_hash) > 0
+    union
+    select v.static_asset_id from {Video._meta.db_table} v
+    join {VideoVariation._meta.db_table} vv on vv.video_id = v.id
+    where strpos(vv.source, d.source_hash) > 0
+)
+where d.source_hash != ''
+group by d.date, sa.id
+"""
+new_counts_q = f"""
+drop table if exists {NEW_COUNTS_TABLE_NAME};
+create temporary table {NEW_COUNTS_TABLE_NAME} on commit drop as
+select date, static_asset_id, sum(visitors) as unique_visitors, sum(downloads) as downloads
+from (
+    {film_asset_views_q}
+    union all
+    {section_views_q}
+    union all
+    {source_downloads_q}
+) as counts (date, static_asset_id, visitors, downloads)
+group by date, static_asset_id;
+"""
+# Difference between the new counts and the previous rollup of the same days
+update_counters_q = f"""
+update {StaticAsset._meta.db_table} sa
+set view_count = sa.view_count + delta.unique_visitors,
+    download_count = sa.download_count + delta.downloads,
+    date_updated = now()
+from (
+    select static_asset_id, sum(unique_visitors) as unique_visitors, sum(downloads) as downloads
+    from (
+        select static_asset_id, unique_visitors, downloads from {NEW_COUNTS_TABLE_NAME}
+        union all
+        select static_asset_id, -unique_visitors, -downloads from {ROLLUP_TABLE_NAME}
+        where date >= %(since)s
+    ) as counts
+    group by static_asset_id
+) as delta
+where sa.id = delta.static_asset_id and (delta.unique_visitors != 0 or delta.downloads != 0);
+"""
+replace_rollup_q = f"""
+delete from {ROLLUP_TABLE_NAME} where date >= %(since)s;
+insert into {ROLLUP_TABLE_NAME} (date, static_asset_id, unique_visitors, downloads)
+select date, static_asset_id, unique_visitors, downloads from {NEW_COUNTS_TABLE_NAME};
+"""
+
+
+class Command(BaseCommand):
+    """Do subj."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--overlap-days',
+            type=int,
+            default=1,
+            help=(
+                'Also aggregate again this many days before the last rolled up one, '
+                'in case their logs were imported late (default: 1)'
+            ),
+        )
+        parser.add_argument(
+            '--skip-counters',
+            action='store_true',
+            help=(
+                'Only update the rollup, without changing view and download counters, '
+                'e.g. when the counters already include the imported logs'
+            ),
+        )
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        """Do subj."""
+        last_date = StaticAssetDailyCount.objects.aggregate(last_date=Max('date'))['last_date']
+        if last_date is None:
+            # Nothing was rolled up yet: aggregate all the logs
+            since = '-infinity'
+        else:
+            since = last_date - timedelta(days=options['overlap_days'])
+        params = {'since': since}
+        logger.info('Rolling up CloudFront logs since %s', since)
+
+        with connection.cursor() as cursor:
+            cursor.execute(new_counts_q, params)
+            logger.info('Aggregated %s daily counts', cursor.rowcount)
+            if not options['skip_counters']:
+                cursor.execute(update_counters_q, params)
+                logger.info('Updated counters of %s static assets', cursor.rowcount)
+            cursor.execute(replace_rollup_q, params)
@@ -0,0 +1,53 @@
+from django.test import SimpleTestCase
+
+from stats.management.commands.import_cloudfront_logs import LogParser, _RowsFile, _read_rows
+
+FIELDS_LINE = b'#Fields: date time c-ip sc-status cs(Referer) time-taken ssl-cipher\n'
+
+
+class LogParserTest(SimpleTestCase):
+    def setUp(self):
+        self.parser = LogParser(FIELDS_LINE)
+
+    def test_columns(self):
+        self.assertEqual(
+            self.parser.columns, ['date', 'time', 'c_ip', 'sc_status', 'csreferer', 'time_taken']
+        )
+
+    def test_parse(self):
+        line = b'2021-01-01\t10:00:00\t1.2.3.4\t200\thttps://a\\b\t0.125\tTLS_AES\n'
+
+        self.assertEqual(
+            self.parser.parse(line),
+            '2021-01-01\t10:00:00\t1.2.3.4\t200\thttps://a\\\\b\t125\n',
+        )
+
+    def test_parse_empty_values(self):
+        line = b'2021-01-01\t10:00:00\t1.2.3.4\t200\t-\t-\t-\n'
+
+        self.assertEqual(self.parser.parse(line), '2021-01-01\t10:00:00\t1.2.3.4\t200\t\\N\t\\N\n')
+
+    def test_lines_with_other_status_are_skipped(self):
+        self.assertIsNone(self.parser.parse(b'2021-01-01\t10:00:00\t1.2.3.4\t404\t-\t0.1\t-\n'))
+        self.assertIsNone(self.parser.parse(b'#Version: 1.0\n'))
+
+    def test_rows_file(self):
+        lines = [
+            b'2021-01-01\t10:00:00\t1.2.3.4\t200\t-\t0.1\t-\n',
+            b'2021-01-01\t10:00:00\t1.2.3.4\t304\t-\t0.1\t-\n',
+            b'2021-01-02\t10:00:00\t1.2.3.4\t200\t-\t0.2\t-\n',
+        ]
+        rows_file = _RowsFile(_read_rows(iter(lines), self.parser))
+
+        chunks = []
+        while True:
+            chunk = rows_file.read(10)
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+        self.assertEqual(
+            ''.join(chunks),
+            '2021-01-01\t10:00:00\t1.2.3.4\t200\t\\N\t100\n'
+            '2021-01-02\t10:00:00\t1.2.3.4\t200\t\\N\t200\n',
+        )
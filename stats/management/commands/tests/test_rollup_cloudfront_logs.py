@@ -0,0 +1,116 @@
+from io import StringIO
+from pathlib import PurePosixPath
+import datetime
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from common.tests.factories.films import AssetFactory
+from common.tests.factories.training import SectionFactory
+from stats.management.commands.import_cloudfront_logs import (
+    TABLE_NAME,
+    _cf_field_to_table,
+    field_defs,
+)
+from stats.models import StaticAssetDailyCount
+
+DAY_1 = datetime.date(2021, 11, 1)
+DAY_2 = datetime.date(2021, 11, 2)
+
+
+class RollupCloudfrontLogsCommandTest(TestCase):
+    def setUp(self):
+        fields = ','.join(
+            _cf_field_to_table(name) + ' ' + datatype for name, datatype in field_defs.items()
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE TABLE {TABLE_NAME} ({fields});')
+
+        self.asset = AssetFactory()
+        self.section = SectionFactory()
+        self.asset_url = f'https://studio.blender.org/films/f/gallery/?asset={self.asset.pk}'
+        self.section_url = (
+            'https://studio.blender.org/training/'
+            f'{self.section.chapter.training.slug}/{self.section.slug}/'
+        )
+
+    def _add_logs(self, *rows):
+        with connection.cursor() as cursor:
+            for date, c_ip, referer, uri_stem, uri_query in rows:
+                cursor.execute(
+                    f'INSERT INTO {TABLE_NAME} (date, c_ip, csuser_agent, cs_method, csreferer,'
+                    ' sc_status, x_edge_response_result_type, cs_uri_stem, cs_uri_query)'
+                    " VALUES (%s, %s, 'Firefox', 'GET', %s, 200, 'Hit', %s, %s)",
+                    [date, c_ip, referer, uri_stem, uri_query],
+                )
+
+    def _add_views(self, date, url, *c_ips):
+        self._add_logs(*((date, c_ip, url, '/', '-') for c_ip in c_ips))
+
+    def _rollup(self, *args):
+        call_command('rollup_cloudfront_logs', *args, stdout=StringIO())
+        self.asset.static_asset.refresh_from_db()
+        self.section.static_asset.refresh_from_db()
+
+    def test_unique_visitors_per_day_are_added_to_view_counts(self):
+        self._add_views(DAY_1, self.asset_url, '1.1.1.1', '1.1.1.1', '2.2.2.2')
+        self._add_views(DAY_2, self.asset_url, '1.1.1.1')
+        self._add_views(DAY_1, self.section_url, '1.1.1.1')
+
+        self._rollup()
+
+        self.assertEqual(self.asset.static_asset.view_count, 3)
+        self.assertEqual(self.section.static_asset.view_count, 1)
+        self.assertEqual(
+            list(
+                StaticAssetDailyCount.objects.filter(
+                    static_asset_id=self.asset.static_asset_id
+                ).values_list('date', 'unique_visitors')
+            ),
+            [(DAY_1, 2), (DAY_2, 1)],
+        )
+
+    def test_downloads_are_added_to_download_counts(self):
+        source_hash = PurePosixPath(self.asset.static_asset.source.name).stem
+        self._add_logs(
+            (
+                DAY_1,
+                '1.1.1.1',
+                self.asset_url,
+                f'/__/{source_hash}/file.mp4',
+                'Expires=1&Signature=2',
+            ),
+            (
+                DAY_1,
+                '2.2.2.2',
+                self.asset_url,
+                f'/__/{source_hash}/file.mp4',
+                'Expires=1&Signature=2',
+            ),
+        )
+
+        self._rollup()
+
+        self.assertEqual(self.asset.static_asset.download_count, 2)
+
+    def test_rerun_only_adds_new_logs(self):
+        self._add_views(DAY_1, self.asset_url, '1.1.1.1')
+        self._add_views(DAY_2, self.asset_url, '1.1.1.1')
+        self._rollup()
+        self.assertEqual(self.asset.static_asset.view_count, 2)
+
+        self._add_views(DAY_2, self.asset_url, '2.2.2.2')
+        self._rollup()
+        self._rollup()
+
+        self.assertEqual(self.asset.static_asset.view_count, 3)
+        self.assertEqual(StaticAssetDailyCount.objects.count(), 2)
+
+    def test_skip_counters(self):
+        self._add_views(DAY_1, self.asset_url, '1.1.1.1')
+
+        self._rollup('--skip-counters')
+
+        self.assertEqual(self.asset.static_asset.view_count, 0)
+        self.assertEqual(StaticAssetDailyCount.objects.get().unique_visitors, 1)
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('static_assets', '0011_add_static_asset_view_download_count'),
+        ('stats', '0004_staticassetcountedvisit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StaticAssetDailyCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('unique_visitors', models.PositiveIntegerField(default=0)),
+                ('downloads', models.PositiveIntegerField(default=0)),
+                ('static_asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='static_assets.staticasset')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='staticassetdailycount',
+            constraint=models.UniqueConstraint(fields=('date', 'static_asset'), name='stats_staticassetdailycount_uniq_key'),
+        ),
+    ]
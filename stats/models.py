@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models, transaction
 from django.http import HttpRequest
 
@@ -36,21 +37,27 @@ class _StaticAssetVisitMixin(models.Model):
 
     @classmethod
     def create_from_request(cls, request: HttpRequest, static_asset_id: int):
-        """Create a new record for the given StaticAsset ID based on the given request."""
+        """Record a visit of the given StaticAsset ID based on the given request.
+
+        The visit is buffered and recorded later, together with other visits,
+        unless STATS_BUFFER_VISITS is disabled.
+        """
+        from stats.visits import buffer_visit, insert_visits
+
         if static_asset_id is None:
             return
         ip_address = clean_ip_address(request) if request.user.is_anonymous else None
         user_id = request.user.pk if request.user.is_authenticated else None
-        cls.objects.bulk_create(
-            [cls(ip_address=ip_address, user_id=user_id, static_asset_id=static_asset_id)],
-            ignore_conflicts=True,
-        )
+        visit = (cls._meta.label_lower, static_asset_id, user_id, ip_address)
+        if settings.STATS_BUFFER_VISITS:
+            buffer_visit(*visit)
+        else:
+            insert_visits([visit])
 
     @classmethod
     @transaction.atomic
     def update_counters(cls, to_field: str):
         from static_assets.models import StaticAsset
-
         last_seen = StaticAssetCountedVisit.objects.filter(field=to_field).first()
         last_seen_id = last_seen.last_seen_id if last_seen else 0
         static_asset_id_count = (
@@ -123,3 +130,27 @@ class StaticAssetCountedVisit(models.Model):
         null=False, blank=False, max_length=20, choices=_Field.choices, primary_key=True
     )
     last_seen_id = models.PositiveIntegerField(null=False, blank=False)
+
+
+class StaticAssetDailyCount(models.Model):
+    """Unique visitors and downloads of a static asset per day, rolled up from CloudFront logs.
+
+    See the `rollup_cloudfront_logs` command.
+    """
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('date', 'static_asset'), name='stats_staticassetdailycount_uniq_key'
+            ),
+        ]
+
+    date = models.DateField()
+    static_asset = models.ForeignKey(
+        'static_assets.StaticAsset', null=False, on_delete=models.CASCADE
+    )
+    unique_visitors = models.PositiveIntegerField(default=0)
+    downloads = models.PositiveIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f'{self.__class__.__name__} #{self.static_asset_id} on {self.date}'
@@ -0,0 +1,20 @@
+"""Background tasks for recording stats."""
+from typing import List
+import logging
+
+from background_task import background
+
+import stats.visits
+
+log = logging.getLogger(__name__)
+
+
+@background()
+def insert_visits(visits: List[List]) -> None:
+    """Record static asset views and downloads handed over by `stats.visits.flush_buffer`.
+
+    Because of the @background decorator, each visit is a list of the model label,
+    static asset ID, user ID and IP address.
+    """
+    number_of_visits = stats.visits.insert_visits(visits)
+    log.info(f'Inserted {number_of_visits} static asset visits')
@@ -0,0 +1,104 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+
+from common.tests.factories.static_assets import StaticAssetFactory
+from common.tests.factories.users import UserFactory
+from stats.models import StaticAssetView, StaticAssetDownload
+from stats.visits import flush_buffer, insert_visits
+import stats.visits
+
+
+@override_settings(STATS_BUFFER_VISITS=True)
+@patch('stats.tasks.insert_visits')
+class TestBufferedVisits(TestCase):
+    def setUp(self):
+        stats.visits._buffer.clear()
+        self.addCleanup(stats.visits._buffer.clear)
+        self.static_asset = StaticAssetFactory()
+        self.user = UserFactory()
+
+    def _request(self, ip_address: str, user=None):
+        request = RequestFactory().get('/', REMOTE_ADDR=ip_address)
+        request.user = user or AnonymousUser()
+        return request
+
+    def _insert_handed_over_visits(self, mock_task) -> int:
+        mock_task.assert_called_once()
+        number_of_visits = insert_visits(mock_task.call_args.kwargs['visits'])
+        mock_task.reset_mock()
+        return number_of_visits
+
+    def test_visits_are_inserted_in_background(self, mock_task):
+        with self.assertNumQueries(0):
+            StaticAssetView.create_from_request(self._request('192.19.10.10'), self.static_asset.pk)
+            StaticAssetView.create_from_request(
+                self._request('192.19.10.11', user=self.user), self.static_asset.pk
+            )
+        mock_task.assert_not_called()
+
+        self.assertEqual(flush_buffer(), 2)
+
+        self.assertEqual(StaticAssetView.objects.count(), 0)
+        self.assertEqual(self._insert_handed_over_visits(mock_task), 2)
+        self.assertEqual(StaticAssetView.objects.count(), 2)
+        self.assertTrue(
+            StaticAssetView.objects.filter(ip_address='192.19.10.10', user_id=None).exists()
+        )
+        self.assertTrue(
+            StaticAssetView.objects.filter(ip_address=None, user_id=self.user.pk).exists()
+        )
+        self.assertEqual(StaticAssetDownload.objects.count(), 0)
+
+    def test_repeated_visits_are_buffered_once(self, mock_task):
+        for _ in range(3):
+            StaticAssetDownload.create_from_request(
+                self._request('192.19.10.10'), self.static_asset.pk
+            )
+        self.assertEqual(flush_buffer(), 1)
+        self._insert_handed_over_visits(mock_task)
+
+        # Already recorded visits are ignored
+        StaticAssetDownload.create_from_request(self._request('192.19.10.10'), self.static_asset.pk)
+        flush_buffer()
+        self._insert_handed_over_visits(mock_task)
+
+        self.assertEqual(StaticAssetDownload.objects.count(), 1)
+
+    @patch('stats.visits.FLUSH_SIZE', 2)
+    def test_full_buffer_is_handed_over(self, mock_task):
+        StaticAssetView.create_from_request(self._request('192.19.10.10'), self.static_asset.pk)
+        mock_task.assert_not_called()
+
+        StaticAssetView.create_from_request(self._request('192.19.10.11'), self.static_asset.pk)
+
+        self.assertEqual(self._insert_handed_over_visits(mock_task), 2)
+        self.assertEqual(flush_buffer(), 0)
+
+    def test_visits_of_deleted_static_assets_are_skipped(self, mock_task):
+        other_static_asset = StaticAssetFactory()
+        StaticAssetView.create_from_request(self._request('192.19.10.10'), self.static_asset.pk)
+        StaticAssetView.create_from_request(self._request('192.19.10.10'), other_static_asset.pk)
+        other_static_asset.delete()
+        flush_buffer()
+
+        self.assertEqual(self._insert_handed_over_visits(mock_task), 1)
+
+        self.assertEqual(
+            list(StaticAssetView.objects.values_list('static_asset_id', flat=True)),
+            [self.static_asset.pk],
+        )
+
+    def test_inserted_visits_are_counted(self, mock_task):
+        StaticAssetView.create_from_request(self._request('192.19.10.10'), self.static_asset.pk)
+        StaticAssetView.create_from_request(self._request('192.19.10.11'), self.static_asset.pk)
+        flush_buffer()
+        self._insert_handed_over_visits(mock_task)
+
+        call_command('write_stats', stdout=StringIO())
+
+        self.static_asset.refresh_from_db()
+        self.assertEqual(self.static_asset.view_count, 2)
@@ -0,0 +1,108 @@
+"""Recording of static asset views and downloads in batches.
+
+Recording a visit happens on every asset view and download, so instead of inserting
+into the visit tables, which have several indexes and unique constraints, visits are
+collected in a buffer of each process. Repeated visits of the same asset by the same user
+or IP address are kept only once. Buffered visits are handed over to a background task,
+which inserts them with one query per table, ignoring the visits which are already recorded.
+
+The buffer is handed over as soon as it holds FLUSH_SIZE visits, or once its oldest visit
+is FLUSH_INTERVAL_SECONDS old, and when the process exits.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Set, Sequence, Tuple
+import atexit
+import logging
+import threading
+import time
+
+from django.apps import apps
+
+from static_assets.models import StaticAsset
+
+log = logging.getLogger(__name__)
+
+FLUSH_INTERVAL_SECONDS = 30
+FLUSH_SIZE = 500
+
+# (model_label, static_asset_id, user_id, ip_address), e.g. ('stats.staticassetview', 1, 2, None)
+Visit = Tuple[str, int, Optional[int], Optional[str]]
+
+_lock = threading.Lock()
+_buffer: Set[Visit] = set()
+_buffer_started_at = 0.0
+
+
+def buffer_visit(
+    model_label: str, static_asset_id: int, user_id: Optional[int], ip_address: Optional[str]
+) -> None:
+    """Add a visit to the buffer of this process, handing the buffer over if it is due."""
+    global _buffer_started_at
+
+    with _lock:
+        if not _buffer:
+            _buffer_started_at = time.monotonic()
+        _buffer.add((model_label, static_asset_id, user_id, ip_address))
+        is_due = (
+            len(_buffer) >= FLUSH_SIZE
+            or time.monotonic() - _buffer_started_at >= FLUSH_INTERVAL_SECONDS
+        )
+    if is_due:
+        flush_buffer()
+
+
+def flush_buffer() -> int:
+    """Hand all buffered visits over to a background task.
+
+    Returns:
+        The number of handed over visits.
+    """
+    import stats.tasks
+
+    global _buffer
+
+    with _lock:
+        visits, _buffer = _buffer, set()
+    if not visits:
+        return 0
+    stats.tasks.insert_visits(visits=list(visits))
+    return len(visits)
+
+
+def _flush_buffer_at_exit() -> None:
+    try:
+        flush_buffer()
+    except Exception:
+        log.exception('Unable to hand over buffered static asset visits')
+
+
+atexit.register(_flush_buffer_at_exit)
+
+
+def insert_visits(visits: Iterable[Sequence]) -> int:
+    """Insert the given visits into the visit tables, ignoring already recorded ones.
+
+    Returns:
+        The number of given visits of static assets which still exist.
+    """
+    visits_by_model: Dict[str, Set[Tuple[int, Optional[int], Optional[str]]]] = defaultdict(set)
+    for model_label, static_asset_id, user_id, ip_address in visits:
+        visits_by_model[model_label].add((static_asset_id, user_id, ip_address))
+    # Static assets might have been deleted in the meantime
+    existing_static_asset_ids = set(
+        StaticAsset.objects.filter(
+            pk__in={visit[0] for model_visits in visits_by_model.values() for visit in model_visits}
+        ).values_list('pk', flat=True)
+    )
+
+    number_of_visits = 0
+    for model_label, model_visits in visits_by_model.items():
+        model = apps.get_model(model_label)
+        objs = [
+            model(static_asset_id=static_asset_id, user_id=user_id, ip_address=ip_address)
+            for static_asset_id, user_id, ip_address in model_visits
+            if static_asset_id in existing_static_asset_ids
+        ]
+        model.objects.bulk_create(objs, batch_size=FLUSH_SIZE, ignore_conflicts=True)
+        number_of_visits += len(objs)
+    return number_of_visits
@@ -61,6 +61,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'common.middleware.EntitlementsMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.contrib.redirects.middleware.RedirectFallbackMiddleware',
@@ -108,6 +109,31 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'studio.wsgi.application'
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Shared by all processes, needs a table created with `./manage.py createcachetable`.
+    # Once the cache is full, expired URLs and then a third of the rest are culled.
+    # Recently used URLs are also kept in memory of each process, see common.thumbnails.
+    'thumbnails': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'thumbnail_url_cache',
+        'TIMEOUT': 7 * 24 * 60 * 60,
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+    # Rendered markdown and shortcodes, kept apart so that they don't evict everything else
+    'rendered': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'rendered',
+        'TIMEOUT': 24 * 60 * 60,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+# Rendered markdown and shortcodes are cached by the hash of their source,
+# see common.markdown and common.shortcodes
+RENDERED_TEXT_CACHE = 'rendered'
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -373,6 +399,12 @@ THUMBNAIL_STORAGE = PUBLIC_FILE_STORAGE
 THUMBNAIL_CROP_MODE = 'center'
 THUMBNAIL_SIZE_S = '400x225'
 THUMBNAIL_SIZE_M = '1280x720'
+# Thumbnail URLs are looked up often and never change, see common.thumbnails
+THUMBNAIL_URL_CACHE = 'thumbnails'
+# Generate thumbnails in background when they are uploaded, instead of on request
+THUMBNAILS_IN_BACKGROUND = True
+# Shown until a thumbnail is generated
+THUMBNAIL_PLACEHOLDER = 'training/images/placeholders/card.jpg'
 
 CSRF_COOKIE_NAME = 'bstudiocsrftoken'
 
@@ -429,7 +461,30 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 WAFFLE_CREATE_MISSING_FLAGS = True
 WAFFLE_CREATE_MISSING_SWITCHES = True
 
+# Collect static asset views and downloads in memory and insert them in batches
+# in a background task, see stats/visits.py
+STATS_BUFFER_VISITS = True
+
+# Update section and training progress in background tasks instead of on every heartbeat
+# of the video player, see training/queries/progress.py
+BUFFER_VIDEO_PROGRESS = True
+
+# Cache subscription status of users across requests for this many seconds,
+# invalidated by subscriptions.signals. Disabled when 0.
+ENTITLEMENTS_CACHE_TIMEOUT = 0
+
+# Cache favorite trainings shown in templates for this many seconds,
+# invalidated when they are changed via training.queries. Disabled when 0.
+USER_CONTEXT_CACHE_TIMEOUT = 0
+
+# Create notifications about activity in background tasks
+NOTIFICATIONS_IN_BACKGROUND = True
+
 TESTS_IN_PROGRESS = 'test' in sys.argv
 if TESTS_IN_PROGRESS:
     STATICFILES_STORAGE = 'pipeline.storage.PipelineStorage'
     AWS_STORAGE_BUCKET_NAME = 'blender-studio-test'
+    STATS_BUFFER_VISITS = False
+    BUFFER_VIDEO_PROGRESS = False
+    NOTIFICATIONS_IN_BACKGROUND = False
+    THUMBNAILS_IN_BACKGROUND = False
@@ -12,6 +12,7 @@ from looper.models import Customer, Order
 import looper.admin_log
 import looper.signals
 
+import common.queries
 import subscriptions.models
 import subscriptions.queries as queries
 import subscriptions.tasks as tasks
@@ -62,6 +63,16 @@ def _on_subscription_status_changed(sender: looper.models.Subscription, **kwargs
     tasks.send_mail_subscription_status_changed(subscription_id=sender.pk)
 
 
+@receiver(looper.signals.subscription_activated)
+@receiver(looper.signals.subscription_deactivated)
+@receiver(looper.signals.subscription_expired)
+def _invalidate_active_subscription(sender: looper.models.Subscription, **kwargs):
+    user_ids = {sender.user_id}
+    if hasattr(sender, 'team'):
+        user_ids.update(sender.team.users.values_list('pk', flat=True))
+    common.queries.invalidate_active_subscription(user_ids)
+
+
 @receiver(looper.signals.subscription_activated)
 def _on_subscription_status_activated(sender: looper.models.Subscription, **kwargs):
     users.tasks.grant_blender_id_role(pk=sender.user_id, role='cloud_has_subscription')
@@ -173,6 +184,8 @@ def _on_team_change_grant_revoke_subscriber_badges(
     if action not in ('post_add', 'post_remove'):
         return
 
+    common.queries.invalidate_active_subscription(pk_set)
+
     # If team subscription is active, add the subscriber badge to the newly added team member
     is_team_subscription_active = instance.subscription.is_active
     for user_id in pk_set:
@@ -40,6 +40,18 @@ def _construct_subscription_mail(mail_name: str, context: Dict[str, Any]) -> Tup
     return email_body_html, email_body_txt, context['subject']
 
 
+def _send_subscription_mail(mail_name: str, context: Dict[str, Any], email: str) -> None:
+    email_body_html, email_body_txt, subject = _construct_subscription_mail(mail_name, context)
+    django.core.mail.send_mail(
+        subject,
+        message=email_body_txt,
+        html_message=email_body_html,
+        from_email=None,  # just use the configured default From-address.
+        recipient_list=[email],
+        fail_silently=False,
+    )
+
+
 @background()
 def send_mail_bank_transfer_required(subscription_id: int):
     """Send out an email notifying about the required bank transfer payment."""
@@ -72,16 +84,7 @@ def send_mail_bank_transfer_required(subscription_id: int):
     }
 
     mail_name = 'bank_transfer_required'
-    email_body_html, email_body_txt, subject = _construct_subscription_mail(mail_name, context)
-
-    django.core.mail.send_mail(
-        subject,
-        message=email_body_txt,
-        html_message=email_body_html,
-        from_email=None,  # just use the configured default From-address.
-        recipient_list=[email],
-        fail_silently=False,
-    )
+    _send_subscription_mail(mail_name, context, email)
     logger.info('Sent notification about bank transfer to %s', email)
 
 
@@ -115,16 +118,7 @@ def send_mail_subscription_status_changed(subscription_id: int):
         **get_template_context(),
     }
     mail_name = f'subscription_{verb}'
-    email_body_html, email_body_txt, subject = _construct_subscription_mail(mail_name, context)
-
-    django.core.mail.send_mail(
-        subject,
-        message=email_body_txt,
-        html_message=email_body_html,
-        from_email=None,  # just use the configured default From-address.
-        recipient_list=[email],
-        fail_silently=False,
-    )
+    _send_subscription_mail(mail_name, context, email)
     logger.info('Sent subscription-changed notification to %s', email)
 
 
@@ -161,16 +155,7 @@ def send_mail_automatic_payment_performed(order_id: int, transaction_id: int):
     }
 
     mail_name = f'payment_{order.status}'
-    email_body_html, email_body_txt, subject = _construct_subscription_mail(mail_name, context)
-
-    django.core.mail.send_mail(
-        subject,
-        message=email_body_txt,
-        html_message=email_body_html,
-        from_email=None,  # just use the configured default From-address.
-        recipient_list=[email],
-        fail_silently=False,
-    )
+    _send_subscription_mail(mail_name, context, email)
     logger.info('Sent %r notification to %s', order.status, email)
 
 
@@ -199,16 +184,7 @@ def send_mail_managed_subscription_notification(subscription_id: int):
     }
 
     mail_name = 'managed_notification'
-    email_body_html, email_body_txt, subject = _construct_subscription_mail(mail_name, context)
-
-    django.core.mail.send_mail(
-        subject,
-        message=email_body_txt,
-        html_message=email_body_html,
-        from_email=None,  # just use the configured default From-address.
-        recipient_list=[email],
-        fail_silently=False,
-    )
+    _send_subscription_mail(mail_name, context, email)
     logger.info(
         'Notified %s about managed subscription %r passing its next_payment date',
         email,
@@ -255,16 +231,7 @@ def send_mail_subscription_expired(subscription_id: int):
         **get_template_context(),
     }
     mail_name = 'subscription_expired'
-    email_body_html, email_body_txt, subject = _construct_subscription_mail(mail_name, context)
-
-    django.core.mail.send_mail(
-        subject,
-        message=email_body_txt,
-        html_message=email_body_html,
-        from_email=None,  # just use the configured default From-address.
-        recipient_list=[email],
-        fail_silently=False,
-    )
+    _send_subscription_mail(mail_name, context, email)
     logger.info('Sent subscription-expired notification to %s', email)
 
 
@@ -308,14 +275,5 @@ def send_mail_no_payment_method(order_id: int):
     }
 
     mail_name = f'payment_{order.status}'
-    email_body_html, email_body_txt, subject = _construct_subscription_mail(mail_name, context)
-
-    django.core.mail.send_mail(
-        subject,
-        message=email_body_txt,
-        html_message=email_body_html,
-        from_email=None,  # just use the configured default From-address.
-        recipient_list=[email],
-        fail_silently=False,
-    )
+    _send_subscription_mail(mail_name, context, email)
     logger.info('Sent %r notification to %s', order.status, email)
@@ -147,3 +147,22 @@ class UserSectionProgressAdmin(looper_mixins.NoChangeMixin, admin.ModelAdmin):
         'finished',
     )
     list_filter = ('started', 'finished', 'section__chapter__training')
+
+
+@admin.register(progress.UserTrainingProgress)
+class UserTrainingProgressAdmin(looper_mixins.NoChangeMixin, admin.ModelAdmin):
+    def has_add_permission(self, *args, **kwargs):
+        """Never added via the admin."""
+        return False
+
+    model = progress.UserTrainingProgress
+    list_display = (
+        looper.admin.user_link,
+        'date_last_watched',
+        'training',
+        'sections_started',
+        'sections_finished',
+        'section_count',
+        'last_section',
+    )
+    list_filter = ('training',)
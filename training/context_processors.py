@@ -1,4 +1,5 @@
-from typing import Mapping, List
+from typing import Callable, Mapping, List
+import functools
 
 from django.http.request import HttpRequest
 
@@ -14,13 +15,20 @@ def enums(request: HttpRequest) -> Mapping[str, object]:
     }
 
 
-def favorited(request: HttpRequest) -> Mapping[str, List[int]]:
-    """Inject IDs of favorite trainings into the template context."""
-    favorited_training_ids = []
-    if getattr(request, 'user', None) and request.user.is_authenticated:
-        favorited_training_ids = [
-            training.pk for training in trainings.favorited(user_pk=request.user.pk)
-        ]
+def favorited(request: HttpRequest) -> Mapping[str, Callable[[], List[int]]]:
+    """Inject IDs of favorite trainings into the template context.
+
+    Templates call callables found in the context, so the IDs are only looked up
+    when a template actually uses them, and only once per request.
+    """
+
+    @functools.lru_cache(maxsize=None)
+    def favorited_training_ids() -> List[int]:
+        user = getattr(request, 'user', None)
+        if not user or not user.is_authenticated:
+            return []
+        return trainings.favorite_training_ids(user_pk=user.pk)
+
     return {
         'favorited_training_ids': favorited_training_ids,
     }
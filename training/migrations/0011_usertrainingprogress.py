@@ -0,0 +1,113 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# A copy of training.queries.progress.update_all_training_progress as it was when this
+# migration was written, so that later changes to it don't change this migration
+update_all_training_progress_sql = '''
+WITH pairs AS (
+    SELECT usp.user_id, c.training_id
+    FROM training_usersectionprogress usp
+             JOIN training_section s ON s.id = usp.section_id
+             JOIN training_chapter c ON c.id = s.chapter_id
+    UNION
+    SELECT uvp.user_id, c.training_id
+    FROM static_assets_uservideoprogress uvp
+             JOIN static_assets_video v ON v.id = uvp.video_id
+             JOIN training_section s ON s.static_asset_id = v.static_asset_id
+             JOIN training_chapter c ON c.id = s.chapter_id
+),
+section_counts AS (
+    SELECT c.training_id, count(*) AS section_count
+    FROM training_chapter c
+             JOIN training_section s ON s.chapter_id = c.id
+    WHERE c.training_id IN (SELECT training_id FROM pairs)
+    GROUP BY c.training_id
+),
+section_progress AS (
+    SELECT p.user_id,
+           p.training_id,
+           s.id AS section_id,
+           coalesce(usp.started, false) AS started,
+           coalesce(usp.finished, false) AS finished,
+           uvp.position,
+           coalesce(uvp.date_updated, usp.date_updated) AS date_updated
+    FROM pairs p
+             JOIN training_chapter c ON c.training_id = p.training_id
+             JOIN training_section s ON s.chapter_id = c.id
+             LEFT JOIN training_usersectionprogress usp
+                  ON usp.section_id = s.id AND usp.user_id = p.user_id
+             LEFT JOIN static_assets_video v ON v.static_asset_id = s.static_asset_id
+             LEFT JOIN static_assets_uservideoprogress uvp
+                  ON uvp.video_id = v.id AND uvp.user_id = p.user_id
+    WHERE usp.id IS NOT NULL
+       OR uvp.id IS NOT NULL
+)
+INSERT INTO training_usertrainingprogress
+(user_id, training_id, section_count, sections_started, sections_finished,
+ section_progress, last_section_id, last_position, date_last_watched,
+ date_created, date_updated)
+SELECT p.user_id,
+       p.training_id,
+       coalesce(sc.section_count, 0),
+       count(sp.section_id) FILTER (WHERE sp.started),
+       count(sp.section_id) FILTER (WHERE sp.finished),
+       coalesce(
+           jsonb_object_agg(
+               sp.section_id,
+               jsonb_build_object(
+                   'started', sp.started,
+                   'finished', sp.finished,
+                   'position', extract(EPOCH FROM sp.position)
+               )
+           ) FILTER (WHERE sp.section_id IS NOT NULL),
+           '{}'::jsonb
+       ),
+       (array_agg(sp.section_id ORDER BY sp.date_updated DESC)
+           FILTER (WHERE sp.started AND NOT sp.finished))[1],
+       (array_agg(sp.position ORDER BY sp.date_updated DESC)
+           FILTER (WHERE sp.started AND NOT sp.finished))[1],
+       max(sp.date_updated),
+       now(),
+       now()
+FROM pairs p
+         LEFT JOIN section_counts sc ON sc.training_id = p.training_id
+         LEFT JOIN section_progress sp
+              ON sp.user_id = p.user_id AND sp.training_id = p.training_id
+GROUP BY p.user_id, p.training_id, sc.section_count
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('static_assets', '0011_add_static_asset_view_download_count'),
+        ('training', '0010_update_help_text_replace_float_classes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTrainingProgress',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_updated', models.DateTimeField(auto_now=True)),
+                ('section_count', models.PositiveIntegerField(default=0, editable=False)),
+                ('sections_started', models.PositiveIntegerField(default=0, editable=False)),
+                ('sections_finished', models.PositiveIntegerField(default=0, editable=False)),
+                ('section_progress', models.JSONField(default=dict, editable=False)),
+                ('last_position', models.DurationField(editable=False, null=True)),
+                ('date_last_watched', models.DateTimeField(editable=False, null=True)),
+                ('last_section', models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='training.section')),
+                ('training', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_progress', to='training.training')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='training_progress', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='usertrainingprogress',
+            constraint=models.UniqueConstraint(fields=('user', 'training'), name='unique_progress_per_user_and_training'),
+        ),
+        migrations.RunSQL(update_all_training_progress_sql, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('training', '0011_usertrainingprogress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='training',
+            name='thumbnail_urls',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
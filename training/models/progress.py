@@ -4,7 +4,7 @@ from django.contrib.auth import get_user_model
 from django.db import models
 
 from common import mixins
-from training.models import sections
+from training.models import sections, trainings
 
 User = get_user_model()
 
@@ -31,3 +31,49 @@ class UserSectionProgress(mixins.CreatedUpdatedMixin, models.Model):
             f'Progress of {self.user.username} ({self.user.id})'
             f' on Section {self.section.name} ({self.section.id})'
         )
+
+
+class UserTrainingProgress(mixins.CreatedUpdatedMixin, models.Model):
+    """Summary of a user's progress through a training.
+
+    Kept up to date from UserSectionProgress and UserVideoProgress whenever they are written,
+    see `training.queries.progress.update_training_progress`.
+    """
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'training'], name='unique_progress_per_user_and_training'
+            )
+        ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='training_progress')
+    training = models.ForeignKey(
+        trainings.Training, on_delete=models.CASCADE, related_name='user_progress'
+    )
+
+    section_count = models.PositiveIntegerField(default=0, editable=False)
+    sections_started = models.PositiveIntegerField(default=0, editable=False)
+    sections_finished = models.PositiveIntegerField(default=0, editable=False)
+    # Progress per section ID: {"started": bool, "finished": bool, "position": seconds or null}
+    section_progress = models.JSONField(default=dict, editable=False)
+
+    # The section which was watched last and is not finished yet
+    last_section = models.ForeignKey(
+        sections.Section, null=True, on_delete=models.SET_NULL, related_name='+', editable=False
+    )
+    last_position = models.DurationField(null=True, editable=False)
+    date_last_watched = models.DateTimeField(null=True, editable=False)
+
+    def __str__(self) -> str:
+        return (
+            f'Progress of {self.user.username} ({self.user.id})'
+            f' on Training {self.training.name} ({self.training.id})'
+        )
+
+    @property
+    def fraction_finished(self) -> float:
+        """Fraction of the training's sections which are finished."""
+        if not self.section_count:
+            return 0
+        return self.sections_finished / self.section_count
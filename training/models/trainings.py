@@ -22,7 +22,7 @@ class TrainingDifficulty(models.TextChoices):
     advanced = 'advanced', 'Advanced'
 
 
-class Training(mixins.CreatedUpdatedMixin, mixins.StaticThumbnailURLMixin, models.Model):
+class Training(mixins.CreatedUpdatedMixin, mixins.GeneratedThumbnailURLMixin, models.Model):
     class Meta:
         ordering = ['-date_created']
 
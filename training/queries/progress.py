@@ -1,22 +1,354 @@
 import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-from training.models import progress
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from training.models import progress, sections
 import static_assets.models as models_static_assets
 
+User = get_user_model()
+
+# The cache is per process, so changes made by other processes are only seen once it expires
+VIDEO_SECTION_CACHE_TIMEOUT = 60 * 5
+# Section and training progress of a video being watched is updated at most this often
+PROGRESS_UPDATE_DELAY_SECONDS = 10
+
 
 def set_video_progress(*, user_pk: int, video_pk: int, position: datetime.timedelta) -> None:
     models_static_assets.UserVideoProgress.objects.update_or_create(
         user_id=user_pk, video_id=video_pk, defaults={'position': position}
     )
+    update_training_progress_of_videos([(user_pk, video_pk)])
 
 
 def set_section_progress_started(*, user_pk: int, section_pk: int) -> None:
     progress.UserSectionProgress.objects.update_or_create(
         user_id=user_pk, section_id=section_pk, defaults={'started': True}
     )
+    update_training_progress_of_sections([(user_pk, section_pk)])
 
 
 def set_section_progress_finished(*, user_pk: int, section_pk: int) -> None:
     progress.UserSectionProgress.objects.update_or_create(
         user_id=user_pk, section_id=section_pk, defaults={'started': True, 'finished': True}
     )
+    update_training_progress_of_sections([(user_pk, section_pk)])
+
+
+def _update_training_progress(pairs_query: str, params: List[Any]) -> None:
+    """Recompute UserTrainingProgress of (user_id, training_id) pairs selected by a query.
+
+    Only the given pairs are recomputed, from section and video progress of their users,
+    so this is cheap enough to do every time progress is written.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            WITH pairs AS ({pairs_query}),
+            section_counts AS (
+                SELECT c.training_id, count(*) AS section_count
+                FROM training_chapter c
+                         JOIN training_section s ON s.chapter_id = c.id
+                WHERE c.training_id IN (SELECT training_id FROM pairs)
+                GROUP BY c.training_id
+            ),
+            section_progress AS (
+                SELECT p.user_id,
+                       p.training_id,
+                       s.id AS section_id,
+                       coalesce(usp.started, false) AS started,
+                       coalesce(usp.finished, false) AS finished,
+                       uvp.position,
+                       coalesce(uvp.date_updated, usp.date_updated) AS date_updated
+                FROM pairs p
+                         JOIN training_chapter c ON c.training_id = p.training_id
+                         JOIN training_section s ON s.chapter_id = c.id
+                         LEFT JOIN training_usersectionprogress usp
+                              ON usp.section_id = s.id AND usp.user_id = p.user_id
+                         LEFT JOIN static_assets_video v ON v.static_asset_id = s.static_asset_id
+                         LEFT JOIN static_assets_uservideoprogress uvp
+                              ON uvp.video_id = v.id AND uvp.user_id = p.user_id
+                WHERE usp.id IS NOT NULL
+                   OR uvp.id IS NOT NULL
+            )
+            INSERT INTO training_usertrainingprogress AS t
+            (user_id, training_id, section_count, sections_started, sections_finished,
+             section_progress, last_section_id, last_position, date_last_watched,
+             date_created, date_updated)
+            SELECT p.user_id,
+                   p.training_id,
+                   coalesce(sc.section_count, 0),
+                   count(sp.section_id) FILTER (WHERE sp.started),
+                   count(sp.section_id) FILTER (WHERE sp.finished),
+                   coalesce(
+                       jsonb_object_agg(
+                           sp.section_id,
+                           jsonb_build_object(
+                               'started', sp.started,
+                               'finished', sp.finished,
+                               'position', extract(EPOCH FROM sp.position)
+                           )
+                       ) FILTER (WHERE sp.section_id IS NOT NULL),
+                       '{{}}'::jsonb
+                   ),
+                   (array_agg(sp.section_id ORDER BY sp.date_updated DESC)
+                       FILTER (WHERE sp.started AND NOT sp.finished))[1],
+                   (array_agg(sp.position ORDER BY sp.date_updated DESC)
+                       FILTER (WHERE sp.started AND NOT sp.finished))[1],
+                   max(sp.date_updated),
+                   now(),
+                   now()
+            FROM pairs p
+                     LEFT JOIN section_counts sc ON sc.training_id = p.training_id
+                     LEFT JOIN section_progress sp
+                          ON sp.user_id = p.user_id AND sp.training_id = p.training_id
+            GROUP BY p.user_id, p.training_id, sc.section_count
+            ON CONFLICT (user_id, training_id) DO UPDATE
+            SET section_count = EXCLUDED.section_count,
+                sections_started = EXCLUDED.sections_started,
+                sections_finished = EXCLUDED.sections_finished,
+                section_progress = EXCLUDED.section_progress,
+                last_section_id = EXCLUDED.last_section_id,
+                last_position = EXCLUDED.last_position,
+                date_last_watched = EXCLUDED.date_last_watched,
+                date_updated = EXCLUDED.date_updated
+            ''',
+            params,
+        )
+
+
+def update_training_progress_of_sections(user_section_pks: Iterable[Tuple[int, int]]) -> None:
+    """Recompute training progress of users after their progress in given sections changed."""
+    user_section_pks = list(user_section_pks)
+    _update_training_progress(
+        f'''
+        SELECT DISTINCT p.user_id, c.training_id
+        FROM unnest(%s::integer[], %s::integer[]) AS p(user_id, section_id)
+                 JOIN {User._meta.db_table} u ON u.id = p.user_id
+                 JOIN training_section s ON s.id = p.section_id
+                 JOIN training_chapter c ON c.id = s.chapter_id
+        ''',
+        [[pks[0] for pks in user_section_pks], [pks[1] for pks in user_section_pks]],
+    )
+
+
+def update_training_progress_of_videos(user_video_pks: Iterable[Tuple[int, int]]) -> None:
+    """Recompute training progress of users after their progress in given videos changed."""
+    user_video_pks = list(user_video_pks)
+    _update_training_progress(
+        f'''
+        SELECT DISTINCT p.user_id, c.training_id
+        FROM unnest(%s::integer[], %s::integer[]) AS p(user_id, video_id)
+                 JOIN {User._meta.db_table} u ON u.id = p.user_id
+                 JOIN static_assets_video v ON v.id = p.video_id
+                 JOIN training_section s ON s.static_asset_id = v.static_asset_id
+                 JOIN training_chapter c ON c.id = s.chapter_id
+        ''',
+        [[pks[0] for pks in user_video_pks], [pks[1] for pks in user_video_pks]],
+    )
+
+
+def update_training_progress_of_training(training_pk: int) -> None:
+    """Recompute progress of all users in a training, e.g. after its sections changed."""
+    _update_training_progress(
+        '''
+        SELECT user_id, training_id
+        FROM training_usertrainingprogress
+        WHERE training_id = %s
+        ''',
+        [training_pk],
+    )
+
+
+def update_training_progress_of_section(section_pk: int) -> None:
+    """Recompute training progress of all users who made progress in a section.
+
+    Needed when the section is moved to another chapter, possibly of another training.
+    """
+    _update_training_progress(
+        '''
+        SELECT usp.user_id, c.training_id
+        FROM training_usersectionprogress usp
+                 JOIN training_section s ON s.id = usp.section_id
+                 JOIN training_chapter c ON c.id = s.chapter_id
+        WHERE s.id = %s
+        UNION
+        SELECT uvp.user_id, c.training_id
+        FROM static_assets_uservideoprogress uvp
+                 JOIN static_assets_video v ON v.id = uvp.video_id
+                 JOIN training_section s ON s.static_asset_id = v.static_asset_id
+                 JOIN training_chapter c ON c.id = s.chapter_id
+        WHERE s.id = %s
+        ''',
+        [section_pk, section_pk],
+    )
+
+
+def update_all_training_progress() -> None:
+    """Recompute progress of all users in all trainings they have started."""
+    _update_training_progress(
+        '''
+        SELECT usp.user_id, c.training_id
+        FROM training_usersectionprogress usp
+                 JOIN training_section s ON s.id = usp.section_id
+                 JOIN training_chapter c ON c.id = s.chapter_id
+        UNION
+        SELECT uvp.user_id, c.training_id
+        FROM static_assets_uservideoprogress uvp
+                 JOIN static_assets_video v ON v.id = uvp.video_id
+                 JOIN training_section s ON s.static_asset_id = v.static_asset_id
+                 JOIN training_chapter c ON c.id = s.chapter_id
+        ''',
+        [],
+    )
+
+
+def _write_video_progress(positions: Dict[Tuple[int, int], datetime.timedelta]) -> int:
+    """Insert or update video progress of many users at once.
+
+    Progress of users or videos that no longer exist is skipped.
+
+    Returns:
+        The number of written rows.
+    """
+    keys = list(positions.keys())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            INSERT INTO {models_static_assets.UserVideoProgress._meta.db_table}
+            (user_id, video_id, position, date_created, date_updated)
+            SELECT p.user_id, p.video_id, p.position, now(), now()
+            FROM unnest(%s::integer[], %s::integer[], %s::interval[])
+                AS p(user_id, video_id, position)
+            JOIN {User._meta.db_table} u ON u.id = p.user_id
+            JOIN {models_static_assets.Video._meta.db_table} v ON v.id = p.video_id
+            ON CONFLICT (user_id, video_id) DO UPDATE
+            SET position = EXCLUDED.position, date_updated = EXCLUDED.date_updated
+            ''',
+            [[k[0] for k in keys], [k[1] for k in keys], [positions[k] for k in keys]],
+        )
+        return cursor.rowcount
+
+
+def _write_section_progress(finished: Dict[Tuple[int, int], bool]) -> None:
+    """Mark sections as started, and finished if so, for many users at once.
+
+    Sections are never marked as not finished, same as in `set_section_progress_started`.
+    """
+    keys = list(finished.keys())
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            INSERT INTO {progress.UserSectionProgress._meta.db_table} AS t
+            (user_id, section_id, started, finished, date_created, date_updated)
+            SELECT p.user_id, p.section_id, true, p.finished, now(), now()
+            FROM unnest(%s::integer[], %s::integer[], %s::boolean[])
+                AS p(user_id, section_id, finished)
+            JOIN {User._meta.db_table} u ON u.id = p.user_id
+            JOIN {sections.Section._meta.db_table} s ON s.id = p.section_id
+            ON CONFLICT (user_id, section_id) DO UPDATE
+            SET started = true,
+                finished = t.finished OR EXCLUDED.finished,
+                date_updated = EXCLUDED.date_updated
+            ''',
+            [[k[0] for k in keys], [k[1] for k in keys], [finished[k] for k in keys]],
+        )
+        update_training_progress_of_sections(keys)
+
+
+def update_section_progress_of_video(*, user_pk: int, video_pk: int, is_finished: bool) -> None:
+    """Mark the section showing a video as started, and finished if so, for a user.
+
+    Training progress of the user is recomputed as well.
+    """
+    section_pk = (
+        models_static_assets.Video.objects.filter(pk=video_pk)
+        .values_list('static_asset__section__id', flat=True)
+        .first()
+    )
+    if section_pk:
+        _write_section_progress({(user_pk, section_pk): is_finished})
+
+
+def _video_section_cache_key(video_pk: int) -> str:
+    return f'video_section:{video_pk}'
+
+
+def get_video_section(
+    video_pk: int,
+) -> Optional[Tuple[Optional[int], datetime.timedelta]]:
+    """Return ID of the training section showing the given video, and the video's duration.
+
+    Returns None if the video does not exist. The result is cached,
+    see `invalidate_video_section`.
+    """
+    cache_key = _video_section_cache_key(video_pk)
+    video_section = cache.get(cache_key)
+    if video_section is None:
+        video = (
+            models_static_assets.Video.objects.filter(pk=video_pk)
+            .values('duration', 'static_asset__section__id')
+            .first()
+        )
+        if video is None:
+            return None
+        video_section = (video['static_asset__section__id'], video['duration'])
+        cache.set(cache_key, video_section, VIDEO_SECTION_CACHE_TIMEOUT)
+    return video_section
+
+
+def invalidate_video_section(video_pks: Iterable[int]) -> None:
+    """Forget cached section and duration of the given videos."""
+    cache.delete_many([_video_section_cache_key(video_pk) for video_pk in video_pks])
+
+
+def _schedule_progress_update(user_pk: int, video_pk: int, is_finished: bool) -> None:
+    """Schedule updating section and training progress of a video being watched.
+
+    At most one update is scheduled per video and user in each period of
+    PROGRESS_UPDATE_DELAY_SECONDS, and is applied at the end of it, after the latest position
+    recorded during this period.
+    """
+    import training.tasks
+
+    lock_key = f'video_progress_update_scheduled:{user_pk}:{video_pk}:{is_finished}'
+    if not cache.add(lock_key, True, PROGRESS_UPDATE_DELAY_SECONDS):
+        return
+    transaction.on_commit(
+        lambda: training.tasks.update_section_progress_of_video(
+            user_pk=user_pk,
+            video_pk=video_pk,
+            is_finished=is_finished,
+            schedule=PROGRESS_UPDATE_DELAY_SECONDS,
+        )
+    )
+
+
+def record_video_progress(*, user_pk: int, video_pk: int, position: datetime.timedelta) -> bool:
+    """Record the position of a video being watched, and progress of its section, if any.
+
+    The position is written right away, with a single query. Section and training progress
+    are updated in a background task, unless BUFFER_VIDEO_PROGRESS is disabled.
+
+    Returns False if the video does not exist.
+    """
+    video_section = get_video_section(video_pk)
+    if video_section is None:
+        return False
+    if not _write_video_progress({(user_pk, video_pk): position}):
+        return False
+
+    section_pk, duration = video_section
+    if section_pk:
+        completion_fraction = models_static_assets.UserVideoProgress.section_completion_fraction
+        is_finished = bool(duration) and position / duration > completion_fraction
+        if settings.BUFFER_VIDEO_PROGRESS:
+            _schedule_progress_update(user_pk, video_pk, is_finished)
+        else:
+            update_section_progress_of_video(
+                user_pk=user_pk, video_pk=video_pk, is_finished=is_finished
+            )
+    return True
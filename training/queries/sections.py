@@ -4,45 +4,33 @@ from typing import List, Optional, Tuple, cast
 
 from django.db.models import Exists, OuterRef
 
-from comments import models
-from comments.queries import get_annotated_comments
-from training.models import chapters, sections, trainings
+from comments.queries import CommentsPage, get_annotated_comments_page
+from training.models import chapters, progress, sections, trainings
 import static_assets.models as models_static_assets
 
 
-def recently_watched(*, user_pk: int) -> List[sections.Section]:  # noqa: D103
-    return list(
-        sections.Section.objects.raw(
-            '''
-            SELECT *
-            FROM (SELECT s.*,
-                         c.index AS chapter_index,
-                         c.name AS chapter_name,
-                         t.name AS training_name,
-                         uvp.position AS video_position,
-                         v.duration AS video_duration,
-                         row_number()
-                         OVER (
-                            PARTITION BY t.id ORDER BY coalesce(uvp.date_updated, usp.date_updated)
-                         DESC
-                         ) AS row_number_per_training
-                  FROM training_usersectionprogress usp
-                           LEFT JOIN training_section s ON usp.section_id = s.id
-                           LEFT JOIN training_chapter c ON s.chapter_id = c.id
-                           LEFT JOIN training_training t ON c.training_id = t.id
-                           LEFT JOIN static_assets_staticasset sa ON s.static_asset_id = sa.id
-                           LEFT JOIN static_assets_video v ON sa.id = v.static_asset_id
-                           LEFT JOIN static_assets_uservideoprogress uvp
-                                ON v.id = uvp.video_id AND usp.user_id = uvp.user_id
-                  WHERE usp.user_id = %s
-                    AND usp.started
-                    AND NOT usp.finished
-                  ORDER BY coalesce(uvp.date_updated, usp.date_updated) DESC) progress
-            WHERE progress.row_number_per_training = 1;
-            ''',
-            [user_pk],
-        )
+def recently_watched(*, user_pk: int) -> List[sections.Section]:
+    """Return the last watched, not yet finished, section of each training the user started."""
+    training_progress_list = (
+        progress.UserTrainingProgress.objects.filter(user_id=user_pk, last_section__isnull=False)
+        .select_related('last_section__chapter__training', 'last_section__static_asset__video')
+        .order_by('-date_last_watched')
     )
+    section_list = []
+    for training_progress in training_progress_list:
+        section = training_progress.last_section
+        chapter = section.chapter
+        try:
+            video_duration = section.static_asset.video.duration if section.static_asset else None
+        except models_static_assets.Video.DoesNotExist:
+            video_duration = None
+        setattr(section, 'chapter_index', chapter.index)
+        setattr(section, 'chapter_name', chapter.name)
+        setattr(section, 'training_name', chapter.training.name)
+        setattr(section, 'video_position', training_progress.last_position)
+        setattr(section, 'video_duration', video_duration)
+        section_list.append(section)
+    return section_list
 
 
 def from_slug(  # noqa: D103
@@ -54,7 +42,7 @@ def from_slug(  # noqa: D103
         chapters.Chapter,
         sections.Section,
         Optional[Tuple[models_static_assets.Video, Optional[datetime.timedelta]]],
-        List[models.Comment],
+        CommentsPage,
     ]
 ]:
     try:
@@ -67,8 +55,9 @@ def from_slug(  # noqa: D103
                     )
                 )
             )
-            .select_related('chapter__training', 'chapter')
-            .prefetch_related('static_asset', 'comments', 'comments__user')
+            .select_related('chapter__training', 'chapter', 'static_asset__video')
+            # Video variations are shown in the download button, e.g. its size
+            .prefetch_related('static_asset__video__variations', 'comments', 'comments__user')
             .get(chapter__training__slug=training_slug, slug=section_slug)
         )
     except sections.Section.DoesNotExist:
@@ -85,5 +74,5 @@ def from_slug(  # noqa: D103
     chapter = section.chapter
     training = chapter.training
     training_favorited = cast(bool, getattr(section, 'training_favorited'))
-    comments = get_annotated_comments(section, user_pk)
+    comments = get_annotated_comments_page(section, user_pk)
     return training, training_favorited, chapter, section, video, comments
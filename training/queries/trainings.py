@@ -1,5 +1,8 @@
-from typing import List, Optional, Tuple, cast
+from typing import Any, Dict, List, Optional, Tuple, cast
+import datetime
 
+from django.conf import settings
+from django.core.cache import cache
 from django.db.models import Exists, OuterRef, Subquery
 
 from training.models import chapters, progress, sections, trainings
@@ -8,10 +11,9 @@ import static_assets.models as models_static_assets
 
 def set_favorite(*, training_pk: int, user_pk: int, favorite: bool) -> None:
     if favorite:
-        trainings.Favorite.objects.filter(
-            training__is_published=True
-        ).update_or_create(
-            training_id=training_pk, user_id=user_pk,
+        trainings.Favorite.objects.filter(training__is_published=True).update_or_create(
+            training_id=training_pk,
+            user_id=user_pk,
         )
     else:
         trainings.Favorite.objects.filter(
@@ -19,6 +21,32 @@ def set_favorite(*, training_pk: int, user_pk: int, favorite: bool) -> None:
             training_id=training_pk,
             user_id=user_pk,
         ).delete()
+    cache.delete(_get_favorite_training_ids_cache_key(user_pk))
+
+
+def _get_favorite_training_ids_cache_key(user_pk: int) -> str:
+    return f'favorite_training_ids:{user_pk}'
+
+
+def favorite_training_ids(*, user_pk: int) -> List[int]:
+    """Return IDs of trainings favorited by the given user.
+
+    If USER_CONTEXT_CACHE_TIMEOUT is set, the IDs are cached until it expires
+    or they are changed by `set_favorite`.
+    """
+    cache_timeout = settings.USER_CONTEXT_CACHE_TIMEOUT
+    cache_key = _get_favorite_training_ids_cache_key(user_pk)
+    if cache_timeout:
+        training_ids = cache.get(cache_key)
+        if training_ids is not None:
+            return training_ids
+
+    training_ids = list(
+        trainings.Favorite.objects.filter(user_id=user_pk).values_list('training_id', flat=True)
+    )
+    if cache_timeout:
+        cache.set(cache_key, training_ids, cache_timeout)
+    return training_ids
 
 
 def from_slug(
@@ -62,33 +90,75 @@ def all(user_pk: Optional[int], **filters) -> List[trainings.Training]:
 def navigation(
     *, user_pk: int, training_pk: int, **filters
 ) -> Tuple[trainings.Training, List[chapters.Chapter], List[sections.Section]]:
-    return (
-        trainings.Training.objects.filter(**filters).get(id=training_pk),
-        list(chapters.Chapter.objects.filter(training_id=training_pk).all()),
-        list(
-            sections.Section.objects.annotate(
-                started=Exists(
-                    progress.UserSectionProgress.objects.filter(
-                        user_id=user_pk, section_id=OuterRef('pk'), started=True
-                    )
-                ),
-                finished=Exists(
-                    progress.UserSectionProgress.objects.filter(
-                        user_id=user_pk, section_id=OuterRef('pk'), finished=True
-                    )
-                ),
-                video_position=Subquery(
-                    models_static_assets.UserVideoProgress.objects.filter(
-                        user_id=user_pk, video__static_asset__section=OuterRef('pk')
-                    ).values('position')
-                ),
-                video_duration=Subquery(
-                    models_static_assets.Video.objects.filter(
-                        static_asset__section=OuterRef('pk')
-                    ).values('duration')
-                ),
-            )
-            .filter(chapter__training_id=training_pk)
-            .all()
-        ),
+    training = trainings.Training.objects.filter(**filters).get(id=training_pk)
+    chapter_list = list(chapters.Chapter.objects.filter(training_id=training_pk).all())
+    section_list = list(
+        sections.Section.objects.annotate(
+            video_duration=Subquery(
+                models_static_assets.Video.objects.filter(
+                    static_asset__section=OuterRef('pk')
+                ).values('duration')
+            ),
+            video_id=Subquery(
+                models_static_assets.Video.objects.filter(
+                    static_asset__section=OuterRef('pk')
+                ).values('pk')
+            ),
+        )
+        .filter(chapter__training_id=training_pk)
+        .all()
     )
+    _apply_training_progress(user_pk, training_pk, section_list)
+    _apply_recorded_video_progress(user_pk, section_list)
+    return training, chapter_list, section_list
+
+
+def _apply_training_progress(
+    user_pk: Optional[int], training_pk: int, section_list: List[sections.Section]
+) -> None:
+    """Update sections with progress from the user's summary of the training."""
+    section_progress: Dict[str, Dict[str, Any]] = {}
+    if user_pk is not None:
+        section_progress = (
+            progress.UserTrainingProgress.objects.filter(user_id=user_pk, training_id=training_pk)
+            .values_list('section_progress', flat=True)
+            .first()
+        ) or {}
+    for section in section_list:
+        this_section_progress = section_progress.get(str(section.pk), {})
+        position = this_section_progress.get('position')
+        setattr(section, 'started', this_section_progress.get('started', False))
+        setattr(section, 'finished', this_section_progress.get('finished', False))
+        setattr(
+            section,
+            'video_position',
+            None if position is None else datetime.timedelta(seconds=position),
+        )
+
+
+def _apply_recorded_video_progress(
+    user_pk: Optional[int], section_list: List[sections.Section]
+) -> None:
+    """Update sections with the latest video progress.
+
+    Video positions are written right away, while the user's summary of the training
+    is updated a bit later, see `training.queries.progress.record_video_progress`.
+    """
+    if user_pk is None:
+        return
+    video_sections = {
+        getattr(section, 'video_id'): section
+        for section in section_list
+        if getattr(section, 'video_id')
+    }
+    positions = models_static_assets.UserVideoProgress.objects.filter(
+        user_id=user_pk, video_id__in=video_sections.keys()
+    ).values_list('video_id', 'position')
+    completion_fraction = models_static_assets.UserVideoProgress.section_completion_fraction
+    for video_pk, position in positions:
+        section = video_sections[video_pk]
+        duration = getattr(section, 'video_duration')
+        setattr(section, 'video_position', position)
+        setattr(section, 'started', True)
+        if duration and position / duration > completion_fraction:
+            setattr(section, 'finished', True)
@@ -1,9 +1,17 @@
 import logging
+from typing import Optional
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
-from training.models.sections import SectionComment
+from static_assets.models import Video
+from training.models.chapters import Chapter
+from training.models.sections import Section, SectionComment
+from training.queries.progress import (
+    invalidate_video_section,
+    update_training_progress_of_section,
+    update_training_progress_of_training,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -22,3 +30,75 @@ def notify_about_comment(
         return
 
     instance.comment.create_action()
+
+
+@receiver(pre_save, sender=Section)
+@receiver(post_save, sender=Section)
+@receiver(post_delete, sender=Section)
+def invalidate_section_video(sender: object, instance: Section, **kwargs: object) -> None:
+    """Forget which section shows a video, before and after the section changes its video."""
+    if not instance.pk:
+        return
+    invalidate_video_section(
+        Video.objects.filter(static_asset__section=instance).values_list('pk', flat=True)
+    )
+    if instance.static_asset_id:
+        invalidate_video_section(
+            Video.objects.filter(static_asset_id=instance.static_asset_id).values_list(
+                'pk', flat=True
+            )
+        )
+
+
+@receiver(post_save, sender=Video)
+def invalidate_video_duration(sender: object, instance: Video, **kwargs: object) -> None:
+    """Forget cached duration of a video."""
+    invalidate_video_section([instance.pk])
+
+
+def _get_training_pk(chapter_pk: int) -> Optional[int]:
+    return Chapter.objects.filter(pk=chapter_pk).values_list('training_id', flat=True).first()
+
+
+def _update_training_progress_of_section(section: Section) -> None:
+    training_pk = _get_training_pk(section.chapter_id)
+    if training_pk is not None:
+        update_training_progress_of_training(training_pk)
+
+
+@receiver(pre_save, sender=Section)
+def remember_previous_chapter(sender: object, instance: Section, **kwargs: object) -> None:
+    """Remember which chapter the section was in, to tell if it was moved to another one."""
+    instance._previous_chapter_id = (
+        Section.objects.filter(pk=instance.pk).values_list('chapter_id', flat=True).first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Section)
+def update_training_progress_on_section_added(
+    sender: object, instance: Section, created: bool, **kwargs: object
+) -> None:
+    """Recompute progress of users in a training after a section is added or moved to it."""
+    if created:
+        _update_training_progress_of_section(instance)
+        return
+
+    previous_chapter_id = getattr(instance, '_previous_chapter_id', None)
+    if previous_chapter_id is None or previous_chapter_id == instance.chapter_id:
+        return
+    previous_training_pk = _get_training_pk(previous_chapter_id)
+    training_pk = _get_training_pk(instance.chapter_id)
+    # Users who made progress in this section now have progress in the training it moved to
+    update_training_progress_of_section(instance.pk)
+    for pk in {previous_training_pk, training_pk} - {None}:
+        update_training_progress_of_training(pk)
+
+
+@receiver(post_delete, sender=Section)
+def update_training_progress_on_section_deleted(
+    sender: object, instance: Section, **kwargs: object
+) -> None:
+    """Recompute progress of users in a training after one of its sections is deleted."""
+    _update_training_progress_of_section(instance)
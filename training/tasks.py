@@ -0,0 +1,13 @@
+"""Background tasks for training progress."""
+
+from background_task import background
+
+import training.queries.progress
+
+
+@background()
+def update_section_progress_of_video(user_pk: int, video_pk: int, is_finished: bool) -> None:
+    """Update section and training progress of a user watching a video."""
+    training.queries.progress.update_section_progress_of_video(
+        user_pk=user_pk, video_pk=video_pk, is_finished=is_finished
+    )
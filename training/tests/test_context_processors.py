@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
-from django.test import RequestFactory, TestCase
+from django.core.cache import cache
+from django.template import engines
+from django.test import RequestFactory, TestCase, override_settings
 
 from common.tests.factories.training import TrainingFactory
 from training import context_processors
@@ -13,6 +15,7 @@ User = get_user_model()
 class ContextProcessorsTest(TestCase):
     def setUp(self):
         self.factory = RequestFactory()
+        cache.clear()
 
     def test_favorited_anonymous_user(self):
         request = self.factory.get('/')
@@ -23,7 +26,7 @@ class ContextProcessorsTest(TestCase):
 
         context = context_processors.favorited(request)
 
-        self.assertEqual(context, {'favorited_training_ids': []})
+        self.assertEqual(context['favorited_training_ids'](), [])
 
     def test_favorited_authenticated_user(self):
         request = self.factory.get('/')
@@ -40,5 +43,30 @@ class ContextProcessorsTest(TestCase):
         context = context_processors.favorited(request)
 
         self.assertCountEqual(
-            context['favorited_training_ids'], [training_fav1.pk, training_fav2.pk]
+            context['favorited_training_ids'](), [training_fav1.pk, training_fav2.pk]
         )
+
+    @override_settings(USER_CONTEXT_CACHE_TIMEOUT=60)
+    def test_favorited_looked_up_only_when_used_and_cached_until_changed(self):
+        request = self.factory.get('/')
+        user = User.objects.create_user(username='john', email='john@…', password='top_secret')
+        request.user = user
+        training = TrainingFactory(is_published=True)
+        set_favorite(training_pk=training.pk, user_pk=user.pk, favorite=True)
+        template = engines['django'].from_string(
+            '{{ favorited_training_ids|json_script:"training-favorited-ids" }}'
+        )
+
+        with self.assertNumQueries(0):
+            context = context_processors.favorited(request)
+        with self.assertNumQueries(1):
+            self.assertIn(f'[{training.pk}]', template.render(context))
+        # Cached for the following requests
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                context_processors.favorited(request)['favorited_training_ids'](), [training.pk]
+            )
+
+        set_favorite(training_pk=training.pk, user_pk=user.pk, favorite=False)
+
+        self.assertEqual(context_processors.favorited(request)['favorited_training_ids'](), [])
@@ -0,0 +1,116 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from common.tests.factories.static_assets import VideoFactory
+from common.tests.factories.training import ChapterFactory, SectionFactory
+from common.tests.factories.users import UserFactory
+from training.models import UserTrainingProgress
+from training.queries.progress import (
+    record_video_progress,
+    set_section_progress_finished,
+    set_section_progress_started,
+)
+import training.queries.sections
+import training.queries.trainings
+
+
+class TestUserTrainingProgress(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserFactory()
+        self.chapter = ChapterFactory()
+        self.training = self.chapter.training
+        self.video = VideoFactory(duration=datetime.timedelta(seconds=100))
+        self.video_section = SectionFactory(
+            chapter=self.chapter, static_asset=self.video.static_asset
+        )
+        self.text_section = SectionFactory(chapter=self.chapter, static_asset=None)
+
+    def _training_progress(self) -> UserTrainingProgress:
+        return UserTrainingProgress.objects.get(user=self.user, training=self.training)
+
+    def test_updated_when_progress_is_written(self):
+        set_section_progress_started(user_pk=self.user.pk, section_pk=self.text_section.pk)
+
+        training_progress = self._training_progress()
+        self.assertEqual(training_progress.section_count, 2)
+        self.assertEqual(training_progress.sections_started, 1)
+        self.assertEqual(training_progress.sections_finished, 0)
+        self.assertEqual(training_progress.last_section, self.text_section)
+
+        record_video_progress(
+            user_pk=self.user.pk, video_pk=self.video.pk, position=datetime.timedelta(seconds=30)
+        )
+        set_section_progress_finished(user_pk=self.user.pk, section_pk=self.text_section.pk)
+
+        training_progress = self._training_progress()
+        self.assertEqual(training_progress.sections_started, 2)
+        self.assertEqual(training_progress.sections_finished, 1)
+        self.assertEqual(training_progress.fraction_finished, 0.5)
+        self.assertEqual(training_progress.last_section, self.video_section)
+        self.assertEqual(training_progress.last_position, datetime.timedelta(seconds=30))
+        self.assertEqual(
+            training_progress.section_progress,
+            {
+                str(self.video_section.pk): {'started': True, 'finished': False, 'position': 30},
+                str(self.text_section.pk): {'started': True, 'finished': True, 'position': None},
+            },
+        )
+
+    def test_updated_when_section_is_added(self):
+        set_section_progress_finished(user_pk=self.user.pk, section_pk=self.text_section.pk)
+
+        SectionFactory(chapter=self.chapter, static_asset=None)
+
+        self.assertEqual(self._training_progress().section_count, 3)
+
+    def test_updated_when_section_is_moved_to_another_training(self):
+        set_section_progress_finished(user_pk=self.user.pk, section_pk=self.text_section.pk)
+        other_chapter = ChapterFactory()
+
+        self.text_section.chapter = other_chapter
+        self.text_section.save()
+
+        training_progress = self._training_progress()
+        self.assertEqual(training_progress.section_count, 1)
+        self.assertEqual(training_progress.sections_finished, 0)
+        other_progress = UserTrainingProgress.objects.get(
+            user=self.user, training=other_chapter.training
+        )
+        self.assertEqual(other_progress.section_count, 1)
+        self.assertEqual(other_progress.sections_finished, 1)
+
+    def test_navigation(self):
+        set_section_progress_finished(user_pk=self.user.pk, section_pk=self.text_section.pk)
+        record_video_progress(
+            user_pk=self.user.pk, video_pk=self.video.pk, position=datetime.timedelta(seconds=30)
+        )
+
+        _, _, section_list = training.queries.trainings.navigation(
+            user_pk=self.user.pk, training_pk=self.training.pk
+        )
+
+        sections_by_pk = {section.pk: section for section in section_list}
+        self.assertTrue(sections_by_pk[self.text_section.pk].finished)
+        self.assertTrue(sections_by_pk[self.video_section.pk].started)
+        self.assertFalse(sections_by_pk[self.video_section.pk].finished)
+        self.assertEqual(
+            sections_by_pk[self.video_section.pk].video_position, datetime.timedelta(seconds=30)
+        )
+
+    def test_recently_watched(self):
+        record_video_progress(
+            user_pk=self.user.pk, video_pk=self.video.pk, position=datetime.timedelta(seconds=30)
+        )
+        other_section = SectionFactory(static_asset=None)
+        set_section_progress_finished(user_pk=self.user.pk, section_pk=other_section.pk)
+
+        with self.assertNumQueries(1):
+            section_list = training.queries.sections.recently_watched(user_pk=self.user.pk)
+
+        self.assertEqual(section_list, [self.video_section])
+        self.assertEqual(section_list[0].training_name, self.training.name)
+        self.assertEqual(section_list[0].video_position, datetime.timedelta(seconds=30))
+        self.assertEqual(section_list[0].video_duration, datetime.timedelta(seconds=100))
@@ -5,6 +5,7 @@ from typing import Dict, List, Literal, Optional, Union
 from django.contrib.auth import get_user_model
 
 from common import markdown
+from common.thumbnails import prefetch_thumbnail_urls
 from common.types import assert_cast
 from training import typed_templates
 from training.models import chapters as chapters_models, sections as sections_models, trainings
@@ -142,6 +143,7 @@ def recently_watched_sections_to_template_type(
     recently_watched_sections: List[sections_models.Section],
 ) -> List[RecentlyWatchedSection]:
     """Return types Sections for use in templates."""
+    prefetch_thumbnail_urls(recently_watched_sections)
     return [
         RecentlyWatchedSection(
             index=section.index,
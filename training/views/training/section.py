@@ -4,7 +4,8 @@ from django.http.request import HttpRequest
 from django.shortcuts import render, redirect
 from django.views.decorators.http import require_safe
 
-from comments.views.common import comments_to_template_type
+from comments.views.common import comments_page_to_template_type
+from common.thumbnails import prefetch_thumbnail_urls
 from common.typed_templates.types import TypeSafeTemplateResponse
 
 from stats.models import StaticAssetView
@@ -60,7 +61,7 @@ def section(
         chapter=chapter,
         section=section,
         video=video,
-        comments=comments_to_template_type(comments, section.comment_url, user=request.user),
+        comments=comments_page_to_template_type(comments, section.comment_url, user=request.user),
         section_progress_reporting_data=SectionProgressReportingData(
             progress_url=section.progress_url,
             started_timeout=UserSectionProgress.started_duration_pageview_duration.total_seconds(),
@@ -92,6 +93,8 @@ def chapter(request: HttpRequest, training_slug: str, chapter_slug: str) -> Http
         return redirect('training', training_slug=training_slug)
 
     training, training_favorited, chapter = result
+    # Sections are prefetched by the query, so the template displays these same objects
+    prefetch_thumbnail_urls(chapter.sections.all())
 
     navigation = queries.trainings.navigation(user_pk=request.user.pk, training_pk=training.pk)
     context = {
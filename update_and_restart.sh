@@ -24,6 +24,8 @@ if [[ $REPLY =~ ^[Yy]$ ]]
 then
     echo "Applying migrations"
     sudo -Hu $DEPLOY_USER $PYTHON_BIN manage.py migrate
+    echo "Creating cache tables"
+    sudo -Hu $DEPLOY_USER $PYTHON_BIN manage.py createcachetable
     echo "Collecting static"
     sudo -Hu $DEPLOY_USER $PYTHON_BIN manage.py collectstatic --no-input
 
@@ -1,30 +1,43 @@
 """Add additional User-related data into the template context."""
-from typing import Dict
+from typing import Any, Callable, Dict
 from dataclasses import asdict
+import functools
 
 from django.http.request import HttpRequest
 
+from common.entitlements import Entitlements
 from users.datatypes import User, Group
 
 
-def user_dict(request: HttpRequest) -> Dict[str, User]:
-    """Inject a JSON-serializable user into the template context."""
-    user = getattr(request, 'user', None)
-    if user and user.is_authenticated:
-        user_data = User(
-            is_anonymous=user.is_anonymous,
-            is_authenticated=user.is_authenticated,
-            username=user.username,
-            is_active=user.is_active,
-            is_staff=user.is_staff,
-            is_superuser=user.is_superuser,
-            last_login=user.last_login,
-            date_joined=user.date_joined,
-            groups=[Group(name=group.name) for group in user.groups.all()],
-            full_name=user.full_name,
-            image_url=user.image_url,
-            badges=user.badges,
-        )
-    else:
-        user_data = User(is_anonymous=True, is_authenticated=False)
-    return {'user_dict': asdict(user_data)}
+def user_dict(request: HttpRequest) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    """Inject a JSON-serializable user into the template context.
+
+    Templates call callables found in the context, so the user is only serialized
+    when a template actually uses it, and only once per request.
+    """
+
+    @functools.lru_cache(maxsize=None)
+    def _user_dict() -> Dict[str, Any]:
+        user = getattr(request, 'user', None)
+        if user and user.is_authenticated:
+            # Share group names with the permission checks made while handling the request
+            entitlements = getattr(user, 'entitlements', None) or Entitlements(user)
+            user_data = User(
+                is_anonymous=user.is_anonymous,
+                is_authenticated=user.is_authenticated,
+                username=user.username,
+                is_active=user.is_active,
+                is_staff=user.is_staff,
+                is_superuser=user.is_superuser,
+                last_login=user.last_login,
+                date_joined=user.date_joined,
+                groups=[Group(name=name) for name in entitlements.group_names],
+                full_name=user.full_name,
+                image_url=user.image_url,
+                badges=user.badges,
+            )
+        else:
+            user_data = User(is_anonymous=True, is_authenticated=False)
+        return asdict(user_data)
+
+    return {'user_dict': _user_dict}
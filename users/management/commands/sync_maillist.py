@@ -1,6 +1,6 @@
 """Imports/exports email addresses to/from Mailgun lists/CSVs."""
 from collections import OrderedDict
-from typing import List, Tuple, Any
+from typing import Dict, List, Tuple, Any
 import logging
 import time
 
@@ -8,7 +8,7 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
 from django.core.management.base import BaseCommand
-from django.db.models import Q
+from django.db.models import Exists, OuterRef, Q
 
 from common import mailgun
 
@@ -17,15 +17,17 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
-def chunks(lst, n):
-    """Yield successive n-sized chunks from lst."""
-    for i in range(0, len(lst), n):
-        yield lst[i : i + n]
-
-
 class Command(BaseCommand):
     """Upsert users to a mail list depending on their is_subscribed_to_newsletter."""
 
+    def add_arguments(self, parser):  # noqa: D102
+        parser.add_argument(
+            '--reconcile',
+            action='store_true',
+            help='Only add missing and delete extra members of the subscribers '
+            'and non-subscribers mailing lists, instead of exporting CSVs',
+        )
+
     def import_from_csvs(self, *csvs) -> OrderedDict:
         """Read from CSVs."""
         unique_subscribers = OrderedDict()
@@ -78,35 +80,25 @@ class Command(BaseCommand):
             count += 1
         write_to.close()
 
-    def get_unique_subscribers(self, filters: Q = None, excludes: Q = None) -> OrderedDict:
-        """Subj."""
-        subscribed_users = User.objects.filter(
-            profile__is_subscribed_to_newsletter=True,
-        ).prefetch_related('groups')
+    def get_unique_subscribers(self, filters: Q = None, excludes: Q = None) -> Dict[str, User]:
+        """Return users subscribed to the newsletter, keyed by their email."""
+        subscribed_users = User.objects.filter(is_subscribed_to_newsletter=True).annotate(
+            has_groups=Exists(User.groups.through.objects.filter(user_id=OuterRef('pk')))
+        )
         if filters:
             subscribed_users = subscribed_users.filter(filters)
         if excludes:
             subscribed_users = subscribed_users.exclude(excludes)
 
-        max_id = subscribed_users.order_by('-id')[0].id
-        logger.info('Max ID: %s', max_id)
-        unique_subscribers_unordered = {}
-        for ids in chunks(range(1, max_id + 100), 1000):
-            logger.info('At %s', ids)
-            unique_subscribers_unordered.update(
-                {_.email: _ for _ in subscribed_users.filter(id__in=ids)}
-            )
-
-        logger.info(
-            '%s records to add, %s',
-            User.objects.filter(is_subscribed_to_newsletter=True).distinct().count(),
-            len(unique_subscribers_unordered),
-        )
-        return unique_subscribers_unordered
+        unique_subscribers = {
+            _.email: _ for _ in subscribed_users.order_by('pk').iterator(chunk_size=2000)
+        }
+        logger.info('%s records to add', len(unique_subscribers))
+        return unique_subscribers
 
     def _sort(self, users: dict):
         def _user_sorting_key(u):
-            has_groups = u.groups.count() != 0
+            has_groups = u.has_groups
             date = u.last_login or u.date_joined
             timestamp = int(time.mktime(date.timetuple())) if date else None
             if has_groups:
@@ -138,7 +130,10 @@ class Command(BaseCommand):
             settings.NEWSLETTER_SUBSCRIBER_LIST,
             settings.NEWSLETTER_NONSUBSCRIBER_LIST,
         )
-        self._export_non_subscribers_batches()
+        if options['reconcile']:
+            self._reconcile_maillists()
+        else:
+            self._export_non_subscribers_batches()
 
     def _export_non_subscribers_batches(self):
         perm = Permission.objects.get(codename='can_view_content')
@@ -176,16 +171,55 @@ class Command(BaseCommand):
     def _add_to_maillists(self, subscribers, non_subscribers):
         # Fill in the subscribers list
         if settings.NEWSLETTER_SUBSCRIBER_LIST:
-            for chunk in chunks(subscribers, 500):
-                recipients = ((u.email, u.full_name) for _, u in chunk)
-                mailgun.add_to_maillist(settings.NEWSLETTER_SUBSCRIBER_LIST, recipients)
+            recipients = ((u.email, u.full_name) for u in subscribers.values())
+            mailgun.add_to_maillist(settings.NEWSLETTER_SUBSCRIBER_LIST, recipients)
         else:
             logger.warning('No mail list alias configured for subscribers, skipping')
 
         # Fill in the non-subscribers list
         if settings.NEWSLETTER_NONSUBSCRIBER_LIST:
-            for chunk in chunks(non_subscribers, 500):
-                recipients = ((u.email, u.full_name) for _, u in chunk)
-                mailgun.add_to_maillist(settings.NEWSLETTER_NONSUBSCRIBER_LIST, recipients)
+            recipients = ((u.email, u.full_name) for u in non_subscribers.values())
+            mailgun.add_to_maillist(settings.NEWSLETTER_NONSUBSCRIBER_LIST, recipients)
         else:
             logger.warning('No mail list alias configured for non-subscribers, skipping')
+
+    def _reconcile_maillist(self, alias_address: str, users: Dict[str, User]) -> None:
+        """Make the mailing list match the given users, only sending the difference to Mailgun.
+
+        Users who opted out of the newsletter are not among the given users,
+        so members are deleted rather than unsubscribed when they are no longer on the list,
+        the same way `handle_is_subscribed_to_newsletter` moves them between the lists.
+        """
+        # Mailgun stores addresses in lower case
+        users = {email.lower(): user for email, user in users.items()}
+        members = {
+            member['address'].lower(): member.get('subscribed', True)
+            for member in mailgun.get_maillist_members(alias_address, limit=1000)
+        }
+        subscribed = {email for email, is_subscribed in members.items() if is_subscribed}
+        to_add = users.keys() - subscribed
+        to_delete = members.keys() - users.keys()
+        logger.info(
+            '%s: %s members, adding %s, deleting %s',
+            alias_address,
+            len(members),
+            len(to_add),
+            len(to_delete),
+        )
+        if to_add:
+            mailgun.add_to_maillist(
+                alias_address, ((users[email].email, users[email].full_name) for email in to_add)
+            )
+        for email in sorted(to_delete):
+            mailgun.delete_from_maillist(alias_address, email)
+
+    def _reconcile_maillists(self):
+        perm = Permission.objects.get(codename='can_view_content')
+        active_subsriber_q = Q(groups__permissions=perm) | Q(user_permissions=perm)
+        for alias_address, lookups in (
+            (settings.NEWSLETTER_SUBSCRIBER_LIST, {'filters': active_subsriber_q}),
+            (settings.NEWSLETTER_NONSUBSCRIBER_LIST, {'excludes': active_subsriber_q}),
+        ):
+            if not alias_address:
+                continue
+            self._reconcile_maillist(alias_address, self.get_unique_subscribers(**lookups))
@@ -0,0 +1,115 @@
+from urllib.parse import parse_qs
+import json
+
+from django.contrib.auth.models import Group, Permission
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+import responses
+
+from common.tests.factories.users import UserFactory
+
+LISTS_URL = 'https://api.mailgun.net/v3/lists'
+
+
+def _members_page(*members):
+    return {
+        'items': [
+            {'address': address, 'name': '', 'subscribed': subscribed}
+            for address, subscribed in members
+        ],
+        'paging': {'next': f'{LISTS_URL}/next-page'},
+    }
+
+
+def _upserted_members(call):
+    return json.loads(parse_qs(call.request.body)['members'][0])
+
+
+@override_settings(
+    MAILGUN_API_KEY='test-api-key',
+    NEWSLETTER_SUBSCRIBER_LIST='subscribers@example.com',
+    NEWSLETTER_NONSUBSCRIBER_LIST=None,
+)
+class SyncMaillistCommandTest(TestCase):
+    def setUp(self):
+        group = Group.objects.create(name='subscriber')
+        group.permissions.add(Permission.objects.get(codename='can_view_content'))
+        self.users = [
+            UserFactory(email=f'user{i}@example.com', is_subscribed_to_newsletter=True)
+            for i in range(3)
+        ]
+        for user in self.users:
+            user.groups.add(group)
+        UserFactory(email='not-subscribed@example.com').groups.add(group)
+
+    @responses.activate
+    def test_reconcile_sends_only_the_difference(self):
+        responses.add(
+            responses.GET,
+            f'{LISTS_URL}/subscribers%40example.com/members/pages?page=first&limit=1000',
+            json=_members_page(
+                ('User0@example.com', True),
+                ('user1@example.com', False),
+                ('gone@example.com', True),
+            ),
+            match_querystring=True,
+        )
+        responses.add(responses.GET, f'{LISTS_URL}/next-page', json={'items': []})
+        responses.add(
+            responses.POST, f'{LISTS_URL}/subscribers%40example.com/members.json', json={}
+        )
+
+        responses.add(
+            responses.DELETE, f'{LISTS_URL}/subscribers%40example.com/members/gone%40example.com'
+        )
+
+        call_command('sync_maillist', '--reconcile')
+
+        # All members of the list are fetched in two requests, and changed in two more
+        self.assertEqual(len(responses.calls), 4)
+        # Opting out is tracked by is_subscribed_to_newsletter, so user1 is subscribed again
+        self.assertEqual(
+            sorted(member['address'] for member in _upserted_members(responses.calls[2])),
+            ['user1@example.com', 'user2@example.com'],
+        )
+        self.assertEqual(responses.calls[3].request.method, 'DELETE')
+
+    @override_settings(
+        NEWSLETTER_SUBSCRIBER_LIST=None, NEWSLETTER_NONSUBSCRIBER_LIST='others@example.com'
+    )
+    @responses.activate
+    def test_reconcile_adds_back_members_whose_subscription_lapsed(self):
+        user = UserFactory(email='lapsed@example.com', is_subscribed_to_newsletter=True)
+        group = Group.objects.get(name='subscriber')
+        members_url = f'{LISTS_URL}/others%40example.com/members'
+        member_url = f'{members_url}/lapsed%40example.com'
+        # Members of the list of non-subscribers, as stored by Mailgun
+        members = [('lapsed@example.com', True)]
+        responses.add_callback(
+            responses.GET,
+            f'{members_url}/pages?page=first&limit=1000',
+            callback=lambda request: (200, {}, json.dumps(_members_page(*members))),
+            match_querystring=True,
+        )
+        responses.add(responses.GET, f'{LISTS_URL}/next-page', json={'items': []})
+        responses.add(responses.POST, f'{members_url}.json', json={})
+        responses.add(responses.DELETE, member_url, json={})
+
+        # Subscribes: deleted from the list of non-subscribers
+        user.groups.add(group)
+        call_command('sync_maillist', '--reconcile')
+
+        self.assertEqual(len(responses.calls), 3)
+        self.assertEqual(responses.calls[2].request.method, 'DELETE')
+        self.assertEqual(responses.calls[2].request.url, member_url)
+        members.clear()
+
+        # Subscription lapses: added back to the list of non-subscribers
+        user.groups.remove(group)
+        call_command('sync_maillist', '--reconcile')
+
+        self.assertEqual(len(responses.calls), 5)
+        self.assertEqual(
+            [member['address'] for member in _upserted_members(responses.calls[4])],
+            ['lapsed@example.com'],
+        )
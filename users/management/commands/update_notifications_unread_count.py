@@ -0,0 +1,17 @@
+"""Recount unread notifications of all users."""
+import logging
+
+from django.core.management.base import BaseCommand
+
+from users.queries import update_notifications_unread_count
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class Command(BaseCommand):
+    """Recalculate `notifications_unread_count` of all users."""
+
+    def handle(self, *args, **options):  # noqa: D102
+        updated = update_notifications_unread_count()
+        logger.info('Updated unread notification counters of %s users', updated)
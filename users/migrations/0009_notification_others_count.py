@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_alter_user_first_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='others_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,50 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def update_notifications_unread_count(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Notification = apps.get_model('users', 'Notification')
+    unread_counts = (
+        Notification.objects.filter(user_id=OuterRef('pk'), date_read__isnull=True)
+        .values('user_id')
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    User.objects.update(notifications_unread_count=Coalesce(Subquery(unread_counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('actstream', '0003_add_follow_flag'),
+        ('users', '0009_notification_others_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='notifications_unread_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterModelOptions(
+            name='notification',
+            options={'ordering': ['-date_created', '-pk']},
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', '-date_created', '-id'], name='notification_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(date_read__isnull=True), fields=['user'], name='notification_user_unread_idx'),
+        ),
+        # Activity of a user is paginated by timestamp, see users.queries.get_activity_page
+        migrations.RunSQL(
+            'CREATE INDEX actstream_action_actor_timestamp_idx ON actstream_action'
+            ' (actor_content_type_id, actor_object_id, timestamp DESC, id DESC)',
+            reverse_sql='DROP INDEX actstream_action_actor_timestamp_idx',
+        ),
+        migrations.RunPython(update_notifications_unread_count, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('actstream', '0003_add_follow_flag'),
+        ('users', '0010_notification_counter_and_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingNotification',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='actstream.action')),
+            ],
+        ),
+    ]
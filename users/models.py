@@ -6,7 +6,6 @@ from actstream.models import Action
 from django.contrib.admin.utils import NestedObjects
 from django.contrib.auth.models import AbstractUser
 from django.db import models, DEFAULT_DB_ALIAS, transaction
-from django.db.models import Case, When, Value, IntegerField
 from django.templatetags.static import static
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
@@ -33,6 +32,9 @@ class User(AbstractUser):
     badges = models.JSONField(null=True, blank=True)
 
     date_deletion_requested = models.DateTimeField(null=True, blank=True)
+    # Kept up to date when notifications are created, read or deleted,
+    # `manage.py update_notifications_unread_count` recalculates it from scratch.
+    notifications_unread_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return f'{self.full_name or self.username} ({self.email})'
@@ -45,20 +47,6 @@ class User(AbstractUser):
 
         return self.image.url
 
-    @property
-    def notifications(self):
-        return (
-            self.notifications.select_related('action').annotate(
-                unread=Case(
-                    When(date_read__isnull=True, then=Value(0)),
-                    default=Value(1),
-                    output_field=IntegerField(),
-                )
-            )
-            # Unread notifications come first
-            .order_by('unread', '-date_created')
-        )
-
     @property
     def notifications_unread(self):
         return self.notifications.filter(date_read__isnull=True)
@@ -206,15 +194,41 @@ class Notification(models.Model):
 
     action = models.ForeignKey(Action, on_delete=models.CASCADE, related_name='notifications')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    # Number of earlier similar actions, such as likes, collapsed into this notification
+    others_count = models.PositiveIntegerField(default=0, editable=False)
 
     date_created = models.DateTimeField(auto_now_add=True)
     date_read = models.DateTimeField(null=True, blank=True)
 
     class Meta:
-        ordering = ['-date_created']
+        ordering = ['-date_created', '-pk']
         db_table = 'users_notification'
+        indexes = [
+            models.Index(
+                fields=['user', '-date_created', '-id'], name='notification_user_date_idx'
+            ),
+            models.Index(
+                fields=['user'],
+                condition=models.Q(date_read__isnull=True),
+                name='notification_user_unread_idx',
+            ),
+        ]
 
     @property
     def mark_read_url(self):
         """Return a URL that that allows marking this Notification as read."""
         return reverse('api-notification-mark-read', kwargs={'pk': self.pk})
+
+
+class PendingNotification(models.Model):
+    """An action which users haven't been notified about yet.
+
+    Recording an action only records one of these, so that saving it never waits
+    for the notifications. Pending notifications are created in batches by
+    `users.tasks.process_pending_notifications`, see `users.notifications`.
+    """
+
+    action = models.OneToOneField(Action, on_delete=models.CASCADE, related_name='+')
+
+    def __str__(self) -> str:
+        return f'Pending notifications about action {self.action_id}'
@@ -0,0 +1,260 @@
+"""Create personal notifications about activity relevant to users.
+
+Recording an action only records a `PendingNotification`, see `users.signals.create_notification`.
+A single background task, scheduled unless one is already waiting, then creates notifications
+about all the pending actions in batches, so that similar notifications are collapsed together.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+from actstream.models import Action
+from background_task.models import Task
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.db.models import Q, prefetch_related_objects
+
+from users.models import Notification, PendingNotification
+from users.queries import increment_notifications_unread_count
+import users.tasks as tasks
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+# Waiting a bit before creating notifications allows to collect actions of several requests
+# and to create notifications about them all at once.
+NOTIFICATIONS_DELAY = timedelta(seconds=5)
+NOTIFICATIONS_BATCH_SIZE = 500
+
+# Likes on the same thing are collapsed into a single unread notification
+COLLAPSED_VERBS = {Action.objects.verb_liked}
+
+# Key of a collapsed notification: user ID, verb, target and action object
+CollapseKey = Tuple[int, str, Optional[int], Optional[str], Optional[int], Optional[str]]
+
+
+def _get_target_author(target) -> User:
+    if getattr(target, 'author', None):
+        return target.author
+    # training `Section`s
+    elif getattr(target, 'user', None):
+        return target.user
+    # film `Asset`s , `CharacterVersion` or `CharacterShowcase`
+    elif getattr(target, 'static_asset', None):
+        asset_author = target.static_asset.author or target.static_asset.user
+        if asset_author:
+            return asset_author
+
+
+def _has_field(model: Any, lookup: str) -> bool:
+    for name in lookup.split('__'):
+        try:
+            model = model._meta.get_field(name).related_model
+        except FieldDoesNotExist:
+            return False
+    return True
+
+
+def _prefetch_users(objects: Iterable[Any], lookups: Iterable[str]) -> None:
+    """Fetch users related to objects of various types with one query per type and relation."""
+    objects_by_model: Dict[Any, List[Any]] = defaultdict(list)
+    for obj in objects:
+        if obj is not None:
+            objects_by_model[type(obj)].append(obj)
+    for model, model_objects in objects_by_model.items():
+        model_lookups = [lookup for lookup in lookups if _has_field(model, lookup)]
+        if model_lookups:
+            prefetch_related_objects(model_objects, *model_lookups)
+
+
+def get_recipients(action: Action) -> Set[User]:
+    """Return users to whom the given action is relevant.
+
+    Personal notifications include the following:
+    * "someone commented on your blog post";
+    * "someone liked your comment";
+    * "someone replied to your comment";
+    * TODO(anna): "someone saved your training section";
+    * "someone commented on your training section";
+    * "someone commented on your film asset";
+    """
+    # There can be multiple users to whom this action is relevant
+    users = set()
+    action_object = action.action_object
+    verb = action.verb
+    target = action.target
+
+    # Notify about replies and comments likes
+    if (
+        action_object
+        and getattr(action_object, 'user', None)
+        and verb in [Action.objects.verb_replied, Action.objects.verb_liked]
+    ):
+        users.add(action_object.user)
+
+    if target:
+        target_author = _get_target_author(target)
+        if target_author:
+            # Notify about likes on blog posts and film assets
+            if not action_object and verb in [Action.objects.verb_liked]:
+                # Separate clause otherwise likes on related comments also end up in notifications
+                users.add(target_author)
+
+            # Notify about comments and likes on
+            if verb in [Action.objects.verb_commented]:
+                users.add(target_author)
+
+    # Don't notify yourself about your own actions: they can be viewed in activity
+    users.discard(action.actor)
+    return users
+
+
+def _collapse_key(user_pk: int, action: Action) -> CollapseKey:
+    return (
+        user_pk,
+        action.verb,
+        action.target_content_type_id,
+        action.target_object_id,
+        action.action_object_content_type_id,
+        action.action_object_object_id,
+    )
+
+
+def _get_unread_collapsible(keys: Set[CollapseKey]) -> Dict[CollapseKey, Notification]:
+    """Return unread notifications which notifications with the given keys collapse into."""
+    if not keys:
+        return {}
+    # Only notifications about the same targets and action objects can be collapsed
+    same_objects = Q()
+    for target_type, target_id, action_object_type, action_object_id in {key[2:] for key in keys}:
+        same_objects |= Q(
+            action__target_content_type_id=target_type,
+            action__target_object_id=target_id,
+            action__action_object_content_type_id=action_object_type,
+            action__action_object_object_id=action_object_id,
+        )
+    unread = (
+        Notification.objects.filter(
+            same_objects,
+            user_id__in={key[0] for key in keys},
+            date_read__isnull=True,
+            action__verb__in=COLLAPSED_VERBS,
+        )
+        .select_related('action')
+        .order_by('date_created')
+    )
+    # The latest unread notification of each kind is the one to collapse into
+    collapsible = {
+        _collapse_key(notification.user_id, notification.action): notification
+        for notification in unread
+    }
+    return {key: notification for key, notification in collapsible.items() if key in keys}
+
+
+def create_notifications(action_pks: Iterable[int]) -> None:
+    """Create notifications about the given actions for all users to whom they are relevant.
+
+    Actions and their targets are fetched in batches, and new notifications inserted in bulk.
+    Likes of the same thing are collapsed into one unread notification about the latest like.
+    """
+    actions = list(
+        Action.objects.filter(pk__in=action_pks)
+        .prefetch_related('actor', 'action_object', 'target')
+        .order_by('timestamp', 'pk')
+    )
+    _prefetch_users((action.action_object for action in actions), ['user'])
+    _prefetch_users(
+        (action.target for action in actions),
+        ['author', 'user', 'static_asset__author', 'static_asset__user'],
+    )
+
+    recipients = [(action, get_recipients(action)) for action in actions]
+    for action, users in recipients:
+        if not users:
+            logger.debug(f'Unable to determine a relevant user for a new action: {action}')
+
+    collapsed = _get_unread_collapsible(
+        {
+            _collapse_key(user.pk, action)
+            for action, users in recipients
+            if action.verb in COLLAPSED_VERBS
+            for user in users
+        }
+    )
+    to_create: Dict[Any, Notification] = {}
+    to_update: Dict[int, Notification] = {}
+    for action, users in recipients:
+        for user in users:
+            if action.verb not in COLLAPSED_VERBS:
+                to_create[(user.pk, action.pk)] = Notification(user=user, action=action)
+                continue
+            key = _collapse_key(user.pk, action)
+            notification = collapsed.get(key)
+            if notification is None:
+                notification = Notification(user=user, action=action)
+                collapsed[key] = to_create[key] = notification
+                continue
+            notification.action = action
+            notification.others_count += 1
+            notification.date_created = action.timestamp
+            if notification.pk:
+                to_update[notification.pk] = notification
+
+    unread_counts: Dict[int, int] = defaultdict(int)
+    for notification in to_create.values():
+        unread_counts[notification.user_id] += 1
+    with transaction.atomic():
+        Notification.objects.bulk_create(to_create.values())
+        Notification.objects.bulk_update(
+            to_update.values(), ['action', 'others_count', 'date_created']
+        )
+        increment_notifications_unread_count(unread_counts)
+
+
+def create_pending_notifications() -> int:
+    """Create notifications about all pending actions, in batches.
+
+    A batch is removed from the queue in the same transaction in which its notifications
+    are created, so that the batch is put back if creating them fails.
+
+    Returns:
+        The number of actions notified about.
+    """
+    number_of_actions = 0
+    while True:
+        with transaction.atomic():
+            pending_notifications = list(
+                PendingNotification.objects.select_for_update(skip_locked=True)
+                .order_by('pk')
+                .values_list('pk', 'action_id')[:NOTIFICATIONS_BATCH_SIZE]
+            )
+            if not pending_notifications:
+                return number_of_actions
+            pks, action_pks = zip(*pending_notifications)
+            PendingNotification.objects.filter(pk__in=pks).delete()
+            create_notifications(action_pks)
+        number_of_actions += len(action_pks)
+
+
+def notify_about_action(action_pk: int) -> None:
+    """Record a pending notification about an action, and schedule creating it.
+
+    Unless NOTIFICATIONS_IN_BACKGROUND is disabled, in which case notifications are created
+    right away.
+    """
+    if not settings.NOTIFICATIONS_IN_BACKGROUND:
+        create_notifications([action_pk])
+        return
+    # Recorded in the same transaction as the action, so the background task can always find it
+    PendingNotification.objects.create(action_id=action_pk)
+    is_scheduled = Task.objects.filter(
+        task_name=tasks.process_pending_notifications.name,
+        locked_by__isnull=True,
+        failed_at__isnull=True,
+    ).exists()
+    if not is_scheduled:
+        tasks.process_pending_notifications(schedule=NOTIFICATIONS_DELAY)
@@ -1,4 +1,6 @@
-from typing import List, Set, Union, Any
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Union, Any
+import dataclasses
 import logging
 import re
 
@@ -7,12 +9,29 @@ from actstream.models import Action
 from django.contrib.auth.models import Group
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, Count, F, OuterRef, Q, QuerySet, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from users.models import Notification
 import users.tasks as tasks
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 re_cloud_role_name_cleanup = re.compile('^cloud_')
 
+ACTIVITY_PAGE_SIZE = 10
+
+
+@dataclasses.dataclass
+class ActivityPage:
+    """A page of notifications or actions, from newest to oldest."""
+
+    items: List[Any]
+    # Points to the last item on this page, None if this is the last page
+    next_cursor: Optional[str]
+
 
 def clean_role_names(names: Union[List[str], Set[str]]) -> Set[str]:
     """Remove Blender Cloud prefixes from given Blender ID roles.
@@ -95,3 +114,116 @@ def create_action_from_like(actor: User, target: Any, action_object: Any = None)
         return
 
     action.send(actor, verb=verb_liked, target=target, action_object=action_object, public=False)
+
+
+def _encode_cursor(date: datetime, pk: int) -> str:
+    return f'{date.isoformat()},{pk}'
+
+
+def _decode_cursor(cursor: str, date_field: str) -> Q:
+    """Return a filter selecting items older than the one the cursor points to.
+
+    Raises:
+        ValueError: if the cursor is malformed.
+    """
+    date_str, pk_str = cursor.rsplit(',', 1)
+    date, pk = datetime.fromisoformat(date_str), int(pk_str)
+    return Q(**{f'{date_field}__lt': date}) | Q(**{date_field: date, 'pk__lt': pk})
+
+
+def _get_activity_page(
+    items: QuerySet, date_field: str, cursor: Optional[str], page_size: int
+) -> ActivityPage:
+    items = items.order_by(f'-{date_field}', '-pk')
+    if cursor:
+        items = items.filter(_decode_cursor(cursor, date_field))
+    page = list(items[: page_size + 1])
+    has_next = len(page) > page_size
+    page = page[:page_size]
+    return ActivityPage(
+        items=page,
+        next_cursor=(
+            _encode_cursor(getattr(page[-1], date_field), page[-1].pk) if has_next else None
+        ),
+    )
+
+
+def get_notifications_page(
+    user: User, cursor: Optional[str] = None, page_size: int = ACTIVITY_PAGE_SIZE
+) -> ActivityPage:
+    """Return a page of notifications of the given user, paginated using a keyset cursor.
+
+    Raises:
+        ValueError: if the cursor is malformed.
+    """
+    notifications = user.notifications.select_related('action')
+    return _get_activity_page(notifications, 'date_created', cursor, page_size)
+
+
+def get_activity_page(
+    user: User, cursor: Optional[str] = None, page_size: int = ACTIVITY_PAGE_SIZE
+) -> ActivityPage:
+    """Return a page of actions of the given user, paginated using a keyset cursor.
+
+    Raises:
+        ValueError: if the cursor is malformed.
+    """
+    return _get_activity_page(user.actor_actions.all(), 'timestamp', cursor, page_size)
+
+
+def increment_notifications_unread_count(counts: Dict[int, int]) -> None:
+    """Add numbers of new unread notifications to the counters of users with the given IDs."""
+    if not counts:
+        return
+    User.objects.filter(pk__in=counts.keys()).update(
+        notifications_unread_count=F('notifications_unread_count')
+        + Case(*(When(pk=pk, then=Value(count)) for pk, count in counts.items()), default=0)
+    )
+
+
+def _decrement_notifications_unread_count(user_pk: int, count: int) -> None:
+    if not count:
+        return
+    User.objects.filter(pk=user_pk).update(
+        notifications_unread_count=Greatest(F('notifications_unread_count') - count, 0)
+    )
+
+
+def mark_notification_read(notification: Notification) -> None:
+    """Mark a notification as read, unless it already is."""
+    with transaction.atomic():
+        marked = Notification.objects.filter(pk=notification.pk, date_read__isnull=True).update(
+            date_read=timezone.now()
+        )
+        _decrement_notifications_unread_count(notification.user_id, marked)
+
+
+def mark_all_notifications_read(user: User) -> None:
+    """Mark all unread notifications of the given user as read."""
+    with transaction.atomic():
+        marked = Notification.objects.filter(user=user, date_read__isnull=True).update(
+            date_read=timezone.now()
+        )
+        _decrement_notifications_unread_count(user.pk, marked)
+
+
+def notification_deleted(notification: Notification) -> None:
+    """Keep the unread counter of the notified user up to date after a notification is deleted."""
+    if notification.date_read is None:
+        _decrement_notifications_unread_count(notification.user_id, 1)
+
+
+def update_notifications_unread_count(users: 'Optional[QuerySet[User]]' = None) -> int:
+    """Recount unread notifications of the given users, all users by default.
+
+    Returns:
+        The number of updated users.
+    """
+    users = User.objects.all() if users is None else users
+    unread_counts = (
+        Notification.objects.filter(user_id=OuterRef('pk'), date_read__isnull=True)
+        .values('user_id')
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    return users.update(notifications_unread_count=Coalesce(Subquery(unread_counts), 0))
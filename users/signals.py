@@ -4,14 +4,15 @@ import logging
 from actstream.models import Action
 from anymail.signals import tracking
 from django.contrib.auth import get_user_model
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import post_delete, pre_save, post_save
 from django.dispatch import receiver
 
 from blender_id_oauth_client import signals as bid_signals
 
 from users.blender_id import BIDSession
+from users.notifications import notify_about_action
 from users.models import Notification
-from users.queries import set_groups_from_roles
+from users.queries import notification_deleted, set_groups_from_roles
 import users.tasks as tasks
 
 User = get_user_model()
@@ -19,19 +20,6 @@ bid = BIDSession()
 logger = logging.getLogger(__name__)
 
 
-def _get_target_author(target) -> User:
-    if getattr(target, 'author', None):
-        return target.author
-    # training `Section`s
-    elif getattr(target, 'user', None):
-        return target.user
-    # film `Asset`s , `CharacterVersion` or `CharacterShowcase`
-    elif getattr(target, 'static_asset', None):
-        asset_author = target.static_asset.author or target.static_asset.user
-        if asset_author:
-            return asset_author
-
-
 @receiver(bid_signals.user_created)
 def update_user(
     sender: object, instance: User, oauth_info: Dict[str, str], **kwargs: object
@@ -83,52 +71,20 @@ def _handle_mailgun_tracking_event(sender, event, esp_name, **kwargs):
 
 @receiver(post_save, sender=Action)
 def create_notification(sender: object, instance: Action, created: bool, **kwargs: object) -> None:
-    """Create a Notification record to simplify retrieval of actions relevant to a user.
-
-    Personal notifications include the following:
-    * "someone commented on your blog post";
-    * "someone liked your comment";
-    * "someone replied to your comment";
-    * TODO(anna): "someone saved your training section";
-    * "someone commented on your training section";
-    * "someone commented on your film asset";
+    """Create Notification records to simplify retrieval of actions relevant to a user.
+
+    Relevant users are determined and notified in a background task, together with other
+    recent actions, see `users.notifications.notify_about_action`.
     """
     if not created:
         return
 
-    # There can be multiple users to whom this action is relevant
-    users = set()
-    action_object = instance.action_object
-    verb = instance.verb
-    target = instance.target
-
-    # Notify about replies and comments likes
-    if (
-        action_object
-        and getattr(action_object, 'user', None)
-        and verb in [Action.objects.verb_replied, Action.objects.verb_liked]
-    ):
-        users.add(action_object.user)
-
-    if target:
-        target_author = _get_target_author(target)
-        if target_author:
-            # Notify about likes on blog posts and film assets
-            if not action_object and verb in [Action.objects.verb_liked]:
-                # Separate clause otherwise likes on related comments also end up in notifications
-                users.add(target_author)
-
-            # Notify about comments and likes on
-            if verb in [Action.objects.verb_commented]:
-                users.add(target_author)
-
-    if not users:
-        logger.debug(f'Unable to determine a relevant user for a new action: {instance}')
-        return
+    notify_about_action(instance.pk)
+
 
-    for user in users:
-        # Don't notify yourself about your own actions: they can be viewed in activity
-        if user == instance.actor:
-            continue
-        notification = Notification(user=user, action=instance)
-        notification.save()
+@receiver(post_delete, sender=Notification)
+def update_notifications_unread_count(
+    sender: object, instance: Notification, **kwargs: object
+) -> None:
+    """Don't count deleted unread notifications."""
+    notification_deleted(instance)
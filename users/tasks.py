@@ -1,6 +1,6 @@
 """Background tasks for user-related things."""
 from datetime import timedelta
-from typing import Dict, Any
+from typing import Any, Dict
 import logging
 
 from background_task import background
@@ -155,3 +155,12 @@ def revoke_blender_id_role(pk: int, role: str, **kwargs) -> bool:
     bid.grant_revoke_role(user, action='revoke', role=role)
     bid.copy_badges_from_blender_id(user=user)
     return True
+
+
+@background()
+def process_pending_notifications() -> None:
+    """Create notifications about pending actions, recorded by `users.signals`."""
+    import users.notifications
+
+    number_of_actions = users.notifications.create_pending_notifications()
+    logger.info(f'Created notifications about {number_of_actions} actions')
@@ -37,12 +37,23 @@ class TestNotificationMarkReadEndpoint(TestCase):
 
     def test_mark_notification_as_read(self):
         self.assertIsNone(Notification.objects.get(id=self.notification.pk).date_read)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.notifications_unread_count, 1)
 
         self.client.force_login(self.user)
         response = self.client.post(self.notification.mark_read_url)
 
         self.assertEqual(response.status_code, 200)
         self.assertIsNotNone(Notification.objects.get(id=self.notification.pk).date_read)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.notifications_unread_count, 0)
+
+        # Marking as read again doesn't change the counter
+        response = self.client.post(self.notification.mark_read_url)
+
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.notifications_unread_count, 0)
 
 
 class TestNotificationsMarkReadEndpoint(TestCase):
@@ -72,3 +83,5 @@ class TestNotificationsMarkReadEndpoint(TestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertIsNotNone(Notification.objects.get(id=self.notification.pk).date_read)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.notifications_unread_count, 0)
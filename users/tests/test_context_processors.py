@@ -1,9 +1,11 @@
 from unittest.mock import ANY, patch, Mock
 
 from django.contrib.auth.models import Group, AnonymousUser
+from django.core.cache import cache
 from django.template import engines
 from django.test import RequestFactory, TestCase
 
+from common.entitlements import Entitlements
 from common.tests.factories.users import UserFactory
 from users.context_processors import user_dict
 
@@ -17,12 +19,13 @@ class ContextProcessorsTest(TestCase):
     def setUp(self):
         self.request = RequestFactory().get('/')
         self.request.user = AnonymousUser()
+        cache.clear()
 
     def test_user_dict_anonymous_user(self):
         context = user_dict(self.request)
 
         self.assertDictEqual(
-            context['user_dict'],
+            context['user_dict'](),
             {
                 'is_anonymous': True,
                 'is_authenticated': False,
@@ -65,7 +68,7 @@ class ContextProcessorsTest(TestCase):
         context = user_dict(self.request)
 
         self.assertDictEqual(
-            context['user_dict'],
+            context['user_dict'](),
             {
                 'is_anonymous': False,
                 'is_authenticated': True,
@@ -97,7 +100,7 @@ class ContextProcessorsTest(TestCase):
         context = user_dict(self.request)
 
         self.assertDictEqual(
-            context['user_dict'],
+            context['user_dict'](),
             {
                 'is_anonymous': False,
                 'is_authenticated': True,
@@ -113,3 +116,32 @@ class ContextProcessorsTest(TestCase):
                 'badges': None,
             },
         )
+
+    def test_user_dict_serialized_only_when_used(self):
+        user = UserFactory(email='mail@example.com', username='janedoe', oauth_info=None)
+        user.groups.add(Group.objects.create(name='subscriber'))
+        self.request.user = user
+        template = template_engine.from_string('{{ user_dict|json_script:"current-user" }}')
+
+        with self.assertNumQueries(0):
+            context = user_dict(self.request)
+        with self.assertNumQueries(1):
+            html = template.render(context)
+
+        self.assertIn('"username": "janedoe"', html)
+        self.assertIn('"groups": [{"name": "subscriber"}]', html)
+        # Reading it again in the same request doesn't serialize it again
+        with self.assertNumQueries(0):
+            self.assertEqual(template.render(context), html)
+
+    def test_user_dict_reuses_group_names_of_entitlements(self):
+        user = UserFactory(email='mail@example.com', username='janedoe', oauth_info=None)
+        user.groups.add(Group.objects.create(name='has_subscription'))
+        user.entitlements = Entitlements(user)
+        self.request.user = user
+        self.assertTrue(user.entitlements.has_group('has_subscription'))
+
+        with self.assertNumQueries(0):
+            groups = user_dict(self.request)['user_dict']()['groups']
+
+        self.assertEqual(groups, [{'name': 'has_subscription'}])
@@ -0,0 +1,135 @@
+from actstream.models import Action
+from background_task.models import Task
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from comments.queries import set_comment_like
+from common.tests.factories.comments import CommentUnderPostFactory
+from common.tests.factories.users import UserFactory
+from users.models import Notification, PendingNotification
+from users.notifications import create_notifications, create_pending_notifications
+from users.tasks import process_pending_notifications
+
+
+class TestNotifications(TestCase):
+    def setUp(self):
+        self.comment = CommentUnderPostFactory()
+        self.author = self.comment.user
+        self.users = [UserFactory() for _ in range(3)]
+
+    def test_likes_are_collapsed_into_one_notification(self):
+        for user in self.users:
+            set_comment_like(comment_pk=self.comment.pk, user_pk=user.pk, like=True)
+
+        notification = Notification.objects.get(user=self.author)
+        self.assertEqual(notification.others_count, 2)
+        self.assertEqual(notification.action.actor, self.users[-1])
+
+        # Once read, new likes are notified about separately
+        notification.date_read = notification.date_created
+        notification.save()
+        set_comment_like(comment_pk=self.comment.pk, user_pk=UserFactory().pk, like=True)
+
+        self.assertEqual(self.author.notifications.count(), 2)
+        self.assertEqual(self.author.notifications_unread.get().others_count, 0)
+
+    def test_replies_are_not_collapsed(self):
+        for user in self.users:
+            CommentUnderPostFactory(
+                user=user, reply_to=self.comment, comment_post__post=self.comment.post.get()
+            )
+
+        notifications = Notification.objects.filter(user=self.author)
+        self.assertEqual(notifications.count(), 3)
+        self.assertEqual({notification.others_count for notification in notifications}, {0})
+
+    @override_settings(NOTIFICATIONS_IN_BACKGROUND=True)
+    def test_notifications_are_created_in_background_in_bulk(self):
+        for user in self.users:
+            set_comment_like(comment_pk=self.comment.pk, user_pk=user.pk, like=True)
+        self.assertEqual(Notification.objects.count(), 0)
+        action_pks = sorted(Action.objects.values_list('pk', flat=True))
+        self.assertEqual(
+            sorted(PendingNotification.objects.values_list('action_id', flat=True)), action_pks
+        )
+        # A single task handles all pending notifications
+        self.assertEqual(
+            list(Task.objects.values_list('task_name', flat=True)),
+            [process_pending_notifications.name],
+        )
+
+        self.assertEqual(create_pending_notifications(), 3)
+
+        self.assertFalse(PendingNotification.objects.exists())
+        self.assertEqual(Notification.objects.get(user=self.author).others_count, 2)
+        self.assertEqual(create_pending_notifications(), 0)
+
+    def test_number_of_queries_does_not_depend_on_number_of_actions(self):
+        for user in self.users:
+            set_comment_like(comment_pk=self.comment.pk, user_pk=user.pk, like=True)
+        Notification.objects.all().delete()
+        action_pks = sorted(Action.objects.values_list('pk', flat=True))
+
+        with CaptureQueriesContext(connection) as single_action_queries:
+            create_notifications(action_pks[:1])
+        Notification.objects.all().delete()
+        with self.assertNumQueries(len(single_action_queries)):
+            create_notifications(action_pks)
+
+        self.assertEqual(Notification.objects.get(user=self.author).others_count, 2)
+
+
+class TestNotificationsPage(TestCase):
+    def setUp(self):
+        self.comment = CommentUnderPostFactory()
+        self.author = self.comment.user
+        post = self.comment.post.get()
+        self.replies = [
+            CommentUnderPostFactory(reply_to=self.comment, comment_post__post=post)
+            for _ in range(15)
+        ]
+        self.client.force_login(self.author)
+
+    def test_notifications_are_paginated(self):
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.notifications_unread_count, 15)
+
+        response = self.client.get(reverse('user-notification'))
+
+        self.assertEqual(response.status_code, 200)
+        first_page = response.context['notifications']
+        self.assertEqual(len(first_page), 10)
+        self.assertIsNotNone(response.context['next_page_url'])
+
+        response = self.client.get(response.context['next_page_url'])
+
+        self.assertEqual(response.status_code, 200)
+        second_page = response.context['notifications']
+        self.assertIsNone(response.context['next_page_url'])
+        self.assertEqual(
+            [notification.action.action_object for notification in first_page + second_page],
+            list(reversed(self.replies)),
+        )
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('user-notification'), {'cursor': 'invalid'})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_deleted_notifications_are_not_counted(self):
+        self.author.notifications.first().action.delete()
+
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.notifications_unread_count, 14)
+
+    def test_only_notifications_about_the_same_object_are_collapsed(self):
+        other_comment = CommentUnderPostFactory(user=self.author)
+        set_comment_like(comment_pk=self.comment.pk, user_pk=self.users[0].pk, like=True)
+        set_comment_like(comment_pk=other_comment.pk, user_pk=self.users[1].pk, like=True)
+        set_comment_like(comment_pk=other_comment.pk, user_pk=self.users[2].pk, like=True)
+
+        self.assertEqual(
+            sorted(self.author.notifications.values_list('others_count', flat=True)), [0, 1]
+        )
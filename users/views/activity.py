@@ -1,33 +1,49 @@
 """Profile activity pages, such as notifications and My activity."""
+from typing import Any, Callable, Dict
+from urllib.parse import urlencode
+
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models.query import QuerySet
-from django.views.generic import ListView
+from django.core.exceptions import BadRequest
+from django.views.generic import TemplateView
+
+from users.queries import ActivityPage, get_activity_page, get_notifications_page
+
+
+class _ActivityPageMixin:
+    """Show a page of items given by the `cursor` query parameter, the first page by default."""
 
-from actstream import models
-from users.models import Notification
+    context_object_name = ''
+    # Returns a page of items of the given user, set by each view
+    query_page: Callable[..., ActivityPage]
 
+    def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:  # noqa: D102
+        cursor = self.request.GET.get('cursor')
+        try:
+            page = self.query_page(self.request.user, cursor=cursor)
+        except ValueError:
+            raise BadRequest('Invalid cursor.')
+        context = super().get_context_data(**kwargs)
+        context[self.context_object_name] = page.items
+        context['next_page_url'] = (
+            f'{self.request.path}?{urlencode({"cursor": page.next_cursor})}'
+            if page.next_cursor
+            else None
+        )
+        context['is_first_page'] = not cursor
+        return context
 
-class Notifications(LoginRequiredMixin, ListView):
+
+class Notifications(LoginRequiredMixin, _ActivityPageMixin, TemplateView):
     """Display notifications for an authenticated user."""
 
     context_object_name = 'notifications'
-    model = Notification
-    paginate_by = 10
-    template_name_suffix = 's'
-
-    def get_queryset(self) -> QuerySet:
-        """Return user notifications instead of all notifications."""
-        return self.request.user.notifications.all()
+    template_name = 'users/notifications.html'
+    query_page = staticmethod(get_notifications_page)
 
 
-class Activity(LoginRequiredMixin, ListView):
+class Activity(LoginRequiredMixin, _ActivityPageMixin, TemplateView):
     """Display latest activity of an authenticated user."""
 
     context_object_name = 'action_list'
-    model = models.Action
-    paginate_by = 10
     template_name = 'users/activity.html'
-
-    def get_queryset(self) -> QuerySet:
-        """Return user activity."""
-        return self.request.user.actor_actions.all()
+    query_page = staticmethod(get_activity_page)
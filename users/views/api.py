@@ -2,12 +2,12 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.http import HttpResponseForbidden
 from django.http.response import JsonResponse
-from django.utils import timezone
 from django.views import View
 from django.views.generic.detail import SingleObjectMixin
 from django.contrib.auth import get_user_model
 
 from users.models import Notification
+from users.queries import mark_all_notifications_read, mark_notification_read
 
 User = get_user_model()
 
@@ -24,8 +24,7 @@ class NotificationMarkReadView(LoginRequiredMixin, SingleObjectMixin, View):
         if notification.user != request.user:
             return HttpResponseForbidden()
 
-        notification.date_read = timezone.now()
-        notification.save(update_fields=['date_read'])
+        mark_notification_read(notification)
 
         return JsonResponse({})
 
@@ -38,11 +37,6 @@ class NotificationsMarkReadView(LoginRequiredMixin, View):
 
     def post(self, request, *args, **kwargs):
         """Mark all previously unread notifications as read."""
-        unread = self.model.objects.filter(user=request.user, date_read__isnull=True)
-        now = timezone.now()
-        for notification in unread:
-            notification.date_read = now
-
-        Notification.objects.bulk_update(unread, ['date_read'])
+        mark_all_notifications_read(request.user)
 
         return JsonResponse({})